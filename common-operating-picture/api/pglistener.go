@@ -57,6 +57,7 @@ func connectPgxListener(pool *pgxpool.Pool, clients *activeclients.ActiveClients
 				Geo:     obj.Geo.String(),
 				Search:  string(obj.Search),
 				TdfBlob: obj.TdfBlob,
+				TdfUri:  obj.TdfUri.String,
 			},
 		})
 
@@ -120,8 +121,13 @@ func parsePgNotifyPayload(payload string) (*db.TdfObject, error) {
 	}
 	object.Search = search
 
+	// tdf_blob is null when the ciphertext is stored out of row at tdf_uri
+	if tmp.TdfUri != "" {
+		object.TdfUri = pgtype.Text{String: tmp.TdfUri, Valid: true}
+	}
+
 	// postgres converts bytea to a hex string when jsonified
-	if tmp.TdfBlob[:2] == "\\x" {
+	if strings.HasPrefix(tmp.TdfBlob, "\\x") {
 		// remove the leading \x
 		tmp.TdfBlob = tmp.TdfBlob[2:]
 		// decode the hex string
@@ -96,3 +96,28 @@ func Test_parsePgNotifyPayload(t *testing.T) {
 		})
 	}
 }
+
+func Test_parsePgNotifyPayload_outOfRowBlob(t *testing.T) {
+	id := uuid.New().String()
+	payload := `
+		{
+			"id": "` + id + `",
+			"ts":"` + time.Now().Format(pgTimeFormat) + `",
+			"src_type":"vehicles",
+			"geo":null,
+			"search":null,
+			"tdf_blob":null,
+			"tdf_uri":"s3://cop-demo/tdf/` + id + `.tdf"
+		}
+	`
+	object, err := parsePgNotifyPayload(payload)
+	if err != nil {
+		t.Fatalf("parsePgNotifyPayload failed: %v", err)
+	}
+	if object.TdfBlob != nil {
+		t.Errorf("object.TdfBlob = %s; want nil", object.TdfBlob)
+	}
+	if want := "s3://cop-demo/tdf/" + id + ".tdf"; !object.TdfUri.Valid || object.TdfUri.String != want {
+		t.Errorf("object.TdfUri = %v; want %s", object.TdfUri, want)
+	}
+}
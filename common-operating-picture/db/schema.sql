@@ -56,9 +56,12 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Add trigger to notify on insert
+-- Bulk loaders set cop.bulk_load = 'on' for their session to skip per-row
+-- notifications and publish a single summary on tdf_objects_bulk_loaded instead.
 CREATE OR REPLACE TRIGGER notify_tdf_objects_inserted
 	AFTER INSERT ON tdf_objects
 	FOR EACH ROW
+	WHEN (current_setting('cop.bulk_load', true) IS DISTINCT FROM 'on')
 	EXECUTE PROCEDURE notify_tdf_objects_inserted();
 
 
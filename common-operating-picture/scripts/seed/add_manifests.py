@@ -1,13 +1,23 @@
 import os
-import uuid
 import json
+import time
+import uuid
+import select
+import signal
+import threading
 import random
+import hashlib
 import psycopg2
 import argparse
-import requests
-import boto3
-import base64
 import urllib3
+import itertools
+import manifest_engine
+import manifest_codec
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+from s4_credentials import CredentialProvider
+from seed_metrics import StageMetrics
+from bulk_load import BULK_LOADED_CHANNEL
 from faker import Faker
 from datetime import datetime, timedelta
 
@@ -70,98 +80,99 @@ S4_STS_ENDPOINT = _s4_base
 S4_S3_ENDPOINT = _s4_base
 S4_BUCKET = "cop-demo"
 S4_REGION = "us-east-1"
+CREDENTIALS = CredentialProvider(TOKEN_URL, CLIENT_ID, CLIENT_SECRET, KC_USER, KC_PASS, S4_STS_ENDPOINT)
 print(f"[config] S4_STS_ENDPOINT={S4_STS_ENDPOINT} S4_BUCKET={S4_BUCKET}")
 
+# --- Stage metrics (db_read, s4_head, manifest, s4_upload, db_write) ---
+METRICS = StageMetrics("add_manifests")
+
+# --- Vehicle row discovery (keyset pagination on id) ---
+VEHICLE_PAGE_SIZE = 500
+NIL_UUID = "00000000-0000-0000-0000-000000000000"
+VEHICLE_PAGE_SQL = """
+SELECT id, search, metadata FROM tdf_objects
+WHERE src_type = 'vehicles' {filter} AND id > %s::uuid
+ORDER BY id
+LIMIT %s
+"""
+
+# --- Daemon mode (LISTEN on insert notifications, micro-batched) ---
+INSERTED_CHANNEL = "tdf_objects_inserted"
+DAEMON_BATCH_ROWS = 100
+DAEMON_BATCH_SECONDS = 1.0
+DAEMON_RECONNECT_SECONDS = 5.0
+DAEMON_RECONNECT_MAX_SECONDS = 60.0
+VEHICLES_BY_ID_SQL = """
+SELECT id, search, metadata FROM tdf_objects
+WHERE id = ANY(%s::uuid[]) AND src_type = 'vehicles' AND (metadata->>'manifest') IS NULL
+ORDER BY id
+"""
+
+# --- Batched manifest URI updates ---
+UPDATE_FLUSH_ROWS = 500
+UPDATE_FLUSH_SECONDS = 2.0
+UPDATE_MANIFEST_URIS_SQL = """
+UPDATE tdf_objects AS t
+SET
+    metadata = t.metadata || jsonb_build_object('manifest', src.manifest_uri)
+FROM
+    (SELECT unnest(%s::uuid[]) AS id, unnest(%s::text[]) AS manifest_uri) AS src
+WHERE
+    t.id = src.id
+"""
+# --content-hash runs also record the digest the row's manifest was built from.
+UPDATE_MANIFEST_URIS_AND_DIGESTS_SQL = """
+UPDATE tdf_objects AS t
+SET
+    metadata = t.metadata || jsonb_build_object('manifest', src.manifest_uri, 'manifest_digest', src.manifest_digest)
+FROM
+    (SELECT unnest(%s::uuid[]) AS id, unnest(%s::text[]) AS manifest_uri, unnest(%s::text[]) AS manifest_digest) AS src
+WHERE
+    t.id = src.id
+"""
+
+# --- Content-addressed re-runs (--content-hash) ---
+# Bump when the manifest generators change shape so every manifest is rebuilt once.
+MANIFEST_DIGEST_VERSION = "1"
+DIGEST_METADATA_KEY = "manifest-digest"
+HEAD_CONCURRENCY = 32
+
 # --- Fixed Need-to-Know attribute for all manifests ---
 NEEDTOKNOW_ATTR = "https://demo.com/attr/needtoknow/value/bbb"
 TOPSECRET_ATTR = "https://demo.com/attr/classification/value/topsecret"
 
 # --- IC/Military Reference Data ---
-MILITARY_BRANCHES = ["USAF", "USN", "USA", "USMC", "USSF", "USCG"]
-COALITION_COUNTRIES = ["USA", "GBR", "CAN", "AUS", "NZL", "DEU", "FRA", "ITA", "NOR", "DNK"]
-AIRCRAFT_PLATFORMS = [
-    {"designation": "F-35A", "name": "Lightning II", "type": "FIGHTER", "service": "USAF"},
-    {"designation": "F-22A", "name": "Raptor", "type": "FIGHTER", "service": "USAF"},
-    {"designation": "F/A-18E", "name": "Super Hornet", "type": "FIGHTER", "service": "USN"},
-    {"designation": "B-2A", "name": "Spirit", "type": "BOMBER", "service": "USAF"},
-    {"designation": "KC-135R", "name": "Stratotanker", "type": "TANKER", "service": "USAF"},
-    {"designation": "E-3G", "name": "Sentry", "type": "AWACS", "service": "USAF"},
-    {"designation": "MQ-9A", "name": "Reaper", "type": "UAV", "service": "USAF"},
-    {"designation": "RQ-4B", "name": "Global Hawk", "type": "UAV", "service": "USAF"},
-    {"designation": "P-8A", "name": "Poseidon", "type": "MPA", "service": "USN"},
-    {"designation": "C-17A", "name": "Globemaster III", "type": "TRANSPORT", "service": "USAF"},
-    {"designation": "RC-135V", "name": "Rivet Joint", "type": "ISR", "service": "USAF"},
-    {"designation": "EP-3E", "name": "Aries II", "type": "SIGINT", "service": "USN"},
-]
-MISSION_TYPES = ["ISR", "CAP", "CAS", "SEAD", "STRIKE", "RECON", "TANKER", "AIRLIFT", "SAR", "ELINT", "SIGINT"]
-OPERATIONAL_STATUS = ["ACTIVE", "RTB", "ON_STATION", "TRANSITING", "HOLDING", "REFUELING", "MAINTENANCE"]
-INTEL_SOURCES = ["SIGINT", "IMINT", "MASINT", "HUMINT", "OSINT", "GEOINT", "ELINT", "COMINT"]
-COMMAND_ELEMENTS = ["CENTCOM", "EUCOM", "INDOPACOM", "AFRICOM", "NORTHCOM", "SOUTHCOM", "SPACECOM", "CYBERCOM"]
-SECURITY_CAVEATS = ["NOFORN", "FVEY", "REL TO USA", "ORCON", "PROPIN", "REL TO NATO"]
-SENSOR_TYPES = ["SAR", "EO/IR", "MTI", "GMTI", "ESM", "COMMS", "RADAR", "LIDAR"]
-EMISSION_CONTROL = ["EMCON ALPHA", "EMCON BRAVO", "EMCON CHARLIE", "EMCON DELTA"]
+from manifest_engine import (
+    MILITARY_BRANCHES, COALITION_COUNTRIES, AIRCRAFT_PLATFORMS, MISSION_TYPES, OPERATIONAL_STATUS,
+    INTEL_SOURCES, COMMAND_ELEMENTS, SECURITY_CAVEATS, SENSOR_TYPES, EMISSION_CONTROL,
+)
 
 
 def get_auth_token():
-    print(f"[auth] requesting token from {TOKEN_URL} as {KC_USER}")
-    auth = f"{CLIENT_ID}:{CLIENT_SECRET}"
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded',
-        'Authorization': 'Basic ' + base64.b64encode(auth.encode()).decode()
-    }
-    payload = {
-        'grant_type': 'password',
-        'username': KC_USER,
-        'password': KC_PASS,
-    }
-    response = requests.post(TOKEN_URL, headers=headers, data=payload, verify=False)
-    print(f"[auth] token response status: {response.status_code}")
-    if response.status_code != 200:
-        print(f"[auth] error body: {response.text}")
-        response.raise_for_status()
-    print(f"[auth] token acquired successfully")
-    return response.json()['access_token']
-
-
-def get_s4_s3_client():
-    print(f"[s4] getting auth token for STS...")
-    token = get_auth_token()
-    print(f"[s4] assuming role via STS at {S4_STS_ENDPOINT}")
-    sts_client = boto3.client('sts', endpoint_url=S4_STS_ENDPOINT, verify=False)
-
-    response = sts_client.assume_role_with_web_identity(
-        RoleArn='arn:aws:iam::xxxx:xxx/xxx',
-        RoleSessionName='WebIdentitySession',
-        WebIdentityToken=token,
-        DurationSeconds=3600
-    )
-    print(f"[s4] STS assume_role succeeded")
-
-    creds = response['Credentials']
-    print(f"[s4] building S3 client at {S4_S3_ENDPOINT}")
-    return boto3.client(
-        's3',
-        endpoint_url=S4_S3_ENDPOINT,
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds.get('SessionToken'),
-        region_name=S4_REGION,
-        verify=False
-    )
+    return CREDENTIALS.token()
+
+
+def get_s4_s3_client(max_pool_connections=10):
+    return CREDENTIALS.start().s3_client(S4_S3_ENDPOINT, S4_REGION,
+                                         Config(max_pool_connections=max_pool_connections))
 
 
-def upload_to_s4(s3_client, filename, data_dict, attributes: list[str]):
-    payload = json.dumps(data_dict).encode('utf-8')
+def upload_to_s4(s3_client, filename, data_dict, attributes: list[str], digest: str = None, compression="none"):
+    payload, extra_metadata = manifest_codec.encode(manifest_engine.dumps(data_dict), compression)
     metadata = {}
     for i, attr in enumerate(attributes):
         metadata[f'tdf-data-attribute-{i}'] = attr
-
-    s3_client.put_object(
-        Bucket=S4_BUCKET,
-        Key=filename,
-        Body=payload,
-        Metadata=metadata
-    )
+    metadata.update(extra_metadata)
+    if digest:
+        metadata[DIGEST_METADATA_KEY] = digest
+
+    with METRICS.time("s4_upload"):
+        s3_client.put_object(
+            Bucket=S4_BUCKET,
+            Key=filename,
+            Body=payload,
+            Metadata=metadata
+        )
     return f"s3://{S4_BUCKET}/{filename}"
 
 
@@ -280,35 +291,127 @@ def generate_military_manifest(fake, record_id, classification, rel_to: list[str
     return manifest
 
 
-def get_vehicles_without_manifests(conn, include_existing: bool):
-    cursor = conn.cursor()
+def get_vehicles_without_manifests(conn, include_existing: bool, page_size: int = VEHICLE_PAGE_SIZE):
+    """Yields (id, search, metadata) vehicle rows a page at a time using keyset pagination on id.
+
+    Each page is a fresh `id > last_id ORDER BY id LIMIT page_size` query, so
+    memory stays at one page and the updater's commits in between are safe
+    (a named cursor would be closed by them).
+    """
     if include_existing:
-        print("[db] querying all vehicle rows (--all flag set)...")
-        cursor.execute(
-            "SELECT id, search, metadata FROM tdf_objects WHERE src_type = 'vehicles'"
-        )
+        print(f"[db] streaming all vehicle rows (--all flag set), {page_size} per page...")
+        query = VEHICLE_PAGE_SQL.format(filter="")
     else:
-        print("[db] querying vehicle rows missing manifest...")
-        cursor.execute(
-            "SELECT id, search, metadata FROM tdf_objects "
-            "WHERE src_type = 'vehicles' AND (metadata->>'manifest') IS NULL"
-        )
-    rows = cursor.fetchall()
-    cursor.close()
-    print(f"[db] found {len(rows)} vehicle row(s) to process")
-    return rows
-
-
-def update_manifest_uri(conn, row_id, manifest_uri):
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE tdf_objects "
-        "SET metadata = metadata || jsonb_build_object('manifest', %s::text) "
-        "WHERE id = %s",
-        (manifest_uri, row_id)
-    )
-    conn.commit()
-    cursor.close()
+        print(f"[db] streaming vehicle rows missing manifest, {page_size} per page...")
+        query = VEHICLE_PAGE_SQL.format(filter="AND (metadata->>'manifest') IS NULL")
+
+    last_id = NIL_UUID
+    found = 0
+    while True:
+        cursor = conn.cursor()
+        with METRICS.time("db_read"):
+            cursor.execute(query, (last_id, page_size))
+            rows = cursor.fetchall()
+        cursor.close()
+        found += len(rows)
+        yield from rows
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1][0]
+    print(f"[db] found {found} vehicle row(s) to process")
+
+
+class ManifestUriUpdater:
+    """Buffers (row id, manifest URI) pairs and writes them with one set-based UPDATE + commit per flush.
+
+    With with_digests set (--content-hash runs) each row's manifest digest is
+    buffered and written alongside its URI; otherwise the digest is ignored
+    and metadata.manifest_digest is left as it was.
+
+    A flush happens once flush_rows pairs are pending or flush_seconds have
+    passed since the oldest pending one was added, and on close(). add()
+    only sees the second condition when rows keep arriving, so callers that
+    can stall between rows (idle daemon polls, long runs of skipped rows,
+    failed uploads) call flush_if_due() as well.
+    """
+
+    def __init__(self, conn, flush_rows=UPDATE_FLUSH_ROWS, flush_seconds=UPDATE_FLUSH_SECONDS, with_digests=False):
+        self.conn = conn
+        self.with_digests = with_digests
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.updated = 0
+        self._ids = []
+        self._uris = []
+        self._digests = []
+        self._oldest = None
+        self._started = time.perf_counter()
+
+    def add(self, row_id, manifest_uri, digest=None):
+        if not self._ids:
+            self._oldest = time.perf_counter()
+        self._ids.append(str(row_id))
+        self._uris.append(manifest_uri)
+        if self.with_digests:
+            self._digests.append(digest)
+        if len(self._ids) >= self.flush_rows:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flushes if the oldest pending update has waited flush_seconds."""
+        if self._ids and time.perf_counter() - self._oldest >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if not self._ids:
+            return
+        cursor = self.conn.cursor()
+        with METRICS.time("db_write", items=len(self._ids)):
+            if self.with_digests:
+                cursor.execute(UPDATE_MANIFEST_URIS_AND_DIGESTS_SQL, (self._ids, self._uris, self._digests))
+            else:
+                cursor.execute(UPDATE_MANIFEST_URIS_SQL, (self._ids, self._uris))
+            self.conn.commit()
+        cursor.close()
+        self.updated += len(self._ids)
+        elapsed = time.perf_counter() - self._started
+        print(f"[db] flushed {len(self._ids)} manifest URI(s), {self.updated} total "
+              f"({self.updated / max(elapsed, 1e-9):.1f} updates/s)")
+        self._ids, self._uris, self._digests = [], [], []
+
+    def close(self):
+        self.flush()
+
+
+def with_manifests(rows, fake, engine=None, batch_size=manifest_engine.DEFAULT_BATCH_SIZE):
+    """Yields (row_id, search_jsonb, metadata_jsonb, manifest) for each vehicle row.
+
+    The manifest is always TS; caveats carry the vehicle's relTo and needToKnow.
+    With a ManifestEngine the manifests are built batch_size rows at a time.
+    """
+    if engine is None:
+        for row_id, search_jsonb, metadata_jsonb in rows:
+            with METRICS.time("manifest"):
+                manifest = generate_military_manifest(
+                    fake, str(row_id), "topsecret",
+                    rel_to=search_jsonb.get("attrRelTo", []),
+                    ntk=search_jsonb.get("attrNeedToKnow", []),
+                )
+            yield row_id, search_jsonb, metadata_jsonb, manifest
+        return
+
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, batch_size)):
+        with METRICS.time("manifest", items=len(batch)):
+            manifests = engine.generate(
+                [str(row_id) for row_id, _, _ in batch],
+                ["topsecret"] * len(batch),
+                caveats=[search.get("attrRelTo", []) + search.get("attrNeedToKnow", []) for _, search, _ in batch],
+            )
+        for (row_id, search_jsonb, metadata_jsonb), manifest in zip(batch, manifests):
+            yield row_id, search_jsonb, metadata_jsonb, manifest
 
 
 def extract_classification(search_jsonb):
@@ -320,55 +423,150 @@ def extract_classification(search_jsonb):
     return attrs[0].rstrip("/").split("/")[-1]
 
 
-def add_manifests(include_existing: bool):
+def manifest_digest(row_id, search_jsonb, engine_name, compression="none"):
+    """SHA-256 over everything that decides a vehicle's stored manifest.
+
+    The generators draw fresh values on every call, so hashing the generated
+    bytes would never match across runs; instead the digest covers the row id,
+    the TS label, the vehicle's relTo/needToKnow caveats, the engine, the
+    --compress encoding and MANIFEST_DIGEST_VERSION. Equal digests mean an
+    equivalent manifest stored the same way.
+    """
+    key = json.dumps([
+        MANIFEST_DIGEST_VERSION, engine_name, str(row_id), "topsecret",
+        search_jsonb.get("attrRelTo", []), search_jsonb.get("attrNeedToKnow", []), compression,
+    ], separators=(",", ":"))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _manifest_key(row_id):
+    return f"manifests/{row_id}.json.tdf"
+
+
+def _stored_digest(s3_client, key):
+    """Digest recorded on the S4 object, or None if it is missing or carries none."""
+    try:
+        with METRICS.time("s4_head"):
+            response = s3_client.head_object(Bucket=S4_BUCKET, Key=key)
+    except Exception:
+        return None
+    return response.get("Metadata", {}).get(DIGEST_METADATA_KEY)
+
+
+def skip_unchanged(rows, s3_client, engine_name, concurrency=HEAD_CONCURRENCY, stats=None, on_chunk=None,
+                   compression="none"):
+    """Yields only the vehicle rows whose manifest has to be (re)built.
+
+    A row is skipped when the digest in its metadata equals the one it would
+    get now and a HEAD on its manifest object shows the same digest; rows
+    with a stale or missing digest go straight through without a HEAD. HEADs
+    run concurrency at a time, and on_chunk, if given, is called after each
+    chunk so a long run of skipped rows does not hold up pending work.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("skipped", 0)
+    rows = iter(rows)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="head") as pool:
+        while chunk := list(itertools.islice(rows, concurrency * 4)):
+            candidates = []
+            for row in chunk:
+                row_id, search_jsonb, metadata_jsonb = row
+                metadata_jsonb = metadata_jsonb or {}
+                digest = manifest_digest(row_id, search_jsonb, engine_name, compression)
+                if (metadata_jsonb.get("manifest_digest") == digest
+                        and metadata_jsonb.get("manifest") == f"s3://{S4_BUCKET}/{_manifest_key(row_id)}"):
+                    candidates.append((row, digest))
+                else:
+                    yield row
+            stored = pool.map(lambda candidate: _stored_digest(s3_client, _manifest_key(candidate[0][0])), candidates)
+            for (row, digest), found in zip(candidates, stored):
+                if found == digest:
+                    stats["skipped"] += 1
+                else:
+                    yield row
+            if on_chunk is not None:
+                on_chunk()
+
+
+def connect_db():
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT
+    )
+
+
+def attach_manifests(rows, s3_client, fake, engine, updater, compression="none", content_hash=False):
+    """Generates and uploads a manifest for each vehicle row and queues its URI; returns how many were attached.
+
+    With content_hash the manifest digest is computed, stored on the S4
+    object and queued with the URI; other runs skip it entirely.
+    """
+    engine_name = "faker" if engine is None else "pooled"
+    attached = 0
+    for i, (row_id, search_jsonb, metadata_jsonb, manifest_data) in enumerate(with_manifests(rows, fake, engine)):
+        manifest_key = _manifest_key(row_id)
+        digest = manifest_digest(row_id, search_jsonb, engine_name, compression) if content_hash else None
+
+        # Manifest is always TS — gate and document label must match.
+        # relTo and needToKnow match the vehicle exactly.
+        manifest_attributes = (
+            [TOPSECRET_ATTR]
+            + search_jsonb.get("attrRelTo", [])
+            + search_jsonb.get("attrNeedToKnow", [])
+        )
+
+        try:
+            manifest_uri = upload_to_s4(s3_client, manifest_key, manifest_data, manifest_attributes, digest,
+                                        compression)
+            print(f"  [{i+1}] {row_id} | TOPSECRET | manifest uploaded -> {manifest_uri}")
+        except Exception as e:
+            print(f"  [{i+1}] {row_id} | manifest upload FAILED: {e}")
+            updater.flush_if_due()
+            continue
+
+        updater.add(row_id, manifest_uri, digest)
+        attached += 1
+    return attached
+
+
+def add_manifests(include_existing: bool, engine_name: str = "faker",
+                  flush_rows: int = UPDATE_FLUSH_ROWS, flush_seconds: float = UPDATE_FLUSH_SECONDS,
+                  page_size: int = VEHICLE_PAGE_SIZE, content_hash: bool = False,
+                  head_concurrency: int = HEAD_CONCURRENCY, compression: str = "none"):
     conn = None
     try:
         print(f"[db] connecting to {DB_HOST}:{DB_PORT}/{DB_NAME}...")
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
+        conn = connect_db()
         print("[db] connected successfully")
 
-        rows = get_vehicles_without_manifests(conn, include_existing)
-        if not rows:
+        rows = get_vehicles_without_manifests(conn, include_existing, page_size)
+        first = next(rows, None)
+        if first is None:
             print("[main] no vehicles to process, exiting")
             return
+        rows = itertools.chain([first], rows)
 
         print("[s4] initializing S4 S3 client...")
-        s3_client = get_s4_s3_client()
+        s3_client = get_s4_s3_client(max(10, head_concurrency) if content_hash else 10)
         print("[s4] S4 S3 client initialized successfully")
 
-        fake = Faker()
-
-        for i, (row_id, search_jsonb, metadata_jsonb) in enumerate(rows):
-            manifest_data = generate_military_manifest(
-                fake, str(row_id), "topsecret",
-                rel_to=search_jsonb.get("attrRelTo", []),
-                ntk=search_jsonb.get("attrNeedToKnow", []),
-            )
-            manifest_key = f"manifests/{row_id}.json.tdf"
-
-            # Manifest is always TS — gate and document label must match.
-            # relTo and needToKnow match the vehicle exactly.
-            manifest_attributes = (
-                [TOPSECRET_ATTR]
-                + search_jsonb.get("attrRelTo", [])
-                + search_jsonb.get("attrNeedToKnow", [])
-            )
-
-            try:
-                manifest_uri = upload_to_s4(s3_client, manifest_key, manifest_data, manifest_attributes)
-                print(f"  [{i+1}/{len(rows)}] {row_id} | TOPSECRET | manifest uploaded -> {manifest_uri}")
-            except Exception as e:
-                print(f"  [{i+1}/{len(rows)}] {row_id} | manifest upload FAILED: {e}")
-                continue
+        updater = ManifestUriUpdater(conn, flush_rows, flush_seconds, with_digests=content_hash)
+        stats = {"skipped": 0}
+        if content_hash:
+            print(f"[s4] content-hash mode: skipping vehicles whose manifest digest is unchanged "
+                  f"({head_concurrency} concurrent HEADs)")
+            rows = skip_unchanged(rows, s3_client, engine_name, head_concurrency, stats, updater.flush_if_due,
+                                  compression)
 
-            update_manifest_uri(conn, row_id, manifest_uri)
-            print(f"  [{i+1}/{len(rows)}] {row_id} | metadata updated")
+        fake = Faker()
+        engine = manifest_engine.ManifestEngine() if engine_name == "pooled" else None
+        attached = attach_manifests(rows, s3_client, fake, engine, updater, compression, content_hash)
+        updater.close()
+        if content_hash:
+            print(f"[main] {attached} manifest(s) uploaded, {stats['skipped']} unchanged and skipped")
 
     except psycopg2.OperationalError as e:
         print(f"[db] CONNECTION ERROR: {e}")
@@ -388,6 +586,131 @@ def add_manifests(include_existing: bool):
             print("[db] connection closed")
 
 
+def _vehicle_ids(notification):
+    """Vehicle ids named by one notification; None asks for a catch-up scan instead."""
+    try:
+        payload = json.loads(notification.payload)
+    except ValueError:
+        return []
+    if payload.get("src_type") != "vehicles":
+        return []
+    if notification.channel == BULK_LOADED_CHANNEL:
+        # Bulk-load summaries list the ids of small batches; larger ones need a scan.
+        return payload.get("ids")
+    if (payload.get("metadata") or {}).get("manifest"):
+        return []
+    return [payload["id"]] if payload.get("id") else []
+
+
+def _until(stop, rows):
+    """Passes rows through until stop is set, so a long scan does not hold up shutdown."""
+    for row in rows:
+        if stop.is_set():
+            return
+        yield row
+
+
+def _reconnect_delay(failures):
+    """Exponential backoff with full jitter between daemon reconnect attempts."""
+    return random.uniform(0, min(DAEMON_RECONNECT_MAX_SECONDS, DAEMON_RECONNECT_SECONDS * 2 ** (failures - 1)))
+
+
+def run_daemon(engine_name: str = "faker", flush_rows: int = UPDATE_FLUSH_ROWS,
+               flush_seconds: float = UPDATE_FLUSH_SECONDS, page_size: int = VEHICLE_PAGE_SIZE,
+               batch_rows: int = DAEMON_BATCH_ROWS, batch_seconds: float = DAEMON_BATCH_SECONDS,
+               compression: str = "none"):
+    """Attaches manifests to new vehicle rows as they are inserted.
+
+    LISTENs on tdf_objects_inserted (and tdf_objects_bulk_loaded), collects
+    vehicle ids into micro-batches of batch_rows or batch_seconds, and runs
+    each batch through the same generate/upload/update path as the batch
+    scan. A catch-up scan runs after every (re)connect, once LISTEN is in
+    place, so rows inserted while the daemon was down are not missed. Any
+    database error drops both connections and reconnects with backoff.
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    print("[s4] initializing S4 S3 client...")
+    s3_client = get_s4_s3_client()
+    fake = Faker()
+    engine = manifest_engine.ManifestEngine() if engine_name == "pooled" else None
+
+    failures = 0
+    while not stop.is_set():
+        conn = listen_conn = None
+        try:
+            print(f"[daemon] connecting to {DB_HOST}:{DB_PORT}/{DB_NAME}...")
+            conn = connect_db()
+            listen_conn = connect_db()
+            listen_conn.autocommit = True
+            with listen_conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {INSERTED_CHANNEL}; LISTEN {BULK_LOADED_CHANNEL};")
+            print(f"[daemon] listening on {INSERTED_CHANNEL}, {BULK_LOADED_CHANNEL}")
+            failures = 0
+            updater = ManifestUriUpdater(conn, flush_rows, flush_seconds)
+
+            catch_up = True
+            pending = {}
+            oldest = None
+            while not stop.is_set():
+                if catch_up:
+                    catch_up = False
+                    print("[daemon] catch-up scan for vehicles missing a manifest...")
+                    attached = attach_manifests(_until(stop, get_vehicles_without_manifests(conn, False, page_size)),
+                                                s3_client, fake, engine, updater, compression)
+                    updater.flush()
+                    conn.commit()  # end the scan's read transaction so the daemon never idles inside one
+                    print(f"[daemon] catch-up attached {attached} manifest(s)")
+
+                timeout = batch_seconds if oldest is None else max(oldest + batch_seconds - time.monotonic(), 0)
+                if select.select([listen_conn], [], [], timeout) != ([], [], []):
+                    listen_conn.poll()
+                    for notification in listen_conn.notifies:
+                        ids = _vehicle_ids(notification)
+                        if ids is None:
+                            catch_up = True
+                            continue
+                        for row_id in ids:
+                            pending.setdefault(row_id, None)
+                        if pending and oldest is None:
+                            oldest = time.monotonic()
+                    listen_conn.notifies.clear()
+                updater.flush_if_due()
+
+                if pending and (len(pending) >= batch_rows or time.monotonic() - oldest >= batch_seconds):
+                    ids, pending, oldest = list(pending), {}, None
+                    with conn.cursor() as cursor:
+                        with METRICS.time("db_read"):
+                            cursor.execute(VEHICLES_BY_ID_SQL, (ids,))
+                            rows = cursor.fetchall()
+                    attached = attach_manifests(rows, s3_client, fake, engine, updater, compression)
+                    updater.flush()
+                    conn.commit()
+                    print(f"[daemon] micro-batch: {len(ids)} notified, {attached} manifest(s) attached")
+
+            updater.close()
+
+        except psycopg2.Error as e:
+            # OperationalError, InterfaceError ("connection already closed") and
+            # server-side errors alike: start over on fresh connections.
+            failures += 1
+            delay = _reconnect_delay(failures)
+            print(f"[daemon] DB ERROR ({type(e).__name__}): {e}; reconnecting in {delay:.1f}s")
+            stop.wait(delay)
+
+        finally:
+            for c in (conn, listen_conn):
+                if c:
+                    try:
+                        c.close()
+                    except psycopg2.Error:
+                        pass
+
+    print("[daemon] stopped")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Add S4 classified manifests to NiFi-seeded vehicle records."
@@ -397,6 +720,98 @@ if __name__ == "__main__":
         action="store_true",
         help="Re-process all vehicle rows, even those that already have a manifest."
     )
+    parser.add_argument(
+        "--manifest-engine",
+        choices=["faker", "pooled"],
+        default="faker",
+        help="faker: per-record Faker manifests (default); pooled: batched NumPy/value-pool ManifestEngine."
+    )
+    parser.add_argument(
+        "--compress",
+        choices=manifest_codec.CODECS,
+        default="none",
+        help="Compress manifests before upload (flagged in object metadata; readers decompress transparently)."
+    )
+    parser.add_argument(
+        "--content-hash",
+        action="store_true",
+        help="With --all, only rebuild manifests whose digest changed; unchanged ones are confirmed with a HEAD and skipped."
+    )
+    parser.add_argument(
+        "--head-concurrency",
+        type=int,
+        default=HEAD_CONCURRENCY,
+        help=f"Concurrent HEAD requests in --content-hash mode (default: {HEAD_CONCURRENCY})."
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running: LISTEN for inserted vehicles and attach manifests within seconds (after a catch-up scan)."
+    )
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=DAEMON_BATCH_ROWS,
+        help=f"Daemon micro-batch size in vehicle ids (default: {DAEMON_BATCH_ROWS})."
+    )
+    parser.add_argument(
+        "--batch-seconds",
+        type=float,
+        default=DAEMON_BATCH_SECONDS,
+        help=f"Longest a notified vehicle waits for its micro-batch (default: {DAEMON_BATCH_SECONDS}s)."
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=VEHICLE_PAGE_SIZE,
+        help=f"Vehicle rows fetched per keyset page (default: {VEHICLE_PAGE_SIZE})."
+    )
+    parser.add_argument(
+        "--flush-rows",
+        type=int,
+        default=UPDATE_FLUSH_ROWS,
+        help=f"Write buffered manifest URIs once this many are pending (default: {UPDATE_FLUSH_ROWS})."
+    )
+    parser.add_argument(
+        "--flush-seconds",
+        type=float,
+        default=UPDATE_FLUSH_SECONDS,
+        help=f"Write buffered manifest URIs at least this often (default: {UPDATE_FLUSH_SECONDS}s)."
+    )
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write the per-stage timing summary as JSON to PATH.")
+    parser.add_argument(
+        "--prometheus-textfile",
+        metavar="PATH",
+        help="Write the per-stage metrics to PATH in Prometheus textfile-collector format."
+    )
     args = parser.parse_args()
+    if args.flush_rows < 1:
+        parser.error("--flush-rows must be >= 1")
+    if args.page_size < 1:
+        parser.error("--page-size must be >= 1")
+
+    if args.daemon and args.all:
+        parser.error("--daemon cannot be combined with --all")
+    if args.content_hash and not args.all:
+        parser.error("--content-hash only applies to --all re-runs")
+    if args.batch_rows < 1:
+        parser.error("--batch-rows must be >= 1")
+    if args.head_concurrency < 1:
+        parser.error("--head-concurrency must be >= 1")
+    try:
+        manifest_codec.check_codec(args.compress)
+    except ValueError as e:
+        parser.error(str(e))
 
-    add_manifests(include_existing=args.all)
+    try:
+        if args.daemon:
+            run_daemon(engine_name=args.manifest_engine, flush_rows=args.flush_rows, flush_seconds=args.flush_seconds,
+                       page_size=args.page_size, batch_rows=args.batch_rows, batch_seconds=args.batch_seconds,
+                       compression=args.compress)
+        else:
+            add_manifests(include_existing=args.all, engine_name=args.manifest_engine,
+                          flush_rows=args.flush_rows, flush_seconds=args.flush_seconds, page_size=args.page_size,
+                          content_hash=args.content_hash, head_concurrency=args.head_concurrency,
+                          compression=args.compress)
+    finally:
+        METRICS.report(args.metrics_json, args.prometheus_textfile)
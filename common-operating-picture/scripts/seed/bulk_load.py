@@ -0,0 +1,102 @@
+"""
+Bulk-load notification control for the seed scripts.
+
+The tdf_objects insert trigger publishes every row (tdf_blob included) on the
+tdf_objects_inserted channel, which floods listeners during a bulk seed. The
+trigger skips rows while the session setting cop.bulk_load is 'on'; a seeder
+in bulk-load mode turns that on, tracks what it inserted, and publishes one
+summary on tdf_objects_bulk_loaded just before commit. NOTIFY is
+transactional, so the summary is delivered exactly when the rows become
+visible and listeners can re-query once instead of handling N messages.
+
+Each summary carries the load_id of the run that produced it (so listeners
+can group or de-duplicate the summaries of one load), the row count and ts
+range per src_type, and, for small batches, the exact row ids. Random UUID
+ids have no useful range, so larger batches are re-queried by ts instead.
+"""
+import json
+import uuid
+
+BULK_LOAD_SETTING = "cop.bulk_load"
+BULK_LOADED_CHANNEL = "tdf_objects_bulk_loaded"
+
+# Ids are listed only up to this many rows per src_type, keeping the payload
+# well under pg_notify's 8000-byte limit.
+MAX_SUMMARY_IDS = 100
+
+# Record tuples in the seeders start with (id, ts, src_type, ...).
+_ID, _TS, _SRC_TYPE = 0, 1, 2
+
+
+class BulkLoadSummary:
+    """Per-src_type row count, ts range and (for small batches) ids of the rows inserted since the last publish.
+
+    Summaries sharing a load_id belong to the same load; one is generated
+    when none is given.
+    """
+
+    def __init__(self, load_id=None, max_ids=MAX_SUMMARY_IDS):
+        self.load_id = load_id or str(uuid.uuid4())
+        self.max_ids = max_ids
+        self._by_src_type = {}
+
+    def add(self, record_id, ts, src_type):
+        entry = self._by_src_type.get(src_type)
+        if entry is None:
+            self._by_src_type[src_type] = [1, ts, ts, [record_id]]
+            return
+        entry[0] += 1
+        if ts < entry[1]:
+            entry[1] = ts
+        elif ts > entry[2]:
+            entry[2] = ts
+        ids = entry[3]
+        if ids is not None:
+            if len(ids) < self.max_ids:
+                ids.append(record_id)
+            else:
+                entry[3] = None
+
+    def track(self, records):
+        """Yields records unchanged while counting them into the summary."""
+        for record in records:
+            self.add(record[_ID], record[_TS], record[_SRC_TYPE])
+            yield record
+
+    def payloads(self):
+        for src_type, (count, min_ts, max_ts, ids) in self._by_src_type.items():
+            payload = {
+                "load_id": self.load_id,
+                "src_type": src_type,
+                "count": count,
+                "min_ts": min_ts.isoformat(),
+                "max_ts": max_ts.isoformat(),
+            }
+            if ids is not None:
+                payload["ids"] = [str(record_id) for record_id in ids]
+            yield json.dumps(payload)
+
+    def clear(self):
+        self._by_src_type.clear()
+
+    def __len__(self):
+        return sum(entry[0] for entry in self._by_src_type.values())
+
+
+def begin_bulk_load(cursor):
+    """Suppresses per-row insert notifications for the rest of this session."""
+    cursor.execute("SELECT set_config(%s, 'on', false)", (BULK_LOAD_SETTING,))
+
+
+def end_bulk_load(cursor):
+    cursor.execute("SELECT set_config(%s, 'off', false)", (BULK_LOAD_SETTING,))
+
+
+def publish_bulk_load_summary(cursor, summary):
+    """Queues one summary notification per src_type; delivered when the transaction commits."""
+    published = 0
+    for payload in summary.payloads():
+        cursor.execute("SELECT pg_notify(%s, %s)", (BULK_LOADED_CHANNEL, payload))
+        published += 1
+    summary.clear()
+    return published
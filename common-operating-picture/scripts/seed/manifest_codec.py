@@ -0,0 +1,192 @@
+"""
+Optional compression of manifest payloads stored in S4.
+
+Manifests are small, repetitive JSON documents, so compressing them before
+the PUT shrinks what goes over the wire to S4, what S4 encrypts and stores,
+and what every reader downloads. The codec is recorded in the object's
+user metadata under manifest-encoding; objects without it are plain JSON,
+so readers handle old and new manifests alike. zstd needs the zstandard
+package; gzip is always available.
+
+Benchmark (bytes and codec latency per manifest size class; --s4 also
+round-trips every variant through S4):
+  python3 scripts/seed/manifest_codec.py --samples 200
+"""
+
+import gzip
+import time
+import argparse
+import threading
+
+from seed_metrics import quantile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ENCODING_METADATA_KEY = "manifest-encoding"
+CODECS = ("none", "gzip", "zstd")
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# What decode() raises for a corrupt or truncated body, an unknown encoding or
+# a missing zstandard package (UnicodeDecodeError, raised by callers decoding
+# the result as UTF-8, is a ValueError too).
+DECODE_ERRORS = (OSError, EOFError, ValueError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+# ZstdCompressor/ZstdDecompressor instances must not be shared between threads.
+_zstd = threading.local()
+
+
+def _zstd_compressor():
+    compressor = getattr(_zstd, "compressor", None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor
+
+
+def _zstd_decompressor():
+    decompressor = getattr(_zstd, "decompressor", None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+def check_codec(codec):
+    """Raises ValueError if codec is unknown or its library is not installed."""
+    if codec not in CODECS:
+        raise ValueError(f"unknown manifest codec {codec!r} (expected one of {', '.join(CODECS)})")
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("zstd manifest compression needs the zstandard package")
+    return codec
+
+
+def encode(payload: bytes, codec="none"):
+    """Compresses a serialised manifest; returns (body, extra S3 metadata)."""
+    if codec == "none":
+        return payload, {}
+    if codec == "gzip":
+        # mtime=0 keeps the output a pure function of the input.
+        return gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0), {ENCODING_METADATA_KEY: "gzip"}
+    if codec == "zstd":
+        check_codec(codec)
+        return _zstd_compressor().compress(payload), {ENCODING_METADATA_KEY: "zstd"}
+    raise ValueError(f"unknown manifest codec {codec!r}")
+
+
+def decode(body: bytes, metadata=None):
+    """Inverse of encode(), driven by the object's metadata; bodies without an encoding are returned as is."""
+    encoding = (metadata or {}).get(ENCODING_METADATA_KEY, "none")
+    if encoding == "none":
+        return body
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("manifest is zstd-compressed but the zstandard package is not installed")
+        return _zstd_decompressor().decompress(body)
+    raise ValueError(f"unknown manifest encoding {encoding!r}")
+
+
+# --- Benchmark ---
+
+# Heavily tasked assets carry long target decks; the larger classes are built by
+# merging the target decks and collection requirements of that many manifests.
+SIZE_CLASSES = {"small": 1, "medium": 8, "large": 64}
+
+
+def _sample_manifests(count, merge, engine=None):
+    import numpy as np
+    import manifest_engine
+
+    engine = engine or manifest_engine.ManifestEngine(seed=7)
+    rng = np.random.default_rng(7)
+    manifests = []
+    while len(manifests) < count:
+        batch = engine.generate([str(i) for i in range(merge)], ["topsecret"] * merge, rng=rng,
+                                caveats=[["REL TO USA", "FVEY"]] * merge)
+        # The engine shares its pooled lists between manifests, so the merged
+        # lists are built fresh rather than extended in place.
+        intelligence = batch[0]["intelligence"]
+        manifest = {**batch[0], "intelligence": {
+            **intelligence,
+            "targetDeck": [t for m in batch for t in m["intelligence"]["targetDeck"]],
+            "collectionRequirements": [r for m in batch for r in m["intelligence"]["collectionRequirements"]],
+        }}
+        manifests.append(manifest_engine.dumps(manifest))
+    return manifests
+
+
+def _s4_round_trip(payloads, codec, size_class, s3_client, bucket, attributes):
+    """PUT then GET+decode every payload; returns (stored bytes, PUT seconds, GET seconds) lists."""
+    stored, put_times, get_times = [], [], []
+    keys = []
+    for i, payload in enumerate(payloads):
+        key = f"bench/manifest-codec/{size_class}/{codec}/{i}.json.tdf"
+        body, extra = encode(payload, codec)
+        metadata = {f"tdf-data-attribute-{n}": attr for n, attr in enumerate(attributes)}
+        metadata.update(extra)
+        start = time.perf_counter()
+        s3_client.put_object(Bucket=bucket, Key=key, Body=body, Metadata=metadata)
+        put_times.append(time.perf_counter() - start)
+        keys.append(key)
+    for key, payload in zip(keys, payloads):
+        start = time.perf_counter()
+        result = s3_client.get_object(Bucket=bucket, Key=key)
+        plaintext = decode(result["Body"].read(), result.get("Metadata"))
+        get_times.append(time.perf_counter() - start)
+        assert plaintext == payload, f"round trip of {key} changed the manifest"
+        stored.append(s3_client.head_object(Bucket=bucket, Key=key)["ContentLength"])
+    for key in keys:
+        s3_client.delete_object(Bucket=bucket, Key=key)
+    return stored, put_times, get_times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark manifest compression per size class.")
+    parser.add_argument("--samples", type=int, default=200, help="Manifests per size class (default: 200).")
+    parser.add_argument("--s4", action="store_true",
+                        help="Also PUT/GET every variant through S4 as KC_USER and report stored size and latency.")
+    parser.add_argument("--s4-samples", type=int, default=20, help="Manifests per class and codec sent to S4 (default: 20).")
+    args = parser.parse_args()
+
+    codecs = [codec for codec in CODECS if codec != "zstd" or zstandard is not None]
+    if zstandard is None:
+        print("[bench] zstandard not installed, skipping zstd")
+
+    s3_client = None
+    if args.s4:
+        import read_s4
+        s3_client = read_s4.get_s4_client(read_s4.KC_USER)
+        attributes = ["https://demo.com/attr/classification/value/topsecret",
+                      "https://demo.com/attr/needtoknow/value/bbb"]
+
+    print(f"[bench] {'class':<7} {'codec':<5} {'raw B':>8} {'wire B':>8} {'ratio':>6} "
+          f"{'enc p50 us':>10} {'dec p50 us':>10}")
+    for size_class, merge in SIZE_CLASSES.items():
+        payloads = _sample_manifests(args.samples, merge)
+        raw = sum(map(len, payloads)) / len(payloads)
+        for codec in codecs:
+            enc_times, dec_times, wire = [], [], 0
+            for payload in payloads:
+                start = time.perf_counter()
+                body, extra = encode(payload, codec)
+                enc_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                decode(body, extra)
+                dec_times.append(time.perf_counter() - start)
+                wire += len(body)
+            wire /= len(payloads)
+            enc_times.sort()
+            dec_times.sort()
+            print(f"[bench] {size_class:<7} {codec:<5} {raw:>8.0f} {wire:>8.0f} {raw / wire:>6.2f} "
+                  f"{quantile(enc_times, 0.5) * 1e6:>10.1f} {quantile(dec_times, 0.5) * 1e6:>10.1f}")
+            if s3_client is not None:
+                stored, put_times, get_times = _s4_round_trip(payloads[:args.s4_samples], codec, size_class,
+                                                              s3_client, read_s4.S4_BUCKET, attributes)
+                put_times.sort()
+                get_times.sort()
+                print(f"[bench]   s4: stored {sum(stored) / len(stored):.0f} B  "
+                      f"PUT p50 {quantile(put_times, 0.5) * 1e3:.1f}ms p95 {quantile(put_times, 0.95) * 1e3:.1f}ms  "
+                      f"GET+decode p50 {quantile(get_times, 0.5) * 1e3:.1f}ms p95 {quantile(get_times, 0.95) * 1e3:.1f}ms")
@@ -0,0 +1,459 @@
+"""
+Batch IC/Military manifest generator for the seed scripts.
+
+Faker is only used up front to fill fixed-size value pools. Each batch then
+takes all of its random draws as NumPy arrays and assembles manifests from
+the pools, so there are no per-field Faker calls or per-record clock reads.
+Manifests have the same structure as generate_military_manifest in
+seed_data.py / add_manifests.py.
+
+Benchmark:
+  python3 scripts/seed/manifest_engine.py --count 100000
+"""
+
+import gc
+import json
+import time
+import string
+import argparse
+import itertools
+from operator import itemgetter
+import numpy as np
+from faker import Faker
+from datetime import datetime, timedelta
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# --- IC/Military Reference Data ---
+MILITARY_BRANCHES = ["USAF", "USN", "USA", "USMC", "USSF", "USCG"]
+COALITION_COUNTRIES = ["USA", "GBR", "CAN", "AUS", "NZL", "DEU", "FRA", "ITA", "NOR", "DNK"]
+AIRCRAFT_PLATFORMS = [
+    {"designation": "F-35A", "name": "Lightning II", "type": "FIGHTER", "service": "USAF"},
+    {"designation": "F-22A", "name": "Raptor", "type": "FIGHTER", "service": "USAF"},
+    {"designation": "F/A-18E", "name": "Super Hornet", "type": "FIGHTER", "service": "USN"},
+    {"designation": "B-2A", "name": "Spirit", "type": "BOMBER", "service": "USAF"},
+    {"designation": "KC-135R", "name": "Stratotanker", "type": "TANKER", "service": "USAF"},
+    {"designation": "E-3G", "name": "Sentry", "type": "AWACS", "service": "USAF"},
+    {"designation": "MQ-9A", "name": "Reaper", "type": "UAV", "service": "USAF"},
+    {"designation": "RQ-4B", "name": "Global Hawk", "type": "UAV", "service": "USAF"},
+    {"designation": "P-8A", "name": "Poseidon", "type": "MPA", "service": "USN"},
+    {"designation": "C-17A", "name": "Globemaster III", "type": "TRANSPORT", "service": "USAF"},
+    {"designation": "RC-135V", "name": "Rivet Joint", "type": "ISR", "service": "USAF"},
+    {"designation": "EP-3E", "name": "Aries II", "type": "SIGINT", "service": "USN"},
+]
+MISSION_TYPES = ["ISR", "CAP", "CAS", "SEAD", "STRIKE", "RECON", "TANKER", "AIRLIFT", "SAR", "ELINT", "SIGINT"]
+OPERATIONAL_STATUS = ["ACTIVE", "RTB", "ON_STATION", "TRANSITING", "HOLDING", "REFUELING", "MAINTENANCE"]
+INTEL_SOURCES = ["SIGINT", "IMINT", "MASINT", "HUMINT", "OSINT", "GEOINT", "ELINT", "COMINT"]
+COMMAND_ELEMENTS = ["CENTCOM", "EUCOM", "INDOPACOM", "AFRICOM", "NORTHCOM", "SOUTHCOM", "SPACECOM", "CYBERCOM"]
+SECURITY_CAVEATS = ["NOFORN", "FVEY", "REL TO USA", "ORCON", "PROPIN", "REL TO NATO"]
+SENSOR_TYPES = ["SAR", "EO/IR", "MTI", "GMTI", "ESM", "COMMS", "RADAR", "LIDAR"]
+EMISSION_CONTROL = ["EMCON ALPHA", "EMCON BRAVO", "EMCON CHARLIE", "EMCON DELTA"]
+ORIGINATING_AGENCIES = ["DIA", "NGA", "NSA", "CIA", "NRO", "NASIC"]
+MISSION_PRIORITIES = ["ROUTINE", "PRIORITY", "IMMEDIATE", "FLASH"]
+TARGET_TYPES = ["FACILITY", "VEHICLE", "PERSONNEL", "COMMS", "RADAR"]
+DATALINKS = ["LINK-16", "SADL", "CDL", "TTNT", "MADL"]
+UNIT_TYPES = ["SQN", "WG", "GP"]
+TRACK_SOURCES = ["ADS-B", "MODE-S", "PRIMARY", "LINK-16", "SATELLITE"]
+UPDATE_RATES = [1, 2, 5, 10, 30]
+VALIDATED_CHOICES = [True, True, True, False]
+
+DEFAULT_POOL_SIZE = 4096
+DEFAULT_BATCH_SIZE = 1024
+
+
+def dumps(manifest) -> bytes:
+    """Serialises a manifest to compact UTF-8 JSON with orjson (pinned in requirements.txt).
+
+    The json fallback for environments without orjson writes the same
+    bytes, only slower, so uploaded manifests and content digests do not
+    depend on which one ran.
+    """
+    if orjson is not None:
+        return orjson.dumps(manifest)
+    return json.dumps(manifest, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _take(values, indices):
+    """[values[i] for i in indices], with the lookups done in C."""
+    if len(indices) == 1:
+        return [values[indices[0]]]
+    return itemgetter(*indices)(values)
+
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_UUID_HEX_SPANS = ((0, 8, 0), (9, 13, 8), (14, 18, 12), (19, 23, 16), (24, 36, 20))
+
+
+def _uuid4_strings(rng, n):
+    """n random version 4 UUID strings, formatted as one vectorised byte array."""
+    raw = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    nibbles = np.empty((n, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
+    hex_chars = _HEX_DIGITS[nibbles]
+    out = np.full((n, 36), ord("-"), dtype=np.uint8)
+    for start, stop, src in _UUID_HEX_SPANS:
+        out[:, start:stop] = hex_chars[:, src:src + stop - start]
+    text = out.tobytes().decode("ascii")
+    return [text[i:i + 36] for i in range(0, 36 * n, 36)]
+
+
+class _SamplePool:
+    """Every outcome of random.sample(values, k) for k uniform in [k_min, k_max], drawn by index."""
+
+    def __init__(self, values, k_min, k_max):
+        self.by_k = [[list(p) for p in itertools.permutations(values, k)] for k in range(k_min, k_max + 1)]
+        self.sizes = np.array([len(samples) for samples in self.by_k])
+
+    def draw(self, rng, n):
+        ks = rng.integers(0, len(self.by_k), n)
+        picks = (rng.random(n) * self.sizes[ks]).astype(np.int64)
+        by_k = self.by_k
+        return [by_k[k][p] for k, p in zip(ks.tolist(), picks.tolist())]
+
+
+class ManifestEngine:
+    """Builds manifests in batches from precomputed value pools.
+
+    Identifiers, names and the variable-length lists (restricted areas,
+    target decks, collection requirements, supporting units) are drawn
+    from pools of `pool_size` pre-built values. Pooled lists are shared
+    between manifests, so treat generated manifests as read-only. Pools
+    are derived from `seed`, and each batch draws from the NumPy Generator
+    it is given, so the same seed and rng reproduce the same manifests.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, seed=None):
+        fake = Faker()
+        if seed is not None:
+            fake.seed_instance(seed)
+        rng = np.random.default_rng(seed)
+        self.pool_size = pool_size
+
+        def ints(low, high, size=pool_size):
+            return rng.integers(low, high, size).tolist()
+
+        def pick(values, size=pool_size):
+            return _take(values, ints(0, len(values), size))
+
+        def codes(prefix, letters, digits):
+            return [f"{prefix}-{''.join(pick(string.ascii_uppercase, letters))}" + (f"-{n:0{digits}d}" if digits else "")
+                    for n in ints(0, 10 ** max(digits, 1))]
+
+        cities = [fake.city().upper() for _ in range(pool_size)]
+        words = [fake.word().upper() for _ in range(pool_size)]
+        self.names = [f"{fake.last_name().upper()}, {fake.first_name().upper()[0]}" for _ in range(pool_size)]
+        self.stations = {
+            "AFB": [f"{city} AFB" for city in cities],
+            "NAS": [f"{city} NAS" for city in cities],
+        }
+        self.operation_names = [f"OP {a} {b}" for a, b in zip(pick(words), pick(words))]
+
+        self.digits2 = [f"{i:02d}" for i in range(100)]
+        self.digits3 = [f"{i:03d}" for i in range(1000)]
+        self.digits4 = [f"{i:04d}" for i in range(10000)]
+        self.tail_numbers = [f"{a:02d}-{b:04d}" for a, b in zip(ints(0, 100), ints(0, 10000))]
+        self.mode5 = [f"M5-{a:04d}-{b}" for a, b in zip(ints(0, 10000), [''.join(pick(string.ascii_uppercase, 2)) for _ in range(pool_size)])]
+        self.operating_areas = codes("AO", 3, 2)
+        self.reporting = codes("RPTG", 3, 2)
+        self.nodes = codes("NODE", 3, 2)
+        self.checkin_points = codes("CP", 3, 0)
+        self.frequencies = [f"{mhz}.{khz:02d} MHz" for mhz in range(225, 401) for khz in range(100)]
+        self.altitude_blocks = [f"FL{lo}0-FL{hi}0" for lo in range(20, 46) for hi in range(46, 61)]
+        self.pipelines = [f"v{a}.{b}.{c}" for a in range(2, 5) for b in range(10) for c in range(100)]
+
+        self.restricted_areas = [[f"R-{n:04d}" for n in ints(0, 10000, k)] for k in ints(0, 4)]
+        self.requirements = [[f"CR-{n:04d}" for n in ints(0, 10000, k)] for k in ints(1, 4)]
+        self.supporting_units = [
+            [f"{branch} {n:03d} {unit}" for branch, n, unit in zip(pick(MILITARY_BRANCHES, k), ints(0, 1000, k), pick(UNIT_TYPES, k))]
+            for k in ints(1, 4)
+        ]
+        self.target_decks = [
+            [
+                {
+                    "targetId": f"TGT-{target_hex:06X}",
+                    "targetName": f"{word} {number}",
+                    "targetType": target_type,
+                    "priority": priority,
+                }
+                for target_hex, word, number, target_type, priority in zip(
+                    ints(0, 1 << 24, k), pick(words, k), ints(1, 100, k), pick(TARGET_TYPES, k), ints(1, 6, k))
+            ]
+            for k in ints(1, 5)
+        ]
+
+        self.caveats = _SamplePool(SECURITY_CAVEATS, 1, 3)
+        self.disciplines = _SamplePool(INTEL_SOURCES, 1, 3)
+        self.active_sensors = _SamplePool(SENSOR_TYPES, 1, 4)
+        self.datalinks = _SamplePool(DATALINKS, 1, 3)
+        self.partners = _SamplePool(COALITION_COUNTRIES, 0, 3)
+        self._timeline_now = None
+        self._timeline_iso = None
+
+    def _iso_minutes(self, now):
+        """ISO strings for every whole-minute timeline offset from now (-480 .. +660)."""
+        if now != self._timeline_now:
+            self._timeline_now = now
+            self._timeline_iso = [(now + timedelta(minutes=m)).isoformat() + "Z" for m in range(-480, 661)]
+        return self._timeline_iso
+
+    def generate(self, record_ids, classifications, now=None, rng=None, caveats=None):
+        """Returns one manifest per record id.
+
+        classifications gives the short label per record (e.g. "secret").
+        caveats, if given, is a list per record that replaces the randomly
+        sampled security caveats.
+        """
+        n = len(record_ids)
+        if n == 0:
+            return []
+        now = now or datetime.now()
+        rng = rng if rng is not None else np.random.default_rng()
+        pool = self.pool_size
+
+        def draw(low, high):
+            return rng.integers(low, high, n)
+
+        def choices(values):
+            return _take(values, draw(0, len(values)).tolist())
+
+        def pooled(values):
+            return _take(values, draw(0, pool).tolist())
+
+        # --- Timeline: every stamp is a whole-minute offset from now ---
+        iso = self._iso_minutes(now)
+        start = -60 * draw(1, 9)
+        end = start + 60 * draw(2, 13)
+        scheduled = _take(iso, (start + 480).tolist())
+        takeoff = _take(iso, (start + draw(0, 31) + 480).tolist())
+        on_station = _take(iso, (start + 60 * draw(1, 4) + 480).tolist())
+        off_station = _take(iso, (end - 60 + 480).tolist())
+        recovery = _take(iso, (end + 480).tolist())
+
+        # --- Platform-dependent fields ---
+        platform_idx = draw(0, len(AIRCRAFT_PLATFORMS))
+        platforms = _take(AIRCRAFT_PLATFORMS, platform_idx.tolist())
+        registrations = [f"{p['service']}-{num}" for p, num in zip(platforms, choices(self.digits4))]
+        operators = [f"{branch} {num} {'SQN' if p['type'] in ('FIGHTER', 'BOMBER') else 'WG'}"
+                     for p, branch, num in zip(platforms, choices(MILITARY_BRANCHES), choices(self.digits3))]
+        station_idx = draw(0, pool).tolist()
+        afb, nas = self.stations["AFB"], self.stations["NAS"]
+        home_stations = [afb[j] if p["service"] == "USAF" else nas[j] for p, j in zip(platforms, station_idx)]
+        icao_hex = [f"{x:06x}" for x in draw(0, 1 << 24).tolist()]
+
+        mission_day = now.strftime('%Y%m%d')
+        ato_day = now.strftime('%Y%j')
+        mission_ids = [f"MSN-{mission_day}-{num}" for num in choices(self.digits4)]
+        tasking_orders = [f"ATO-{ato_day}-{num}" for num in choices(self.digits3)]
+        upper = {label: label.upper() for label in set(classifications)}
+
+        columns = zip(
+            record_ids,
+            [upper[label] for label in classifications],
+            self.caveats.draw(rng, n) if caveats is None else caveats,
+            pooled(self.names),
+            choices(ORIGINATING_AGENCIES),
+            registrations,
+            pooled(self.tail_numbers),
+            operators,
+            platforms,
+            home_stations,
+            icao_hex,
+            pooled(self.mode5),
+            mission_ids,
+            pooled(self.operation_names),
+            choices(MISSION_TYPES),
+            choices(MISSION_PRIORITIES),
+            choices(COMMAND_ELEMENTS),
+            tasking_orders,
+            choices(OPERATIONAL_STATUS),
+            scheduled, takeoff, on_station, off_station, recovery,
+            pooled(self.operating_areas),
+            choices(self.altitude_blocks),
+            pooled(self.restricted_areas),
+            self.disciplines.draw(rng, n),
+            pooled(self.target_decks),
+            pooled(self.requirements),
+            pooled(self.reporting),
+            choices(SENSOR_TYPES),
+            self.active_sensors.draw(rng, n),
+            choices(EMISSION_CONTROL),
+            self.datalinks.draw(rng, n),
+            pooled(self.supporting_units),
+            self.partners.draw(rng, n),
+            choices(self.frequencies),
+            choices(self.frequencies),
+            pooled(self.checkin_points),
+            choices(TRACK_SOURCES),
+            np.round(rng.uniform(0.85, 0.99, n), 3).tolist(),
+            np.round(rng.uniform(5, 50, n), 1).tolist(),
+            np.round(rng.uniform(0.5, 5, n), 2).tolist(),
+            choices(UPDATE_RATES),
+            choices(self.pipelines),
+            pooled(self.nodes),
+            np.round(rng.uniform(10, 500, n), 1).tolist(),
+            choices(VALIDATED_CHOICES),
+            draw(1, 6).tolist(),
+            _uuid4_strings(rng, n),
+            _uuid4_strings(rng, n),
+        )
+
+        now_iso = now.isoformat() + "Z"
+        declassify_on = (now + timedelta(days=365*25)).strftime("%Y-%m-%d")
+
+        # Manifests hold no reference cycles, so the cyclic GC is paused while
+        # the batch is assembled rather than re-scanning it every few hundred dicts.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._assemble(columns, now_iso, declassify_on)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    @staticmethod
+    def _assemble(columns, now_iso, declassify_on):
+        return [
+            {
+                "documentControl": {
+                    "manifestId": manifest_id,
+                    "recordId": record_id,
+                    "version": "2.1",
+                    "classification": classification,
+                    "caveats": record_caveats,
+                    "declassifyOn": declassify_on,
+                    "createdAt": now_iso,
+                    "createdBy": created_by,
+                    "originatingAgency": agency,
+                },
+
+                "vehicle": {
+                    "registration": registration,
+                    "tailNumber": tail_number,
+                    "operator": operator,
+                    "platform": {
+                        "designation": platform["designation"],
+                        "name": platform["name"],
+                        "type": platform["type"],
+                        "service": platform["service"],
+                    },
+                    "homeStation": home_station,
+                    "icaoHex": icao,
+                    "mode5Interrogator": mode5,
+                },
+
+                "mission": {
+                    "missionId": mission_id,
+                    "operationName": operation_name,
+                    "missionType": mission_type,
+                    "priority": priority,
+                    "commandAuthority": command,
+                    "taskingOrder": tasking_order,
+                    "missionStatus": status,
+                    "timeline": {
+                        "scheduled": t_scheduled,
+                        "takeoff": t_takeoff,
+                        "onStation": t_on,
+                        "offStation": t_off,
+                        "expectedRecovery": t_recovery,
+                    },
+                    "airspace": {
+                        "operatingArea": operating_area,
+                        "altitudeBlock": altitude_block,
+                        "restrictedAreas": restricted,
+                    },
+                },
+
+                "intelligence": {
+                    "collectionDiscipline": disciplines,
+                    "targetDeck": target_deck,
+                    "collectionRequirements": requirements,
+                    "reportingInstructions": reporting,
+                },
+
+                "sensors": {
+                    "primarySensor": primary_sensor,
+                    "activeSensors": active_sensors,
+                    "emissionControl": emcon,
+                    "datalinks": datalinks,
+                },
+
+                "coordination": {
+                    "supportingUnits": units,
+                    "coalitionPartners": partners,
+                    "frequencyPlan": {
+                        "primary": primary_freq,
+                        "secondary": secondary_freq,
+                        "guard": "243.00 MHz",
+                    },
+                    "checkInPoint": checkin,
+                },
+
+                "trackQuality": {
+                    "source": track_source,
+                    "reliability": reliability,
+                    "positionAccuracy_m": position_accuracy,
+                    "velocityAccuracy_mps": velocity_accuracy,
+                    "lastUpdate": now_iso,
+                    "updateRate_sec": update_rate,
+                },
+
+                "processing": {
+                    "ingestPipeline": pipeline,
+                    "processingNode": node,
+                    "processingTime_ms": processing_time,
+                    "correlationId": correlation_id,
+                    "validated": is_validated,
+                    "fusedSources": fused,
+                },
+            }
+            for (record_id, classification, record_caveats, created_by, agency,
+                 registration, tail_number, operator, platform, home_station, icao, mode5,
+                 mission_id, operation_name, mission_type, priority, command, tasking_order, status,
+                 t_scheduled, t_takeoff, t_on, t_off, t_recovery,
+                 operating_area, altitude_block, restricted,
+                 disciplines, target_deck, requirements, reporting,
+                 primary_sensor, active_sensors, emcon, datalinks,
+                 units, partners, primary_freq, secondary_freq, checkin,
+                 track_source, reliability, position_accuracy, velocity_accuracy, update_rate,
+                 pipeline, node, processing_time, is_validated, fused,
+                 manifest_id, correlation_id) in columns
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pooled manifest engine.")
+    parser.add_argument("--count", type=int, default=100_000, help="Manifests to generate (default: 100000).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Manifests per batch (default: {DEFAULT_BATCH_SIZE}).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the pools and draws.")
+    args = parser.parse_args()
+
+    engine = ManifestEngine(seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    serializer = "orjson" if orjson is not None else "json"
+
+    generated = serialized = 0
+    gen_seconds = ser_seconds = 0.0
+    record_ids = [str(i) for i in range(args.batch_size)]
+    classifications = ["secret"] * args.batch_size
+    for offset in range(0, args.count, args.batch_size):
+        size = min(args.batch_size, args.count - offset)
+        start = time.perf_counter()
+        batch = engine.generate(record_ids[:size], classifications[:size], rng=rng)
+        gen_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        serialized += sum(len(dumps(manifest)) for manifest in batch)
+        ser_seconds += time.perf_counter() - start
+        generated += size
+        del batch
+
+    print(f"[bench] generated {generated} manifests in {gen_seconds:.2f}s ({generated / max(gen_seconds, 1e-9):.0f}/s)")
+    print(f"[bench] serialized {serialized / 1e6:.1f} MB with {serializer} in {ser_seconds:.2f}s "
+          f"({generated / max(ser_seconds, 1e-9):.0f}/s)")
@@ -1,12 +1,21 @@
 import os
 import json
-import boto3
-import requests
-import base64
+import time
 import urllib3
+import argparse
+from collections import OrderedDict
+from urllib.parse import quote
 import logging
+import threading
 import psycopg2
-from botocore.exceptions import ClientError
+import pyarrow as pa
+import pyarrow.parquet as pq
+import manifest_codec
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from botocore.config import Config
+from botocore.exceptions import ClientError, BotoCoreError
+from s4_credentials import CredentialProvider
+from seed_metrics import StageMetrics
 
 # --- Suppress SSL Warnings ---
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -20,6 +29,7 @@ _hostname = os.getenv("PLATFORM_HOSTNAME", "local-dsp.virtru.com")
 _https_port = os.getenv("PLATFORM_HTTPS_PORT", "8443")
 KC_URL = os.getenv("KEYCLOAK_URL", f"https://{_hostname}:{_https_port}/auth")
 KC_REALM = os.getenv("REALM", "opentdf")
+TOKEN_URL = f"{KC_URL}/realms/{KC_REALM}/protocol/openid-connect/token"
 KC_USER = os.getenv("KC_USER", "top-secret-gbr-bbb")
 KC_PASS = os.getenv("PASSWORD", "testuser123")
 CLIENT_ID = 'secure-object-proxy-test'
@@ -31,6 +41,44 @@ S4_STS_URL = _s4_base
 S4_S3_URL = _s4_base
 S4_BUCKET = "cop-demo"
 
+# --- Fetch pool / per-request timeouts ---
+FETCH_WORKERS = 16
+CONNECT_TIMEOUT_SECONDS = 5
+READ_TIMEOUT_SECONDS = 30
+
+# --- Access-decision benchmark (users x manifests) ---
+# The sample Keycloak realm's users, from unclassified to top secret with different relTo / needToKnow.
+BENCHMARK_USERS = [
+    "unclassified-mex-user", "classified-fra-int", "secret-usa-aaa",
+    "top-secret-usa-aaa", "top-secret-gbr-aaa", "top-secret-gbr-bbb",
+]
+DENIED_ERROR_CODES = {"AccessDenied", "Forbidden", "403"}
+DECISIONS = ("allow", "deny", "error")
+
+# --- Parquet export (--export) ---
+EXPORT_BATCH_ROWS = 5000
+EXPORT_MAX_OPEN_WRITERS = 32
+EXPORT_SQL = """
+SELECT id::text, ts, src_type, ST_AsBinary(geo), search, metadata, tdf_uri, octet_length(tdf_blob)
+FROM tdf_objects
+{where}
+"""
+EXPORT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("ts", pa.timestamp("us")),
+    ("src_type", pa.string()),
+    ("geo_wkb", pa.binary()),
+    ("search", pa.string()),
+    ("metadata", pa.string()),
+    ("tdf_uri", pa.string()),
+    ("tdf_blob_bytes", pa.int64()),
+    ("manifest", pa.string()),
+])
+
+# One cached, auto-refreshing credential provider per Keycloak user.
+_credentials = {}
+_credentials_lock = threading.Lock()
+
 # --- DB Configs ---
 DB_NAME = "postgres"
 DB_USER = "postgres"
@@ -40,47 +88,35 @@ DB_PORT = int(os.getenv("DB_PORT", "5432"))
 
 # --- Authentication Logic ---
 
+def get_credentials(username):
+    """Returns the shared credential provider for a user, creating it on first use."""
+    with _credentials_lock:
+        provider = _credentials.get(username)
+        if provider is None:
+            provider = CredentialProvider(TOKEN_URL, CLIENT_ID, CLIENT_SECRET, username, KC_PASS, S4_STS_URL)
+            _credentials[username] = provider
+        return provider
+
+
 def get_jwt(username):
-    """Fetches JWT using password grant."""
-    token_url = f"{KC_URL}/realms/{KC_REALM}/protocol/openid-connect/token"
-    auth = f"{CLIENT_ID}:{CLIENT_SECRET}"
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded',
-        'Authorization': 'Basic ' + base64.b64encode(auth.encode()).decode()
-    }
-    payload = {
-        'grant_type': 'password',
-        'username': username,
-        'password': KC_PASS,
-    }
-    response = requests.post(token_url, headers=headers, data=payload, verify=False)
-    response.raise_for_status()
-    return response.json()["access_token"]
-
-
-def get_s4_client(username):
-    """Exchanges JWT for STS credentials and returns a Boto3 S3 client."""
-    token = get_jwt(username)
-    sts = boto3.client('sts', endpoint_url=S4_STS_URL, verify=False)
-    
-    # S4 STS Exchange
-    response = sts.assume_role_with_web_identity(
-        RoleArn='arn:aws:iam::xxxx:xxx/xxx',
-        RoleSessionName='WebIdentitySession',
-        WebIdentityToken=token,
-        DurationSeconds=3600
-    )
-    
-    creds = response['Credentials']
-    return boto3.client(
-        's3',
-        endpoint_url=S4_S3_URL,
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds.get('SessionToken'),
-        region_name='us-east-1',
-        verify=False
+    """Fetches JWT using password grant, cached until shortly before it expires."""
+    return get_credentials(username).token()
+
+
+def get_s4_client(username, max_pool_connections=10, connect_timeout=CONNECT_TIMEOUT_SECONDS,
+                  read_timeout=READ_TIMEOUT_SECONDS):
+    """Returns a Boto3 S3 client whose STS credentials refresh automatically.
+
+    The client keeps up to max_pool_connections HTTP connections alive, so
+    size it to the number of threads sharing it.
+    """
+    config = Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={'max_attempts': 3, 'mode': 'standard'},
     )
+    return get_credentials(username).start().s3_client(S4_S3_URL, 'us-east-1', config)
 
 
 # --- Database Logic ---
@@ -96,8 +132,11 @@ def get_db_connection():
     )
 
 
-def query_tdf_objects(limit=10):
-    """Queries tdf_objects table and returns records with manifest URIs."""
+def query_tdf_objects(limit=10, sample=False):
+    """Queries tdf_objects table and returns records with manifest URIs.
+
+    Returns the newest records, or a random sample of them with sample=True.
+    """
     conn = None
     records = []
     
@@ -116,9 +155,9 @@ def query_tdf_objects(limit=10):
             FROM tdf_objects 
             WHERE src_type = 'vehicles'
             AND metadata->>'manifest' IS NOT NULL
-            ORDER BY ts DESC
+            ORDER BY {order}
             LIMIT %s
-        """
+        """.format(order="random()" if sample else "ts DESC")
         
         cursor.execute(query, (limit,))
         rows = cursor.fetchall()
@@ -171,27 +210,276 @@ def fetch_manifest_from_s4(s3_client, s3_uri):
     try:
         # S4 intercepts this, retrieves keys from DSP, and decrypts the TDF
         result = s3_client.get_object(Bucket=bucket, Key=key)
-        plaintext = result['Body'].read().decode('utf-8')
-        
-        # Parse JSON
-        try:
-            return json.loads(plaintext)
-        except json.JSONDecodeError:
-            return plaintext
-            
+        body = result['Body'].read()
     except ClientError as e:
         error_code = e.response.get('Error', {}).get('Code', '')
         logger.error(f"❌ Access Denied or Decryption Failed for {s3_uri}: {error_code}")
         return None
+    except BotoCoreError as e:
+        # Connect/read timeouts and dropped connections, after botocore's own retries.
+        logger.error(f"❌ Request Failed for {s3_uri}: {e}")
+        return None
+
+    try:
+        # Compressed manifests say so in their metadata; plain ones pass through unchanged.
+        plaintext = manifest_codec.decode(body, result.get('Metadata')).decode('utf-8')
+    except manifest_codec.DECODE_ERRORS as e:
+        # Corrupt or truncated compressed body, unknown manifest-encoding, or invalid UTF-8.
+        logger.error(f"❌ Could not decode manifest {s3_uri}: {type(e).__name__}: {e}")
+        return None
+
+    # Parse JSON
+    try:
+        return json.loads(plaintext)
+    except json.JSONDecodeError:
+        return plaintext
+
+
+def fetch_manifests(s3_client, records, workers=FETCH_WORKERS):
+    """Yields (record, manifest) pairs in completion order, fetching on up to `workers` threads.
+
+    At most 2 * workers fetches are queued at a time, so records can be a
+    long-running iterator. manifest is None when the fetch failed or the
+    record has no manifest URI.
+    """
+    def fetch(record):
+        manifest_uri = record['metadata'].get('manifest')
+        return fetch_manifest_from_s4(s3_client, manifest_uri) if manifest_uri else None
+
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s4-fetch") as pool:
+        for record in records:
+            while len(in_flight) >= workers * 2:
+                completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    yield in_flight.pop(future), future.result()
+            in_flight[pool.submit(fetch, record)] = record
+
+        while in_flight:
+            completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in completed:
+                yield in_flight.pop(future), future.result()
+
+
+def access_decision(s3_client, s3_uri):
+    """One full read of s3_uri as the client's user; returns (decision, seconds).
+
+    allow means S4 released the plaintext, deny that it refused the user, and
+    error anything else (missing object, timeout, connection failure).
+    """
+    bucket, key = parse_s3_uri(s3_uri)
+    start = time.perf_counter()
+    try:
+        s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+        decision = "allow"
+    except ClientError as e:
+        error = e.response.get('Error', {})
+        status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        decision = "deny" if error.get('Code') in DENIED_ERROR_CODES or status == 403 else "error"
+    except BotoCoreError:
+        decision = "error"
+    return decision, time.perf_counter() - start
+
+
+def _attribute_count(record):
+    # Manifests carry the TS classification plus the vehicle's relTo and needToKnow values.
+    search = record['search']
+    return 1 + len(search.get('attrRelTo', [])) + len(search.get('attrNeedToKnow', []))
+
+
+def benchmark_access(users, records, workers=FETCH_WORKERS, connect_timeout=CONNECT_TIMEOUT_SECONDS,
+                     read_timeout=READ_TIMEOUT_SECONDS):
+    """Reads every manifest as every user concurrently and returns per-decision latency metrics.
 
+    Samples are kept under "<decision>", "<decision>|user=<name>" and
+    "<decision>|attrs=<n>", so allowed and denied reads get separate
+    percentiles overall, per user and per manifest attribute count.
+    """
+    logger.info(f"--- ⏱️  Access benchmark: {len(users)} users x {len(records)} manifests, {workers} workers ---")
+    clients = {}
+    for user in users:
+        # Token and STS credentials are fetched here, outside the timed reads.
+        clients[user] = get_s4_client(user, max(10, workers), connect_timeout, read_timeout)
 
-def read_manifests_from_db():
-    """Main function: queries DB for records, then fetches manifests from S4."""
+    metrics = StageMetrics("read_s4_access")
+    grid = ((user, record) for record in records for user in users)
+
+    def decide(cell):
+        user, record = cell
+        decision, seconds = access_decision(clients[user], record['metadata']['manifest'])
+        for name in (decision, f"{decision}|user={user}", f"{decision}|attrs={_attribute_count(record)}"):
+            metrics.observe(name, seconds)
+
+    in_flight = set()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s4-access") as pool:
+        for cell in grid:
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(pool.submit(decide, cell))
+        for future in in_flight:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    stages = metrics.summary()['stages']
+    logger.info(f"{'group':<28} {'allow':>7} {'deny':>7} {'error':>7}   "
+                f"{'allow p50/p95/p99 ms':>22}   {'deny p50/p95/p99 ms':>22}")
+    groups = [""] + [f"|user={user}" for user in users] + sorted(
+        {f"|attrs={_attribute_count(record)}" for record in records}, key=lambda g: int(g.split("=")[1]))
+    for group in groups:
+        row = {decision: stages.get(decision + group) for decision in DECISIONS}
+        counts = [row[d]['operations'] if row[d] else 0 for d in DECISIONS]
+        latency = [
+            "/".join(f"{row[d]['latency_ms'][p]:.1f}" for p in ("p50", "p95", "p99")) if row[d] else "-"
+            for d in ("allow", "deny")
+        ]
+        logger.info(f"{group.lstrip('|') or 'all':<28} {counts[0]:>7} {counts[1]:>7} {counts[2]:>7}   "
+                    f"{latency[0]:>22}   {latency[1]:>22}")
+    decisions = len(users) * len(records)
+    logger.info(f"✅ {decisions} access decisions in {elapsed:.2f}s ({decisions / max(elapsed, 1e-9):.1f}/s)")
+    return metrics
+
+
+class PartitionedParquetWriter:
+    """Appends record batches to hive-style src_type=<x>/date=<yyyy-mm-dd> Parquet files.
+
+    Each partition keeps one open ParquetWriter and every write becomes a
+    row group in it. At most max_open writers stay open; the least recently
+    used one is closed and its partition continues in a new part file, so
+    memory stays bounded however many partitions the export touches.
+    """
+
+    def __init__(self, root, schema=EXPORT_SCHEMA, max_open=EXPORT_MAX_OPEN_WRITERS, compression="zstd"):
+        self.root = root
+        self.schema = schema
+        self.max_open = max_open
+        self.compression = compression
+        self.files = 0
+        self.rows = 0
+        self._writers = OrderedDict()
+        self._parts = {}
+
+    def write(self, partition, columns):
+        writer = self._writers.get(partition)
+        if writer is None:
+            if len(self._writers) >= self.max_open:
+                self._writers.popitem(last=False)[1].close()
+            src_type, date = partition
+            directory = os.path.join(self.root, f"src_type={quote(src_type, safe='')}", f"date={date}")
+            os.makedirs(directory, exist_ok=True)
+            part = self._parts[partition] = self._parts.get(partition, -1) + 1
+            path = os.path.join(directory, f"part-{part:05d}.parquet")
+            writer = self._writers[partition] = pq.ParquetWriter(path, self.schema, compression=self.compression)
+            self.files += 1
+        else:
+            self._writers.move_to_end(partition)
+        table = pa.Table.from_pydict(columns, schema=self.schema)
+        writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        while self._writers:
+            self._writers.popitem(last=False)[1].close()
+
+
+def export_to_parquet(out_dir, src_type=None, batch_rows=EXPORT_BATCH_ROWS, workers=FETCH_WORKERS,
+                      connect_timeout=CONNECT_TIMEOUT_SECONDS, read_timeout=READ_TIMEOUT_SECONDS):
+    """Streams tdf_objects through a server-side cursor, joins each row with its manifest and writes Parquet.
+
+    Rows arrive batch_rows at a time; each batch's manifests are fetched on
+    `workers` threads as KC_USER and the batch is appended to its partitions
+    before the next one is read, so memory is bounded by one batch. The
+    manifest column is NULL where the row has none or S4 refuses it; tdf_blob
+    itself is not exported, only its size.
+    """
+    logger.info(f"--- 📦 Exporting tdf_objects to {out_dir} as {KC_USER} ---")
+    s3 = get_s4_client(KC_USER, max(10, workers), connect_timeout, read_timeout)
+    writer = PartitionedParquetWriter(out_dir)
+    conn = get_db_connection()
+    fetched = 0
+    start = time.perf_counter()
+    try:
+        cursor = conn.cursor(name="tdf_objects_export")
+        cursor.itersize = batch_rows
+        if src_type:
+            cursor.execute(EXPORT_SQL.format(where="WHERE src_type = %s"), (src_type,))
+        else:
+            cursor.execute(EXPORT_SQL.format(where=""))
+
+        while rows := cursor.fetchmany(batch_rows):
+            records = [{
+                'id': row[0], 'ts': row[1], 'src_type': row[2], 'geo': row[3], 'search': row[4],
+                'metadata': row[5] or {}, 'tdf_uri': row[6], 'tdf_blob_bytes': row[7],
+            } for row in rows]
+
+            partitions = {}
+            for record, manifest in fetch_manifests(s3, records, workers):
+                fetched += manifest is not None
+                ts = record['ts']
+                columns = partitions.setdefault(
+                    (record['src_type'], ts.date().isoformat() if ts else "unknown"),
+                    {name: [] for name in EXPORT_SCHEMA.names},
+                )
+                columns["id"].append(record['id'])
+                columns["ts"].append(ts)
+                columns["src_type"].append(record['src_type'])
+                columns["geo_wkb"].append(bytes(record['geo']) if record['geo'] is not None else None)
+                columns["search"].append(json.dumps(record['search']) if record['search'] is not None else None)
+                columns["metadata"].append(json.dumps(record['metadata']))
+                columns["tdf_uri"].append(record['tdf_uri'])
+                columns["tdf_blob_bytes"].append(record['tdf_blob_bytes'])
+                columns["manifest"].append(json.dumps(manifest) if manifest is not None else None)
+            for partition, columns in partitions.items():
+                writer.write(partition, columns)
+
+            elapsed = time.perf_counter() - start
+            logger.info(f"📦 {writer.rows} rows exported ({fetched} with manifests) "
+                        f"in {elapsed:.1f}s ({writer.rows / max(elapsed, 1e-9):.0f} rows/s)")
+        cursor.close()
+    finally:
+        writer.close()
+        conn.close()
+
+    logger.info(f"✅ Exported {writer.rows} rows into {writer.files} Parquet file(s) under {out_dir}")
+
+
+def log_manifest(record, manifest_data, quiet=False):
+    metadata = record['metadata']
+    manifest_uri = metadata.get('manifest')
+    if quiet:
+        status = "ok" if manifest_data else ("no manifest" if not manifest_uri else "FAILED")
+        logger.info(f"{record['id']} | {status} | {manifest_uri}")
+        return
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"📋 Record ID: {record['id']}")
+    logger.info(f"⏰ Timestamp: {record['ts']}")
+    logger.info(f"🏷️  Callsign: {metadata.get('callsign', 'N/A')}")
+    logger.info(f"🔗 Manifest URI: {manifest_uri}")
+
+    if not manifest_uri:
+        logger.info("⚠️  No manifest URI in metadata")
+    elif manifest_data:
+        logger.info(f"🔓 Decrypted Manifest:")
+        logger.info(json.dumps(manifest_data, indent=2))
+    else:
+        logger.info("⚠️  Could not retrieve manifest (access denied or not found)")
+
+
+def read_manifests_from_db(limit=10, workers=1, connect_timeout=CONNECT_TIMEOUT_SECONDS,
+                           read_timeout=READ_TIMEOUT_SECONDS, quiet=False):
+    """Main function: queries DB for records, then fetches manifests from S4.
+
+    With workers > 1 the manifests are fetched concurrently over a pooled
+    client and logged as they complete rather than in query order.
+    """
     logger.info(f"--- 🛡️  Initializing S4 Proxy Session for: {KC_USER} ---")
     
     # 1. Initialize S4 client
     try:
-        s3 = get_s4_client(KC_USER)
+        s3 = get_s4_client(KC_USER, max(10, workers), connect_timeout, read_timeout)
         logger.info("✅ S4 client initialized successfully")
     except Exception as e:
         logger.error(f"❌ Failed to authenticate: {e}")
@@ -199,40 +487,81 @@ def read_manifests_from_db():
 
     # 2. Query database for records with manifest URIs
     logger.info("\n--- 📊 Querying Database for Records ---")
-    records = query_tdf_objects(limit=10)
+    records = query_tdf_objects(limit=limit)
     
     if not records:
         logger.info("No records found with manifest URIs. Run the seed script first!")
         return
 
     # 3. For each record, fetch the manifest from S4
-    logger.info("\n--- 📄 Fetching Manifests from S4 ---")
-    
-    for record in records:
-        record_id = record['id']
-        metadata = record['metadata']
-        manifest_uri = metadata.get('manifest')
-        
-        logger.info(f"\n{'='*60}")
-        logger.info(f"📋 Record ID: {record_id}")
-        logger.info(f"⏰ Timestamp: {record['ts']}")
-        logger.info(f"🏷️  Callsign: {metadata.get('callsign', 'N/A')}")
-        logger.info(f"🔗 Manifest URI: {manifest_uri}")
-        
-        if manifest_uri:
-            manifest_data = fetch_manifest_from_s4(s3, manifest_uri)
-            
-            if manifest_data:
-                logger.info(f"🔓 Decrypted Manifest:")
-                logger.info(json.dumps(manifest_data, indent=2))
-            else:
-                logger.info("⚠️  Could not retrieve manifest (access denied or not found)")
+    logger.info(f"\n--- 📄 Fetching Manifests from S4 ({workers} worker(s)) ---")
+
+    fetched = failed = 0
+    start = time.perf_counter()
+    if workers > 1:
+        results = fetch_manifests(s3, records, workers)
+    else:
+        results = ((record, fetch_manifest_from_s4(s3, record['metadata']['manifest'])
+                    if record['metadata'].get('manifest') else None) for record in records)
+    for record, manifest_data in results:
+        log_manifest(record, manifest_data, quiet)
+        if manifest_data:
+            fetched += 1
         else:
-            logger.info("⚠️  No manifest URI in metadata")
+            failed += 1
+    elapsed = time.perf_counter() - start
 
     logger.info(f"\n{'='*60}")
-    logger.info(f"✅ Processed {len(records)} records")
+    logger.info(f"✅ Processed {len(records)} records: {fetched} manifests fetched, {failed} unavailable "
+                f"in {elapsed:.2f}s ({len(records) / max(elapsed, 1e-9):.1f}/s)")
 
 
 if __name__ == "__main__":
-    read_manifests_from_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Read tdf_objects manifests back through the S4 proxy.")
+    parser.add_argument("--limit", type=int, default=10, help="Newest vehicle records to read (default: 10).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Concurrent manifest fetches over a pooled client; results stream back as they "
+                             f"complete (default: 1, serial; {FETCH_WORKERS} with --benchmark).")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT_SECONDS,
+                        help=f"Per-request S4 connect timeout in seconds (default: {CONNECT_TIMEOUT_SECONDS}).")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT_SECONDS,
+                        help=f"Per-request S4 read timeout in seconds (default: {READ_TIMEOUT_SECONDS}).")
+    parser.add_argument("--quiet", action="store_true", help="Log one line per manifest instead of its full JSON.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Read a random sample of --limit manifests as every --users user and report "
+                             "allow/deny counts and latency percentiles.")
+    parser.add_argument("--users", type=lambda value: [u for u in value.split(",") if u], default=BENCHMARK_USERS,
+                        help=f"Comma-separated Keycloak users for --benchmark (default: {','.join(BENCHMARK_USERS)}).")
+    parser.add_argument("--metrics-json", metavar="PATH", help="With --benchmark, also write the raw samples' summary as JSON.")
+    parser.add_argument("--export", metavar="DIR",
+                        help="Write every tdf_objects row joined with its manifest to Parquet under DIR, "
+                             "partitioned by src_type and date (--limit does not apply).")
+    parser.add_argument("--src-type", help="With --export, only export rows of this src_type.")
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS,
+                        help=f"Rows per server-side cursor fetch and Parquet row group (default: {EXPORT_BATCH_ROWS}).")
+    args = parser.parse_args()
+    if args.limit < 1:
+        parser.error("--limit must be >= 1")
+    if args.workers is None:
+        args.workers = FETCH_WORKERS if args.benchmark or args.export else 1
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.batch_rows < 1:
+        parser.error("--batch-rows must be >= 1")
+    if args.benchmark and args.export:
+        parser.error("--benchmark cannot be combined with --export")
+
+    if args.export:
+        export_to_parquet(args.export, args.src_type, args.batch_rows, args.workers,
+                          args.connect_timeout, args.read_timeout)
+    elif args.benchmark:
+        sample = query_tdf_objects(limit=args.limit, sample=True)
+        if not sample:
+            logger.info("No records found with manifest URIs. Run the seed script first!")
+        else:
+            metrics = benchmark_access(args.users, sample, args.workers, args.connect_timeout, args.read_timeout)
+            if args.metrics_json:
+                metrics.report(args.metrics_json)
+    else:
+        read_manifests_from_db(limit=args.limit, workers=args.workers, connect_timeout=args.connect_timeout,
+                               read_timeout=args.read_timeout, quiet=args.quiet)
\ No newline at end of file
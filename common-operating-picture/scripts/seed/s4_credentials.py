@@ -0,0 +1,242 @@
+"""
+Shared Keycloak token / S4 STS credential cache for the seed scripts.
+
+A CredentialProvider holds one Keycloak access token and one set of STS
+credentials for a user and refreshes them before they expire, so multi-hour
+seeding runs don't die when the 1h STS session runs out. Refreshes are
+single-flight: however many threads notice the credentials are due, only one
+of them talks to Keycloak/STS and the rest pick up its result.
+
+S3 clients handed out by s3_client() are backed by botocore
+RefreshableCredentials that read from the provider, so a client built once
+stays valid for the whole run and can be shared across threads; the asyncio
+seeder installs AioProviderCredentialSource in its aiobotocore session for
+the same effect. Call start()
+to also refresh from a background thread ahead of expiry, keeping the
+refresh off the upload path entirely.
+"""
+import time
+import base64
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import requests
+from botocore.config import Config
+from botocore.session import get_session
+from botocore.credentials import CredentialProvider as BotocoreCredentialProvider, RefreshableCredentials
+
+try:
+    from aiobotocore.credentials import AioRefreshableCredentials
+except ImportError:
+    AioRefreshableCredentials = None
+
+ROLE_ARN = 'arn:aws:iam::xxxx:xxx/xxx'
+ROLE_SESSION_NAME = 'WebIdentitySession'
+STS_DURATION_SECONDS = 3600
+# botocore starts its own advisory refresh 15 minutes before expiry, so rotate ahead of that.
+STS_REFRESH_MARGIN_SECONDS = 20 * 60
+TOKEN_REFRESH_MARGIN_SECONDS = 30
+REFRESH_RETRY_SECONDS = 15
+
+
+class CredentialProvider:
+    """Caches and proactively refreshes a Keycloak token and S4 STS credentials for one user."""
+
+    def __init__(self, token_url, client_id, client_secret, username, password, sts_endpoint,
+                 duration_seconds=STS_DURATION_SECONDS, refresh_margin=STS_REFRESH_MARGIN_SECONDS):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.username = username
+        self.password = password
+        self.sts_endpoint = sts_endpoint
+        self.duration_seconds = duration_seconds
+        self.refresh_margin = refresh_margin
+
+        self._token_lock = threading.Lock()
+        self._token = None
+        self._token_expires_at = 0.0
+        self._refresh_token = None
+        self._refresh_token_expires_at = 0.0
+
+        self._sts_lock = threading.Lock()
+        self._sts_client = None
+        self._credentials = None
+        self._refresh_at = 0.0
+
+        self._client_lock = threading.Lock()
+        self._botocore_session = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Keycloak token ---
+
+    def token(self):
+        """Returns a cached access token, fetching a new one if it is about to expire."""
+        if self._token is not None and time.time() < self._token_expires_at:
+            return self._token
+        with self._token_lock:
+            if self._token is None or time.time() >= self._token_expires_at:
+                self._fetch_token()
+            return self._token
+
+    def _fetch_token(self):
+        auth = f"{self.client_id}:{self.client_secret}"
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Authorization': 'Basic ' + base64.b64encode(auth.encode()).decode()
+        }
+        response = None
+        if self._refresh_token and time.time() < self._refresh_token_expires_at:
+            print(f"[auth] refreshing token for {self.username}")
+            response = requests.post(self.token_url, headers=headers, verify=False, data={
+                'grant_type': 'refresh_token',
+                'refresh_token': self._refresh_token,
+            })
+            if response.status_code != 200:
+                print(f"[auth] refresh_token grant failed ({response.status_code}), falling back to password grant")
+                response = None
+        if response is None:
+            print(f"[auth] requesting token from {self.token_url} as {self.username}")
+            response = requests.post(self.token_url, headers=headers, verify=False, data={
+                'grant_type': 'password',
+                'username': self.username,
+                'password': self.password,
+            })
+            print(f"[auth] token response status: {response.status_code}")
+            if response.status_code != 200:
+                print(f"[auth] error body: {response.text}")
+                response.raise_for_status()
+
+        body = response.json()
+        now = time.time()
+        self._token = body['access_token']
+        self._token_expires_at = now + max(body.get('expires_in', 300) - TOKEN_REFRESH_MARGIN_SECONDS, 0)
+        self._refresh_token = body.get('refresh_token')
+        self._refresh_token_expires_at = now + max(body.get('refresh_expires_in', 0) - TOKEN_REFRESH_MARGIN_SECONDS, 0)
+        print(f"[auth] token acquired successfully")
+
+    # --- STS credentials ---
+
+    def credentials(self):
+        """Returns cached STS credentials as botocore refresh metadata, rotating them when due."""
+        if self._credentials is not None and time.time() < self._refresh_at:
+            return self._credentials
+        with self._sts_lock:
+            if self._credentials is None or time.time() >= self._refresh_at:
+                self._assume_role()
+            return self._credentials
+
+    def _assume_role(self):
+        if self._sts_client is None:
+            self._sts_client = get_session().create_client('sts', endpoint_url=self.sts_endpoint, verify=False)
+        print(f"[s4] assuming role via STS at {self.sts_endpoint}")
+        response = self._sts_client.assume_role_with_web_identity(
+            RoleArn=ROLE_ARN,
+            RoleSessionName=ROLE_SESSION_NAME,
+            WebIdentityToken=self.token(),
+            DurationSeconds=self.duration_seconds
+        )
+        creds = response['Credentials']
+        now = datetime.now(timezone.utc)
+        expiry = creds.get('Expiration') or now + timedelta(seconds=self.duration_seconds)
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        lifetime = (expiry - now).total_seconds()
+        self._refresh_at = time.time() + lifetime - min(self.refresh_margin, lifetime / 2)
+        self._credentials = {
+            'access_key': creds['AccessKeyId'],
+            'secret_key': creds['SecretAccessKey'],
+            'token': creds.get('SessionToken'),
+            'expiry_time': expiry.isoformat(),
+        }
+        print(f"[s4] STS assume_role succeeded, expires {expiry.isoformat()}")
+
+    # --- S3 clients ---
+
+    def s3_client(self, endpoint_url, region_name, config=None):
+        """Builds an S3 client whose credentials follow this provider; safe to share across threads."""
+        with self._client_lock:
+            if self._botocore_session is None:
+                session = get_session()
+                session.get_component('credential_provider').insert_before('env', ProviderCredentialSource(self))
+                self._botocore_session = session
+            print(f"[s4] building S3 client at {endpoint_url}")
+            return self._botocore_session.create_client(
+                's3',
+                endpoint_url=endpoint_url,
+                region_name=region_name,
+                verify=False,
+                config=config or Config(),
+            )
+
+    # --- Background refresh ---
+
+    def start(self):
+        """Starts the background refresher; safe to call more than once."""
+        with self._client_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._refresh_loop, name="credential-refresh", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._client_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            delay = max(self._refresh_at - time.time(), 0) if self._credentials is not None else 0
+            if self._stop.wait(delay):
+                break
+            try:
+                self.credentials()
+            except Exception as e:
+                print(f"[s4] background credential refresh failed: {e}; retrying in {REFRESH_RETRY_SECONDS}s")
+                self._stop.wait(REFRESH_RETRY_SECONDS)
+
+
+class ProviderCredentialSource(BotocoreCredentialProvider):
+    """botocore credential-chain entry serving a CredentialProvider's STS credentials."""
+    METHOD = 'cop-sts-web-identity'
+    CANONICAL_NAME = 'CopStsWebIdentity'
+
+    def __init__(self, provider):
+        super().__init__()
+        self.provider = provider
+
+    def load(self):
+        return RefreshableCredentials.create_from_metadata(
+            metadata=self.provider.credentials(),
+            refresh_using=self.provider.credentials,
+            method=self.METHOD,
+        )
+
+
+class AioProviderCredentialSource(ProviderCredentialSource):
+    """aiobotocore variant of ProviderCredentialSource.
+
+    The provider's blocking Keycloak/STS calls run on the default executor,
+    so neither the first load nor a refresh stalls the event loop.
+    """
+
+    def __init__(self, provider):
+        if AioRefreshableCredentials is None:
+            raise RuntimeError("aiobotocore is required for AioProviderCredentialSource")
+        super().__init__(provider)
+
+    async def metadata(self):
+        return await asyncio.get_running_loop().run_in_executor(None, self.provider.credentials)
+
+    async def load(self):
+        return AioRefreshableCredentials.create_from_metadata(
+            metadata=await self.metadata(),
+            refresh_using=self.metadata,
+            method=self.METHOD,
+        )
@@ -4,17 +4,31 @@ import json
 import random
 import psycopg2
 import argparse
-import requests
-import boto3
-import base64
 import urllib3
+import manifest_engine
+import manifest_codec
+from s4_credentials import CredentialProvider
+from bulk_load import BulkLoadSummary, begin_bulk_load, publish_bulk_load_summary
+from seed_metrics import StageMetrics
+from seed_journal import SeedJournal, JournalMismatch
+import time
+import struct
+import itertools
+import functools
+import queue
+import threading
+import hashlib
+import multiprocessing
 from io import BytesIO
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
 from faker import Faker
 from datetime import datetime, timedelta
-from psycopg2.extras import execute_batch
 from otdf_python.sdk_builder import SDKBuilder
 from otdf_python.config import TDFConfig, KASInfo
 from botocore.config import Config
+from botocore.exceptions import ClientError, BotoCoreError
 
 # --- Load env file if ENV_FILE is set or auto-detect ---
 def _load_env_file():
@@ -67,7 +81,12 @@ DB_NAME, DB_USER, DB_PASSWORD = "postgres", "postgres", "changeme"
 DB_HOST = os.getenv("DB_HOST", "cop-db")
 DB_PORT = int(os.getenv("DB_PORT", "5432"))
 NUM_RECORDS = 20
-BATCH_SIZE = 5
+SEED_BASE_TIME = datetime(2025, 1, 1)
+COPY_BUFFER_SIZE = 1 << 20
+ENCRYPT_CHUNK_SIZE = 16
+PIPELINE_QUEUE_DEPTH = 64
+CHECKPOINT_COMMIT_EVERY = 10000
+MANIFEST_BATCH_SIZE = manifest_engine.DEFAULT_BATCH_SIZE
 print(f"[config] DB_HOST={DB_HOST} DB_PORT={DB_PORT} DB_NAME={DB_NAME}")
 
 # --- S4 / S3 Configs ---
@@ -77,12 +96,23 @@ S4_STS_ENDPOINT = _s4_base
 S4_S3_ENDPOINT = _s4_base
 S4_BUCKET = "cop-demo"
 S4_REGION = "us-east-1"
+CREDENTIALS = CredentialProvider(TOKEN_URL, CLIENT_ID, CLIENT_SECRET, KC_USER, KC_PASS, S4_STS_ENDPOINT)
+UPLOAD_CONCURRENCY = 8
+UPLOAD_MAX_ATTEMPTS = 5
+UPLOAD_BACKOFF_BASE_SECONDS = 0.2
+UPLOAD_BACKOFF_CAP_SECONDS = 10.0
+RETRYABLE_S3_ERROR_CODES = {"Throttling", "ThrottlingException", "SlowDown", "RequestLimitExceeded",
+                            "TooManyRequestsException", "RequestTimeout", "InternalError", "ServiceUnavailable"}
 print(f"[config] S4_STS_ENDPOINT={S4_STS_ENDPOINT} S4_BUCKET={S4_BUCKET}")
 
 # --- Fixed Data for TdfObjects ---
 FIXED_SRC_TYPE = 'vehicles'
 FIXED_TDF_URI = None
 FIXED_CREATED_BY = KC_USER
+TDF_KEY_PREFIX = "tdf"
+
+# --- Stage metrics (manifest, encrypt, s4_upload, db_write, db_commit) ---
+METRICS = StageMetrics("seed_data")
 
 # --- DSP Configs ---
 PLATFORM_ENDPOINT = os.getenv("PLATFORM_ENDPOINT", f"https://{_hostname}:{_http_port}")
@@ -98,34 +128,22 @@ CLASSIFICATIONS = ["unclassified", "confidential", "secret", "topsecret"]
 NEEDTOKNOW_ATTR = "https://demo.com/attr/needtoknow/value/bbb"
 
 # --- IC/Military Reference Data ---
-MILITARY_BRANCHES = ["USAF", "USN", "USA", "USMC", "USSF", "USCG"]
-COALITION_COUNTRIES = ["USA", "GBR", "CAN", "AUS", "NZL", "DEU", "FRA", "ITA", "NOR", "DNK"]
-AIRCRAFT_PLATFORMS = [
-    {"designation": "F-35A", "name": "Lightning II", "type": "FIGHTER", "service": "USAF"},
-    {"designation": "F-22A", "name": "Raptor", "type": "FIGHTER", "service": "USAF"},
-    {"designation": "F/A-18E", "name": "Super Hornet", "type": "FIGHTER", "service": "USN"},
-    {"designation": "B-2A", "name": "Spirit", "type": "BOMBER", "service": "USAF"},
-    {"designation": "KC-135R", "name": "Stratotanker", "type": "TANKER", "service": "USAF"},
-    {"designation": "E-3G", "name": "Sentry", "type": "AWACS", "service": "USAF"},
-    {"designation": "MQ-9A", "name": "Reaper", "type": "UAV", "service": "USAF"},
-    {"designation": "RQ-4B", "name": "Global Hawk", "type": "UAV", "service": "USAF"},
-    {"designation": "P-8A", "name": "Poseidon", "type": "MPA", "service": "USN"},
-    {"designation": "C-17A", "name": "Globemaster III", "type": "TRANSPORT", "service": "USAF"},
-    {"designation": "RC-135V", "name": "Rivet Joint", "type": "ISR", "service": "USAF"},
-    {"designation": "EP-3E", "name": "Aries II", "type": "SIGINT", "service": "USN"},
-]
-MISSION_TYPES = ["ISR", "CAP", "CAS", "SEAD", "STRIKE", "RECON", "TANKER", "AIRLIFT", "SAR", "ELINT", "SIGINT"]
-OPERATIONAL_STATUS = ["ACTIVE", "RTB", "ON_STATION", "TRANSITING", "HOLDING", "REFUELING", "MAINTENANCE"]
-INTEL_SOURCES = ["SIGINT", "IMINT", "MASINT", "HUMINT", "OSINT", "GEOINT", "ELINT", "COMINT"]
-COMMAND_ELEMENTS = ["CENTCOM", "EUCOM", "INDOPACOM", "AFRICOM", "NORTHCOM", "SOUTHCOM", "SPACECOM", "CYBERCOM"]
-SECURITY_CAVEATS = ["NOFORN", "FVEY", "REL TO USA", "ORCON", "PROPIN", "REL TO NATO"]
-SENSOR_TYPES = ["SAR", "EO/IR", "MTI", "GMTI", "ESM", "COMMS", "RADAR", "LIDAR"]
-EMISSION_CONTROL = ["EMCON ALPHA", "EMCON BRAVO", "EMCON CHARLIE", "EMCON DELTA"]
+from manifest_engine import (
+    MILITARY_BRANCHES, COALITION_COUNTRIES, AIRCRAFT_PLATFORMS, MISSION_TYPES, OPERATIONAL_STATUS,
+    INTEL_SOURCES, COMMAND_ELEMENTS, SECURITY_CAVEATS, SENSOR_TYPES, EMISSION_CONTROL,
+)
 
 # --- SQL Queries ---
 DELETE_SQL = "DELETE FROM tdf_objects"
-INSERT_SQL = """
-INSERT INTO tdf_objects (
+TABLE_SIZE_SQL = """
+SELECT pg_relation_size(c.oid),
+       COALESCE(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0),
+       pg_total_relation_size(c.oid)
+FROM pg_class c
+WHERE c.oid = 'tdf_objects'::regclass
+"""
+COPY_SQL = """
+COPY tdf_objects (
     id,
     ts,
     src_type,
@@ -137,73 +155,86 @@ INSERT INTO tdf_objects (
     _created_at,
     _created_by
 )
-VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+FROM STDIN WITH (FORMAT binary)
 """
 
+# --- Binary COPY encoding (column order matches COPY_SQL) ---
+COPY_COLUMN_TYPES = ("uuid", "timestamp", "text", "bytes", "jsonb", "jsonb", "bytes", "text", "timestamp", "text")
+PG_EPOCH = datetime(2000, 1, 1)
+SRID_WGS84 = 4326
+EWKB_POINT_WITH_SRID = 0x20000001
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+_COPY_NULL = struct.pack("!i", -1)
+
 
 def get_auth_token():
-    print(f"[auth] requesting token from {TOKEN_URL} as {KC_USER}")
-    auth = f"{CLIENT_ID}:{CLIENT_SECRET}"
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded',
-        'Authorization': 'Basic ' + base64.b64encode(auth.encode()).decode()
-    }
-    payload = {
-        'grant_type': 'password',
-        'username': KC_USER,
-        'password': KC_PASS,
-    }
-    response = requests.post(TOKEN_URL, headers=headers, data=payload, verify=False)
-    print(f"[auth] token response status: {response.status_code}")
-    if response.status_code != 200:
-        print(f"[auth] error body: {response.text}")
-        response.raise_for_status()
-    print(f"[auth] token acquired successfully")
-    return response.json()['access_token']
-
-
-def get_s4_s3_client():
-    print(f"[s4] getting auth token for STS...")
-    token = get_auth_token()
-    print(f"[s4] assuming role via STS at {S4_STS_ENDPOINT}")
-    sts_client = boto3.client('sts', endpoint_url=S4_STS_ENDPOINT, verify=False)
-
-    response = sts_client.assume_role_with_web_identity(
-        RoleArn='arn:aws:iam::xxxx:xxx/xxx',
-        RoleSessionName='WebIdentitySession',
-        WebIdentityToken=token,
-        DurationSeconds=3600
-    )
-    print(f"[s4] STS assume_role succeeded")
-
-    creds = response['Credentials']
-    print(f"[s4] building S3 client at {S4_S3_ENDPOINT}")
-    return boto3.client(
-        's3',
-        endpoint_url=S4_S3_ENDPOINT,
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds.get('SessionToken'),
-        region_name=S4_REGION,
-        verify=False
+    return CREDENTIALS.token()
+
+
+def get_s4_s3_client(max_pool_connections=UPLOAD_CONCURRENCY):
+    # One refreshable, thread-safe client for the whole run; the provider rotates STS creds in the background.
+    return CREDENTIALS.start().s3_client(
+        S4_S3_ENDPOINT,
+        S4_REGION,
+        # Pool sized to the upload concurrency; retries are handled by upload_to_s4_with_retry.
+        config=Config(max_pool_connections=max_pool_connections, retries={"max_attempts": 1, "mode": "standard"})
     )
 
 
-def upload_to_s4(s3_client, filename, data_dict, attributes: list[str]):
-    payload = json.dumps(data_dict).encode('utf-8')
+def put_s4_object(s3_client, filename, payload: bytes, attributes: list[str], extra_metadata=None):
     metadata = {}
     for i, attr in enumerate(attributes):
         metadata[f'tdf-data-attribute-{i}'] = attr
-
-    s3_client.put_object(
-        Bucket=S4_BUCKET,
-        Key=filename,
-        Body=payload,
-        Metadata=metadata
-    )
+    metadata.update(extra_metadata or {})
+
+    with METRICS.time("s4_upload"):
+        s3_client.put_object(
+            Bucket=S4_BUCKET,
+            Key=filename,
+            Body=payload,
+            Metadata=metadata
+        )
     return f"s3://{S4_BUCKET}/{filename}"
 
 
+def upload_to_s4(s3_client, filename, data_dict, attributes: list[str], compression="none"):
+    payload, extra_metadata = manifest_codec.encode(manifest_engine.dumps(data_dict), compression)
+    return put_s4_object(s3_client, filename, payload, attributes, extra_metadata)
+
+
+# Separate RNG so backoff jitter never perturbs the dataset's random stream.
+_backoff_random = random.Random()
+
+
+def upload_backoff_delay(attempt):
+    """Full-jitter exponential backoff before retry number attempt + 1."""
+    return _backoff_random.uniform(0, min(UPLOAD_BACKOFF_CAP_SECONDS, UPLOAD_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def is_retryable_upload_error(error):
+    """True for S3 throttling, 5xx and connection errors, which are worth retrying."""
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in RETRYABLE_S3_ERROR_CODES or status == 429 or status >= 500
+    return isinstance(error, BotoCoreError)
+
+
+def upload_to_s4_with_retry(s3_client, filename, data_dict, attributes: list[str], max_attempts=UPLOAD_MAX_ATTEMPTS,
+                            put=upload_to_s4):
+    """upload_to_s4 (or put) with full-jitter exponential backoff on throttling, 5xx and connection errors."""
+    for attempt in range(max_attempts):
+        try:
+            return put(s3_client, filename, data_dict, attributes)
+        except Exception as e:
+            if attempt + 1 >= max_attempts or not is_retryable_upload_error(e):
+                raise
+            delay = upload_backoff_delay(attempt)
+            print(f"[s4] upload of {filename} failed ({e}), retry {attempt + 1}/{max_attempts - 1} in {delay:.2f}s")
+            time.sleep(delay)
+
+
 def get_sdk_instance(platform_endpoint, client_id, client_secret, ca_cert_path, issuer_endpoint):
     print(f"[sdk] building SDK: endpoint={platform_endpoint} issuer={issuer_endpoint} cert={ca_cert_path}")
     builder = SDKBuilder()
@@ -237,37 +268,227 @@ def encrypt_data(sdk, plaintext: str, attributes: list[str]) -> bytes:
     return output_stream.getvalue()
 
 
-def generate_random_point_wkb():
-    lat = random.uniform(25, 45)
-    lon = random.uniform(-85, -65)
-    return f'POINT({lon} {lat})'
+# --- Encryption worker pool (one SDK instance per worker process) ---
+_worker_sdk = None
+
+
+def init_encrypt_worker():
+    """Process-pool initializer: builds this worker's SDK instance."""
+    global _worker_sdk
+    _worker_sdk = get_sdk_instance(PLATFORM_ENDPOINT, CLIENT_ID, CLIENT_SECRET, CA_CERT_PATH, ISSUER_ENDPOINT)
 
 
-def generate_military_manifest(fake, record_id, classification):
-    """Generates realistic IC/Military manifest data for a tracked asset."""
+def encrypt_job(job):
+    """Encrypts one (plaintext, attributes) job; returns (tdf_blob, worker pid, seconds)."""
+    plaintext, attributes = job
+    start = time.perf_counter()
+    tdf_blob = encrypt_data(_worker_sdk, plaintext, attributes)
+    return tdf_blob, os.getpid(), time.perf_counter() - start
 
-    platform = random.choice(AIRCRAFT_PLATFORMS)
-    mission_type = random.choice(MISSION_TYPES)
-    mission_start = datetime.now() - timedelta(hours=random.randint(1, 8))
-    mission_end = mission_start + timedelta(hours=random.randint(2, 12))
+
+def encrypt_stream(sdk, drafts, workers=1, chunk_size=ENCRYPT_CHUNK_SIZE):
+    """Encrypts each draft's plaintext and yields (draft, tdf_blob) in draft order.
+
+    With workers > 1 each draft is submitted to a process pool as its own
+    task, with up to workers * chunk_size tasks in flight; results are
+    yielded in order from the head of that queue while the workers keep
+    going, so one slow encryption never leaves the others idle. Each worker
+    builds its own SDK instance on startup.
+    """
+    start = time.perf_counter()
+    total = 0
+
+    if workers <= 1:
+        for draft in drafts:
+            with METRICS.time("encrypt"):
+                tdf_blob = encrypt_data(sdk, draft["plaintext"], [draft["classification_attr"]])
+            yield draft, tdf_blob
+            total += 1
+        elapsed = time.perf_counter() - start
+        print(f"[encrypt] {total} records in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.1f} rec/s)")
+        return
+
+    max_in_flight = workers * chunk_size
+    print(f"[encrypt] encrypting on {workers} workers ({max_in_flight} records in flight)...")
+    worker_stats = {}
+
+    def finish(draft, future):
+        tdf_blob, pid, job_seconds = future.result()
+        done, busy = worker_stats.get(pid, (0, 0.0))
+        worker_stats[pid] = (done + 1, busy + job_seconds)
+        METRICS.observe("encrypt", job_seconds)
+        return draft, tdf_blob
+
+    in_flight = deque()
+    # spawn rather than fork: the pool is started from a pipeline thread while other stages are running
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=spawn, initializer=init_encrypt_worker) as pool:
+        for draft in drafts:
+            if len(in_flight) >= max_in_flight:
+                yield finish(*in_flight.popleft())
+                total += 1
+            while in_flight and in_flight[0][1].done():
+                yield finish(*in_flight.popleft())
+                total += 1
+            in_flight.append((draft, pool.submit(encrypt_job, (draft["plaintext"], [draft["classification_attr"]]))))
+        while in_flight:
+            yield finish(*in_flight.popleft())
+            total += 1
+
+    elapsed = time.perf_counter() - start
+    for pid, (done, busy) in sorted(worker_stats.items()):
+        print(f"[encrypt]   worker {pid}: {done} records, {done / max(busy, 1e-9):.1f} rec/s")
+    print(f"[encrypt] {total} records in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.1f} rec/s overall)")
+
+
+# --- Streaming pipeline plumbing ---
+class _StageFailed:
+    def __init__(self, error):
+        self.error = error
+
+
+_STAGE_DONE = object()
+
+
+def _pump(source, outbox):
+    try:
+        for item in source:
+            outbox.put(item)
+    except BaseException as e:
+        outbox.put(_StageFailed(e))
+    finally:
+        outbox.put(_STAGE_DONE)
+
+
+def buffered(source, depth=PIPELINE_QUEUE_DEPTH, name="stage"):
+    """Runs the source iterator on its own thread behind a bounded queue.
+
+    The consumer sees the same items in the same order; at most `depth`
+    items are held between the two sides, and an exception raised by the
+    source is re-raised in the consumer.
+    """
+    outbox = queue.Queue(maxsize=depth)
+    threading.Thread(target=_pump, args=(source, outbox), name=f"seed-{name}", daemon=True).start()
+    while True:
+        item = outbox.get()
+        if item is _STAGE_DONE:
+            return
+        if isinstance(item, _StageFailed):
+            raise item.error
+        yield item
+
+
+def point_ewkb(lon, lat, srid=SRID_WGS84):
+    """Encodes a point as little-endian EWKB carrying its SRID."""
+    return struct.pack("<BIIdd", 1, EWKB_POINT_WITH_SRID, srid, lon, lat)
+
+
+def generate_random_point_wkb(rng=random):
+    lat = rng.uniform(25, 45)
+    lon = rng.uniform(-85, -65)
+    return point_ewkb(lon, lat)
+
+
+def random_uuid(rng=random):
+    """A version 4 UUID drawn from rng, so seeded runs reproduce the same ids."""
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _encode_copy_field(value, column_type):
+    if value is None:
+        return _COPY_NULL
+    if column_type == "uuid":
+        data = uuid.UUID(str(value)).bytes
+    elif column_type == "timestamp":
+        delta = value - PG_EPOCH
+        data = struct.pack("!q", (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds)
+    elif column_type == "jsonb":
+        data = b"\x01" + value.encode("utf-8")
+    elif column_type == "text":
+        data = value.encode("utf-8")
+    else:
+        data = bytes(value)
+    return struct.pack("!i", len(data)) + data
+
+
+def encode_copy_row(record):
+    """Encodes one tdf_objects record tuple as a binary COPY tuple."""
+    fields = [_encode_copy_field(value, column_type) for value, column_type in zip(record, COPY_COLUMN_TYPES)]
+    return struct.pack("!h", len(fields)) + b"".join(fields)
+
+
+class CopyStream:
+    """File-like reader that streams records to cursor.copy_expert in binary COPY format.
+
+    With metrics, the time psycopg2 spends between read() calls (sending the
+    previous chunk to the server) is recorded as db_write, one sample per
+    chunk, so waiting on upstream pipeline stages is not counted against the DB.
+    """
+
+    def __init__(self, records, metrics=None):
+        self.rows = 0
+        self._chunks = itertools.chain([_COPY_HEADER], self._encode(records), [_COPY_TRAILER])
+        self._buffer = bytearray()
+        self._metrics = metrics
+        self._returned_at = None
+        self._rows_returned = 0
+
+    def _encode(self, records):
+        for record in records:
+            self.rows += 1
+            yield encode_copy_row(record)
+
+    def read(self, size=-1):
+        if self._metrics is not None and self._returned_at is not None:
+            self._metrics.observe("db_write", time.perf_counter() - self._returned_at, self.rows - self._rows_returned)
+            self._rows_returned = self.rows
+        data = self._read(size)
+        self._returned_at = time.perf_counter()
+        return data
+
+    def _read(self, size):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def generate_military_manifest(fake, record_id, classification, rng=random, now=None):
+    """Generates realistic IC/Military manifest data for a tracked asset.
+
+    Draws come from `rng` and times are relative to `now`, so a seeded rng
+    and a fixed `now` reproduce the same manifest.
+    """
+    now = now or datetime.now()
+
+    platform = rng.choice(AIRCRAFT_PLATFORMS)
+    mission_type = rng.choice(MISSION_TYPES)
+    mission_start = now - timedelta(hours=rng.randint(1, 8))
+    mission_end = mission_start + timedelta(hours=rng.randint(2, 12))
 
     manifest = {
         "documentControl": {
-            "manifestId": str(uuid.uuid4()),
+            "manifestId": random_uuid(rng),
             "recordId": record_id,
             "version": "2.1",
             "classification": classification.upper(),
-            "caveats": random.sample(SECURITY_CAVEATS, k=random.randint(1, 3)),
-            "declassifyOn": (datetime.now() + timedelta(days=365*25)).strftime("%Y-%m-%d"),
-            "createdAt": datetime.now().isoformat() + "Z",
+            "caveats": rng.sample(SECURITY_CAVEATS, k=rng.randint(1, 3)),
+            "declassifyOn": (now + timedelta(days=365*25)).strftime("%Y-%m-%d"),
+            "createdAt": now.isoformat() + "Z",
             "createdBy": f"{fake.last_name().upper()}, {fake.first_name().upper()[0]}",
-            "originatingAgency": random.choice(["DIA", "NGA", "NSA", "CIA", "NRO", "NASIC"]),
+            "originatingAgency": rng.choice(["DIA", "NGA", "NSA", "CIA", "NRO", "NASIC"]),
         },
 
         "vehicle": {
             "registration": f"{platform['service']}-{fake.numerify('####')}",
             "tailNumber": fake.bothify('##-####').upper(),
-            "operator": f"{random.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {'SQN' if platform['type'] in ['FIGHTER', 'BOMBER'] else 'WG'}",
+            "operator": f"{rng.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {'SQN' if platform['type'] in ['FIGHTER', 'BOMBER'] else 'WG'}",
             "platform": {
                 "designation": platform["designation"],
                 "name": platform["name"],
@@ -280,105 +501,142 @@ def generate_military_manifest(fake, record_id, classification):
         },
 
         "mission": {
-            "missionId": f"MSN-{datetime.now().strftime('%Y%m%d')}-{fake.numerify('####')}",
+            "missionId": f"MSN-{now.strftime('%Y%m%d')}-{fake.numerify('####')}",
             "operationName": f"OP {fake.word().upper()} {fake.word().upper()}",
             "missionType": mission_type,
-            "priority": random.choice(["ROUTINE", "PRIORITY", "IMMEDIATE", "FLASH"]),
-            "commandAuthority": random.choice(COMMAND_ELEMENTS),
-            "taskingOrder": f"ATO-{datetime.now().strftime('%Y%j')}-{fake.numerify('###')}",
-            "missionStatus": random.choice(OPERATIONAL_STATUS),
+            "priority": rng.choice(["ROUTINE", "PRIORITY", "IMMEDIATE", "FLASH"]),
+            "commandAuthority": rng.choice(COMMAND_ELEMENTS),
+            "taskingOrder": f"ATO-{now.strftime('%Y%j')}-{fake.numerify('###')}",
+            "missionStatus": rng.choice(OPERATIONAL_STATUS),
             "timeline": {
                 "scheduled": mission_start.isoformat() + "Z",
-                "takeoff": (mission_start + timedelta(minutes=random.randint(0, 30))).isoformat() + "Z",
-                "onStation": (mission_start + timedelta(hours=random.randint(1, 3))).isoformat() + "Z",
+                "takeoff": (mission_start + timedelta(minutes=rng.randint(0, 30))).isoformat() + "Z",
+                "onStation": (mission_start + timedelta(hours=rng.randint(1, 3))).isoformat() + "Z",
                 "offStation": (mission_end - timedelta(hours=1)).isoformat() + "Z",
                 "expectedRecovery": mission_end.isoformat() + "Z",
             },
             "airspace": {
                 "operatingArea": f"AO-{fake.lexify('???').upper()}-{fake.numerify('##')}",
-                "altitudeBlock": f"FL{random.randint(20, 45)}0-FL{random.randint(46, 60)}0",
-                "restrictedAreas": [f"R-{fake.numerify('####')}" for _ in range(random.randint(0, 3))],
+                "altitudeBlock": f"FL{rng.randint(20, 45)}0-FL{rng.randint(46, 60)}0",
+                "restrictedAreas": [f"R-{fake.numerify('####')}" for _ in range(rng.randint(0, 3))],
             },
         },
 
         "intelligence": {
-            "collectionDiscipline": random.sample(INTEL_SOURCES, k=random.randint(1, 3)),
+            "collectionDiscipline": rng.sample(INTEL_SOURCES, k=rng.randint(1, 3)),
             "targetDeck": [
                 {
                     "targetId": f"TGT-{fake.hexify('######').upper()}",
-                    "targetName": f"{fake.word().upper()} {random.randint(1, 99)}",
-                    "targetType": random.choice(["FACILITY", "VEHICLE", "PERSONNEL", "COMMS", "RADAR"]),
-                    "priority": random.randint(1, 5),
+                    "targetName": f"{fake.word().upper()} {rng.randint(1, 99)}",
+                    "targetType": rng.choice(["FACILITY", "VEHICLE", "PERSONNEL", "COMMS", "RADAR"]),
+                    "priority": rng.randint(1, 5),
                 }
-                for _ in range(random.randint(1, 4))
+                for _ in range(rng.randint(1, 4))
             ],
-            "collectionRequirements": [f"CR-{fake.numerify('####')}" for _ in range(random.randint(1, 3))],
+            "collectionRequirements": [f"CR-{fake.numerify('####')}" for _ in range(rng.randint(1, 3))],
             "reportingInstructions": f"RPTG-{fake.lexify('???').upper()}-{fake.numerify('##')}",
         },
 
         "sensors": {
-            "primarySensor": random.choice(SENSOR_TYPES),
-            "activeSensors": random.sample(SENSOR_TYPES, k=random.randint(1, 4)),
-            "emissionControl": random.choice(EMISSION_CONTROL),
-            "datalinks": random.sample(["LINK-16", "SADL", "CDL", "TTNT", "MADL"], k=random.randint(1, 3)),
+            "primarySensor": rng.choice(SENSOR_TYPES),
+            "activeSensors": rng.sample(SENSOR_TYPES, k=rng.randint(1, 4)),
+            "emissionControl": rng.choice(EMISSION_CONTROL),
+            "datalinks": rng.sample(["LINK-16", "SADL", "CDL", "TTNT", "MADL"], k=rng.randint(1, 3)),
         },
 
         "coordination": {
             "supportingUnits": [
-                f"{random.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {random.choice(['SQN', 'WG', 'GP'])}"
-                for _ in range(random.randint(1, 3))
+                f"{rng.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {rng.choice(['SQN', 'WG', 'GP'])}"
+                for _ in range(rng.randint(1, 3))
             ],
-            "coalitionPartners": random.sample(COALITION_COUNTRIES, k=random.randint(0, 3)),
+            "coalitionPartners": rng.sample(COALITION_COUNTRIES, k=rng.randint(0, 3)),
             "frequencyPlan": {
-                "primary": f"{random.randint(225, 400)}.{random.randint(0, 99):02d} MHz",
-                "secondary": f"{random.randint(225, 400)}.{random.randint(0, 99):02d} MHz",
+                "primary": f"{rng.randint(225, 400)}.{rng.randint(0, 99):02d} MHz",
+                "secondary": f"{rng.randint(225, 400)}.{rng.randint(0, 99):02d} MHz",
                 "guard": "243.00 MHz",
             },
             "checkInPoint": f"CP-{fake.lexify('???').upper()}",
         },
 
         "trackQuality": {
-            "source": random.choice(["ADS-B", "MODE-S", "PRIMARY", "LINK-16", "SATELLITE"]),
-            "reliability": round(random.uniform(0.85, 0.99), 3),
-            "positionAccuracy_m": round(random.uniform(5, 50), 1),
-            "velocityAccuracy_mps": round(random.uniform(0.5, 5), 2),
-            "lastUpdate": datetime.now().isoformat() + "Z",
-            "updateRate_sec": random.choice([1, 2, 5, 10, 30]),
+            "source": rng.choice(["ADS-B", "MODE-S", "PRIMARY", "LINK-16", "SATELLITE"]),
+            "reliability": round(rng.uniform(0.85, 0.99), 3),
+            "positionAccuracy_m": round(rng.uniform(5, 50), 1),
+            "velocityAccuracy_mps": round(rng.uniform(0.5, 5), 2),
+            "lastUpdate": now.isoformat() + "Z",
+            "updateRate_sec": rng.choice([1, 2, 5, 10, 30]),
         },
 
         "processing": {
-            "ingestPipeline": f"v{random.randint(2, 4)}.{random.randint(0, 9)}.{random.randint(0, 99)}",
+            "ingestPipeline": f"v{rng.randint(2, 4)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}",
             "processingNode": f"NODE-{fake.lexify('???').upper()}-{fake.numerify('##')}",
-            "processingTime_ms": round(random.uniform(10, 500), 1),
-            "correlationId": str(uuid.uuid4()),
-            "validated": random.choice([True, True, True, False]),
-            "fusedSources": random.randint(1, 5),
+            "processingTime_ms": round(rng.uniform(10, 500), 1),
+            "correlationId": random_uuid(rng),
+            "validated": rng.choice([True, True, True, False]),
+            "fusedSources": rng.randint(1, 5),
         },
     }
     return manifest
 
 
-def generate_tdf_records(count, sdk):
-    records = []
-    fake = Faker()
-
-    try:
-        print("[s4] initializing S4 S3 client...")
-        s3_client = get_s4_s3_client()
-        print("[s4] S4 S3 client initialized successfully")
-    except Exception as e:
-        print(f"[s4] failed to initialize S4 client: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+def shard_range(count, shards, shard_index):
+    """Returns the [start, stop) slice of global record indices owned by one shard."""
+    return count * shard_index // shards, count * (shard_index + 1) // shards
+
+
+def seed_int(seed):
+    """Stable 64-bit integer for a --seed string (NumPy and Faker need integer seeds)."""
+    return int.from_bytes(hashlib.sha256(str(seed).encode()).digest()[:8], "big")
+
+
+def pooled_manifests(engine, start, stop, seed=None, base_time=None, batch_size=MANIFEST_BATCH_SIZE, metrics=METRICS):
+    """Yields ManifestEngine manifests for records start..stop-1.
+
+    Batches are aligned to multiples of batch_size in the global index and,
+    when seeded, draw from an RNG keyed on (seed, batch number), so a record
+    gets the same manifest whichever shard generates it.
+    """
+    for batch_start in range(start - start % batch_size, stop, batch_size):
+        if seed is None:
+            rng, now = np.random.default_rng(), datetime.now()
+        else:
+            rng, now = np.random.default_rng([seed_int(seed), batch_start // batch_size]), base_time
+        batch = range(batch_start, batch_start + batch_size)
+        with metrics.time("manifest", items=batch_size):
+            manifests = engine.generate(
+                [None] * batch_size,
+                [CLASSIFICATIONS[i % len(CLASSIFICATIONS)] for i in batch],
+                now, rng,
+            )
+        yield from manifests[max(start, batch_start) - batch_start:min(stop, batch.stop) - batch_start]
+
+
+def generate_drafts(start, stop, fake, seed=None, base_time=None, engine=None, skip=frozenset(), metrics=METRICS):
+    """Yields the plaintext side of records start..stop-1: vehicle data, manifest, metadata and placement.
+
+    With a seed, every record draws from its own RNG keyed on (seed, global
+    index) and all timestamps are taken from base_time, so a record's
+    plaintext does not depend on which shard or process produced it. With a
+    ManifestEngine, manifests are built in batches by the engine instead of
+    per record with Faker. Indices in skip (already journalled) are not produced.
+    Manifest timings go to metrics.
+    """
+    manifests = pooled_manifests(engine, start, stop, seed, base_time, metrics=metrics) if engine else None
+
+    for i in range(start, stop):
+        if i in skip:
+            if manifests is not None:
+                next(manifests)
+            continue
+        if seed is None:
+            rng, now = random, datetime.now()
+        else:
+            rng, now = random.Random(f"{seed}:{i}"), base_time
+            fake.seed_instance(rng.getrandbits(64))
 
-    print(f"[seed] generating {count} records with IC/Military manifests...")
-
-    for i in range(count):
         cls_type = CLASSIFICATIONS[i % len(CLASSIFICATIONS)]
-        classification_attr = f"https://demo.com/attr/classification/value/{cls_type}"
-        random_id = str(uuid.uuid4())
-        platform = random.choice(AIRCRAFT_PLATFORMS)
+        random_id = random_uuid(rng)
+        platform = rng.choice(AIRCRAFT_PLATFORMS)
 
         vehicle_data = {
             "vehicleName": f"{platform['designation']} {platform['name']}",
@@ -387,63 +645,239 @@ def generate_tdf_records(count, sdk):
             "aircraft_type": f"{platform['designation']} ({platform['type']})"
         }
 
-        tdf_blob = encrypt_data(sdk, json.dumps(vehicle_data), [classification_attr])
+        metadata = {
+            "callsign": f"{fake.lexify('??').upper()}{fake.numerify('##')}",
+            "speed": f"{rng.randint(200, 600)} kts",
+            "altitude": f"FL{rng.randint(150, 450)}",
+            "heading": str(rng.randint(0, 359)),
+        }
+
+        if manifests is None:
+            with metrics.time("manifest"):
+                manifest = generate_military_manifest(fake, random_id, cls_type, rng, now)
+        else:
+            manifest = next(manifests)
+            manifest["documentControl"]["recordId"] = random_id
+
+        yield {
+            "index": i,
+            "id": random_id,
+            "platform": platform,
+            "cls_type": cls_type,
+            "classification_attr": f"https://demo.com/attr/classification/value/{cls_type}",
+            "plaintext": json.dumps(vehicle_data),
+            "manifest": manifest,
+            "metadata": metadata,
+            "ts": now,
+            "geo": generate_random_point_wkb(rng),
+            "created_at": now + timedelta(seconds=rng.uniform(0.01, 0.1)),
+        }
 
-        search_jsonb = json.dumps({
-            "attrRelTo": [],
-            "attrNeedToKnow": [],
-            "attrClassification": [classification_attr]
-        })
 
-        manifest_data = generate_military_manifest(fake, random_id, cls_type)
-        manifest_key = f"manifests/{random_id}.json.tdf"
+def build_record(draft, tdf_blob, manifest_uri, tdf_uri=FIXED_TDF_URI):
+    """The tdf_objects row tuple (in COPY column order) for an encrypted draft."""
+    search_jsonb = json.dumps({
+        "attrRelTo": [],
+        "attrNeedToKnow": [],
+        "attrClassification": [draft["classification_attr"]]
+    })
+    metadata_jsonb = json.dumps({**draft["metadata"], "manifest": manifest_uri})
+
+    return (
+        draft["id"],
+        draft["ts"],
+        FIXED_SRC_TYPE,
+        draft["geo"],
+        search_jsonb,
+        metadata_jsonb,
+        tdf_blob,
+        tdf_uri,
+        draft["created_at"],
+        FIXED_CREATED_BY
+    )
 
-        manifest_attributes = [
-            f"https://demo.com/attr/classification/value/topsecret",
-            NEEDTOKNOW_ATTR
-        ]
 
+def upload_manifests(encrypted, s3_client, count, concurrency=UPLOAD_CONCURRENCY, blob_threshold=None,
+                     compression="none"):
+    """Uploads manifests to S4 with up to `concurrency` requests in flight.
+
+    Yields (index, record) with the finished tdf_objects record tuple for each
+    draft in completion order. A manifest that still fails after retries is logged and its record
+    is kept with a null manifest URI, so one bad upload never holds up the rest.
+
+    With blob_threshold set, ciphertext larger than that many bytes is stored
+    in S4 as well and the record carries its tdf_uri with a NULL tdf_blob; if
+    that upload fails the ciphertext stays inline.
+
+    compression is the manifest_codec codec applied to each manifest body.
+    """
+    upload_manifest = functools.partial(upload_to_s4, compression=compression)
+    manifest_attributes = [
+        f"https://demo.com/attr/classification/value/topsecret",
+        NEEDTOKNOW_ATTR
+    ]
+
+    def upload(draft, tdf_blob):
+        tdf_uri = tdf_error = None
+        if blob_threshold is not None and len(tdf_blob) > blob_threshold:
+            try:
+                tdf_uri = upload_to_s4_with_retry(s3_client, f"{TDF_KEY_PREFIX}/{draft['id']}.tdf", tdf_blob,
+                                                  [draft["classification_attr"]], put=put_s4_object)
+            except Exception as e:
+                tdf_error = e
+        manifest_key = f"manifests/{draft['id']}.json.tdf"
         try:
-            manifest_uri = upload_to_s4(s3_client, manifest_key, manifest_data, manifest_attributes)
-            print(f"  [{i+1}/{count}] {platform['designation']} | {cls_type.upper()} + NTK/BBB")
+            manifest_uri = upload_to_s4_with_retry(s3_client, manifest_key, draft["manifest"], manifest_attributes,
+                                                   put=upload_manifest)
         except Exception as e:
-            print(f"  [{i+1}/{count}] manifest upload FAILED: {e}")
-            manifest_uri = None
-
-        metadata_jsonb = json.dumps({
-            "callsign": f"{fake.lexify('??').upper()}{fake.numerify('##')}",
-            "speed": f"{random.randint(200, 600)} kts",
-            "altitude": f"FL{random.randint(150, 450)}",
-            "heading": str(random.randint(0, 359)),
-            "manifest": manifest_uri
-        })
-
-        random_ts = datetime.now()
-        random_geo = generate_random_point_wkb()
-        random_created_at = random_ts + timedelta(seconds=random.uniform(0.01, 0.1))
-
-        record = (
-            random_id,
-            random_ts,
-            FIXED_SRC_TYPE,
-            random_geo,
-            search_jsonb,
-            metadata_jsonb,
-            tdf_blob,
-            FIXED_TDF_URI,
-            random_created_at,
-            FIXED_CREATED_BY
-        )
-        records.append(record)
-
-    return records
-
-
-def insert_seed_data(sdk, should_delete: bool):
+            return None, e, tdf_uri, tdf_error
+        return manifest_uri, None, tdf_uri, tdf_error
+
+    def finish(future):
+        draft, tdf_blob = in_flight.pop(future)
+        i = draft["index"]
+        stats["done"] += 1
+        manifest_uri, manifest_error, tdf_uri, tdf_error = future.result()
+        if manifest_error is None:
+            print(f"  [{i+1}/{count}] {draft['platform']['designation']} | {draft['cls_type'].upper()} + NTK/BBB")
+        else:
+            print(f"  [{i+1}/{count}] manifest upload FAILED: {manifest_error}")
+            stats["failed"] += 1
+        if tdf_error is not None:
+            print(f"  [{i+1}/{count}] ciphertext upload FAILED, keeping it inline: {tdf_error}")
+        if tdf_uri is None:
+            stats["inline"] += 1
+            stats["inline_bytes"] += len(tdf_blob)
+            return i, build_record(draft, tdf_blob, manifest_uri)
+        stats["offloaded"] += 1
+        stats["offloaded_bytes"] += len(tdf_blob)
+        return i, build_record(draft, None, manifest_uri, tdf_uri)
+
+    in_flight = {}
+    stats = {"done": 0, "failed": 0, "inline": 0, "inline_bytes": 0, "offloaded": 0, "offloaded_bytes": 0}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s4-upload") as pool:
+        for draft, tdf_blob in encrypted:
+            while len(in_flight) >= concurrency * 2:
+                completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    yield finish(future)
+            in_flight[pool.submit(upload, draft, tdf_blob)] = (draft, tdf_blob)
+
+        while in_flight:
+            completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in completed:
+                yield finish(future)
+
+    elapsed = time.perf_counter() - start
+    print(f"[s4] {stats['done']} manifests ({stats['failed']} failed) in {elapsed:.2f}s "
+          f"({stats['done'] / max(elapsed, 1e-9):.1f} uploads/s, concurrency {concurrency})")
+    if blob_threshold is not None:
+        print(f"[s4] ciphertext layout (threshold {blob_threshold} bytes): "
+              f"{stats['inline']} inline ({stats['inline_bytes'] / 1e6:.1f} MB), "
+              f"{stats['offloaded']} in S4 ({stats['offloaded_bytes'] / 1e6:.1f} MB)")
+
+
+def generate_tdf_records(sdk, s3_client, args, skip=frozenset()):
+    """Streams (index, record) units through generate -> encrypt -> upload, each stage on its own thread.
+
+    Stages are joined by bounded queues, so memory use depends on
+    --queue-depth and the encryption window rather than on --count.
+    """
+    start, stop = shard_range(args.count, args.shards, args.shard_index)
+    print(f"[seed] shard {args.shard_index + 1}/{args.shards}: generating records {start}..{stop - 1} "
+          f"of {args.count} with IC/Military manifests (seed={args.seed})...")
+    fake = Faker()
+    engine = None
+    if args.manifest_engine == "pooled":
+        engine = manifest_engine.ManifestEngine(seed=None if args.seed is None else seed_int(args.seed))
+    if skip:
+        print(f"[seed] skipping {len(skip)} journalled record(s)")
+    drafts = buffered(generate_drafts(start, stop, fake, args.seed, args.base_time, engine, skip), args.queue_depth, "generate")
+    encrypted = buffered(encrypt_stream(sdk, drafts, args.workers, args.chunk_size), args.queue_depth, "encrypt")
+    uploaded = upload_manifests(encrypted, s3_client, args.count, args.upload_concurrency, args.blob_threshold,
+                                args.compression)
+    return buffered(uploaded, args.queue_depth, "upload")
+
+
+def table_sizes(cursor):
+    """(heap, toast, total) bytes of tdf_objects."""
+    cursor.execute(TABLE_SIZE_SQL)
+    return cursor.fetchone()
+
+
+def report_table_growth(before, after, rows, blob_threshold):
+    """Prints how much tdf_objects grew, so inline and --blob-threshold runs can be compared."""
+    heap, toast, total = (b - a for a, b in zip(before, after))
+    layout = "inline" if blob_threshold is None else f"blobs > {blob_threshold} bytes in S4"
+    print(f"[db] tdf_objects growth ({layout}): heap {heap / 1e6:+.1f} MB, toast {toast / 1e6:+.1f} MB, "
+          f"total {total / 1e6:+.1f} MB ({total / max(rows, 1):.0f} bytes/row)")
+
+
+def open_journal(args):
+    """The run's checkpoint journal, or None when --journal is not set."""
+    if not args.journal:
+        return None
+    journal = SeedJournal(args.journal, {
+        "count": args.count,
+        "shards": args.shards,
+        "shard_index": args.shard_index,
+        "seed": args.seed,
+        "base_time": args.base_time.isoformat(),
+    }, resume=args.resume)
+    committed, pending = journal.counts()
+    print(f"[journal] {args.journal}: {committed} committed, {pending} pending unit(s)")
+    return journal
+
+
+def copy_in_batches(conn, cursor, units, commit_every=None, journal=None, summary=None):
+    """COPYs (index, record) units into tdf_objects, committing every commit_every rows.
+
+    Each unit is committed to the journal as it is read, before it is sent to
+    the DB, and marked committed once its batch commits, so a crash loses at
+    most the uncommitted batch's DB work and none of its encryption or upload
+    work. Returns the row count.
+    """
+    units = iter(units)
+    total = 0
+    while True:
+        indices = []
+
+        def batch():
+            for index, record in itertools.islice(units, commit_every):
+                if journal is not None:
+                    journal.add(index, record)
+                indices.append(index)
+                yield record
+
+        records = batch() if summary is None else summary.track(batch())
+        stream = CopyStream(records, METRICS)
+        cursor.copy_expert(COPY_SQL, stream, size=COPY_BUFFER_SIZE)
+        if summary is not None and stream.rows:
+            published = publish_bulk_load_summary(cursor, summary)
+            print(f"[db] queued {published} bulk-load summary notification(s) for commit")
+        with METRICS.time("db_commit", items=stream.rows):
+            conn.commit()
+        if journal is not None:
+            journal.mark_committed(indices)
+        total += stream.rows
+        if commit_every is None or stream.rows < commit_every:
+            return total
+        print(f"[db] committed {total} records so far")
+
+
+def insert_seed_data(sdk, args):
     conn = None
-    records = generate_tdf_records(NUM_RECORDS, sdk)
+    journal = None
 
-    if not records:
+    try:
+        print("[s4] initializing S4 S3 client...")
+        s3_client = get_s4_s3_client(max_pool_connections=args.upload_concurrency)
+        print("[s4] S4 S3 client initialized successfully")
+    except Exception as e:
+        print(f"[s4] failed to initialize S4 client: {e}")
+        import traceback
+        traceback.print_exc()
         print("[db] no records generated. Exiting.")
         return
 
@@ -460,21 +894,46 @@ def insert_seed_data(sdk, should_delete: bool):
         print(f"[db] connected successfully")
         cursor = conn.cursor()
 
-        if should_delete:
+        if args.delete:
             print(f"[db] --delete flag detected, deleting existing records for src_type={FIXED_SRC_TYPE}")
             cursor.execute(DELETE_SQL, (FIXED_SRC_TYPE,))
             print(f"[db] deleted {cursor.rowcount} records")
 
-        print(f"[db] inserting {NUM_RECORDS} records in batches of {BATCH_SIZE}...")
-        execute_batch(cursor, INSERT_SQL, records, page_size=BATCH_SIZE)
-        conn.commit()
-        print(f"[db] successfully inserted {NUM_RECORDS} records into tdf_objects")
+        journal = open_journal(args)
+        units = []
+        skip = frozenset()
+        if journal is not None:
+            landed = journal.reconcile(cursor)
+            if landed:
+                print(f"[journal] {landed} pending unit(s) were already committed to the DB")
+            skip = frozenset(journal.indices())
+            units = journal.pending()
+
+        summary = None
+        if args.bulk_load:
+            print(f"[db] bulk-load mode: per-row insert notifications suppressed")
+            begin_bulk_load(cursor)
+            summary = BulkLoadSummary()
+
+        sizes_before = table_sizes(cursor)
+        print(f"[db] streaming records into tdf_objects (binary COPY)...")
+        start = time.perf_counter()
+        units = itertools.chain(units, generate_tdf_records(sdk, s3_client, args, skip))
+        rows = copy_in_batches(conn, cursor, units, args.commit_every, journal, summary)
+        elapsed = time.perf_counter() - start
+        print(f"[db] successfully inserted {rows} records into tdf_objects "
+              f"in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+        report_table_growth(sizes_before, table_sizes(cursor), rows, args.blob_threshold)
 
     except psycopg2.OperationalError as e:
         print(f"[db] CONNECTION ERROR: could not connect to database")
         print(f"[db] details: {e}")
         if conn: conn.rollback()
 
+    except JournalMismatch as e:
+        print(f"[journal] {e}")
+        if conn: conn.rollback()
+
     except Exception as e:
         print(f"[db] error during insertion: {e}")
         import traceback
@@ -482,6 +941,8 @@ def insert_seed_data(sdk, should_delete: bool):
         if conn: conn.rollback()
 
     finally:
+        if journal is not None:
+            journal.close()
         if conn:
             cursor.close()
             conn.close()
@@ -490,14 +951,70 @@ def insert_seed_data(sdk, should_delete: bool):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Seed script for TDF objects with IC/Military manifests.")
-    parser.add_argument("--delete", action="store_true", help="Delete existing records before inserting.")
+    parser.add_argument("--delete", action="store_true",
+                        help="Delete existing records before inserting (when sharding, run it once before fanning out).")
+    parser.add_argument("--count", type=int, default=NUM_RECORDS,
+                        help=f"Total records in the dataset across all shards (default: {NUM_RECORDS}).")
+    parser.add_argument("--shards", type=int, default=1, help="Number of shards the dataset is split into (default: 1).")
+    parser.add_argument("--shard-index", type=int, default=0, help="Zero-based shard this process seeds (default: 0).")
+    parser.add_argument("--seed", help="Seed for reproducible plaintext; unseeded runs draw fresh data.")
+    parser.add_argument("--base-time", type=datetime.fromisoformat, default=SEED_BASE_TIME,
+                        help=f"Reference time for seeded records (default: {SEED_BASE_TIME.isoformat()}).")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of encryption worker processes, each with its own SDK instance (default: 1, in-process).")
+    parser.add_argument("--chunk-size", type=int, default=ENCRYPT_CHUNK_SIZE,
+                        help=f"Encryptions kept in flight per worker (default: {ENCRYPT_CHUNK_SIZE}).")
+    parser.add_argument("--queue-depth", type=int, default=PIPELINE_QUEUE_DEPTH,
+                        help=f"Records buffered between pipeline stages (default: {PIPELINE_QUEUE_DEPTH}).")
+    parser.add_argument("--upload-concurrency", type=int, default=UPLOAD_CONCURRENCY,
+                        help=f"Concurrent S4 manifest uploads; also sizes the S3 connection pool (default: {UPLOAD_CONCURRENCY}). "
+                             "Point S4_ENDPOINT at a local S3 stand-in to benchmark.")
+    parser.add_argument("--blob-threshold", type=int, default=None, metavar="BYTES",
+                        help="Store ciphertext larger than BYTES in S4 under tdf/ and set tdf_uri instead of tdf_blob "
+                             "(default: all ciphertext inline). Compare the reported rows/s and table growth across runs.")
+    parser.add_argument("--journal", metavar="PATH",
+                        help="Checkpoint journal (SQLite) of finished records; enables incremental commits.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the run recorded in --journal, skipping records that already finished.")
+    parser.add_argument("--commit-every", type=int, default=None, metavar="ROWS",
+                        help=f"Commit after every ROWS records (default: once at the end, "
+                             f"or {CHECKPOINT_COMMIT_EVERY} with --journal).")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Suppress per-row insert notifications and publish one summary on tdf_objects_bulk_loaded at commit.")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write the per-stage timing summary as JSON to PATH.")
+    parser.add_argument("--prometheus-textfile", metavar="PATH",
+                        help="Write the per-stage metrics to PATH in Prometheus textfile-collector format.")
+    parser.add_argument("--manifest-engine", choices=["faker", "pooled"], default="faker",
+                        help="faker: per-record Faker manifests (default); pooled: batched NumPy/value-pool ManifestEngine.")
+    parser.add_argument("--compress", dest="compression", choices=manifest_codec.CODECS, default="none",
+                        help="Compress manifests before upload (flagged in object metadata; readers decompress transparently).")
     args = parser.parse_args()
+    if args.shards < 1 or not 0 <= args.shard_index < args.shards:
+        parser.error("--shard-index must be in [0, --shards)")
+    try:
+        manifest_codec.check_codec(args.compression)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.blob_threshold is not None and args.blob_threshold < 0:
+        parser.error("--blob-threshold must be >= 0")
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
+    if args.resume and args.delete:
+        parser.error("--resume cannot be combined with --delete")
+    if args.commit_every is not None and args.commit_every < 1:
+        parser.error("--commit-every must be >= 1")
+    if args.journal and args.commit_every is None:
+        args.commit_every = CHECKPOINT_COMMIT_EVERY
 
     try:
-        print("[sdk] initializing TDF SDK...")
-        sdk_instance = get_sdk_instance(PLATFORM_ENDPOINT, CLIENT_ID, CLIENT_SECRET, CA_CERT_PATH, ISSUER_ENDPOINT)
-        insert_seed_data(sdk_instance, args.delete)
+        sdk_instance = None
+        if args.workers <= 1:
+            print("[sdk] initializing TDF SDK...")
+            sdk_instance = get_sdk_instance(PLATFORM_ENDPOINT, CLIENT_ID, CLIENT_SECRET, CA_CERT_PATH, ISSUER_ENDPOINT)
+        insert_seed_data(sdk_instance, args)
     except Exception as e:
         print(f"[main] error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        METRICS.report(args.metrics_json, args.prometheus_textfile)
\ No newline at end of file
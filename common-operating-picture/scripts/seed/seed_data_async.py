@@ -0,0 +1,298 @@
+"""
+Asyncio seeding engine for tdf_objects.
+
+Produces the same records as seed_data.py (drafts, record layout, --seed /
+--shards index space and the pooled ManifestEngine are shared with it), but
+every network wait is awaited instead of blocking a thread:
+
+  * S4 uploads go through aiobotocore, with up to --concurrency records in
+    flight and --upload-concurrency pooled HTTP connections,
+  * inserts go through an asyncpg pool, one binary COPY + commit per
+    --batch-size records on up to --db-concurrency connections,
+  * the CPU-bound create_tdf calls run on a process pool of --workers
+    spawned workers, each with its own SDK instance.
+
+Keycloak/STS credentials come from the shared CredentialProvider, whose
+background thread keeps the token refresh off the event loop.
+"""
+import time
+import uuid
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import asyncpg
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from faker import Faker
+
+import manifest_engine
+import manifest_codec
+from bulk_load import BULK_LOADED_CHANNEL, BULK_LOAD_SETTING, BulkLoadSummary
+from seed_metrics import StageMetrics
+from s4_credentials import AioProviderCredentialSource
+from seed_data import (
+    CREDENTIALS, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT,
+    S4_S3_ENDPOINT, S4_BUCKET, S4_REGION, NEEDTOKNOW_ATTR, FIXED_SRC_TYPE, TDF_KEY_PREFIX,
+    NUM_RECORDS, SEED_BASE_TIME, PIPELINE_QUEUE_DEPTH, UPLOAD_MAX_ATTEMPTS,
+    build_record, buffered, encrypt_job, generate_drafts, init_encrypt_worker, is_retryable_upload_error,
+    seed_int, shard_range, upload_backoff_delay,
+)
+
+# --- Async engine defaults ---
+RECORD_CONCURRENCY = 256
+UPLOAD_CONCURRENCY = 64
+DB_CONCURRENCY = 4
+INSERT_BATCH_SIZE = 1000
+INSERT_FLUSH_SECONDS = 0.5
+COPY_COLUMNS = ("id", "ts", "src_type", "geo", "search", "metadata", "tdf_blob", "tdf_uri", "_created_at", "_created_by")
+DELETE_SQL = "DELETE FROM tdf_objects WHERE src_type = $1"
+MANIFEST_ATTRIBUTES = [
+    "https://demo.com/attr/classification/value/topsecret",
+    NEEDTOKNOW_ATTR
+]
+
+# --- Stage metrics (manifest, encrypt, s4_upload, db_write) ---
+METRICS = StageMetrics("seed_data_async")
+
+
+# --- S4 ---
+def s4_client(max_pool_connections):
+    """aiobotocore S3 client whose STS credentials follow the shared CredentialProvider."""
+    session = get_session()
+    session.get_component("credential_provider").insert_before("env", AioProviderCredentialSource(CREDENTIALS.start()))
+    print(f"[s4] building async S3 client at {S4_S3_ENDPOINT} ({max_pool_connections} connections)")
+    return session.create_client(
+        "s3",
+        endpoint_url=S4_S3_ENDPOINT,
+        region_name=S4_REGION,
+        verify=False,
+        # Retries are handled by put_with_retry so they share the sync seeder's backoff policy.
+        config=AioConfig(max_pool_connections=max_pool_connections, retries={"max_attempts": 1, "mode": "standard"}),
+    )
+
+
+async def put_with_retry(s3, key, payload: bytes, attributes: list[str], max_attempts=UPLOAD_MAX_ATTEMPTS,
+                         extra_metadata=None):
+    """PUTs one object with full-jitter exponential backoff on throttling, 5xx and connection errors."""
+    metadata = {f"tdf-data-attribute-{i}": attr for i, attr in enumerate(attributes)}
+    metadata.update(extra_metadata or {})
+    for attempt in range(max_attempts):
+        start = time.perf_counter()
+        try:
+            await s3.put_object(Bucket=S4_BUCKET, Key=key, Body=payload, Metadata=metadata)
+            METRICS.observe("s4_upload", time.perf_counter() - start)
+            return f"s3://{S4_BUCKET}/{key}"
+        except Exception as e:
+            METRICS.observe("s4_upload", time.perf_counter() - start, error=True)
+            if attempt + 1 >= max_attempts or not is_retryable_upload_error(e):
+                raise
+            delay = upload_backoff_delay(attempt)
+            print(f"[s4] upload of {key} failed ({e}), retry {attempt + 1}/{max_attempts - 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+# --- Postgres ---
+async def _init_connection(conn):
+    # COPY sends geo as EWKB bytes; asyncpg has no built-in codec for PostGIS geometry.
+    await conn.set_type_codec("geometry", schema="public", encoder=bytes, decoder=bytes, format="binary")
+
+
+async def insert_batches(db, records, batch_size, load_id, totals):
+    """Drains records into tdf_objects, one COPY + commit per batch, until it sees the None sentinel.
+
+    With a bulk-load load_id, each batch publishes its own summary under that id.
+    """
+    loop = asyncio.get_running_loop()
+    done = False
+    while not done:
+        first = await records.get()
+        if first is None:
+            return
+        batch = [first]
+        deadline = loop.time() + INSERT_FLUSH_SECONDS
+        while len(batch) < batch_size:
+            try:
+                item = await asyncio.wait_for(records.get(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                done = True
+                break
+            batch.append(item)
+
+        start = time.perf_counter()
+        async with db.acquire() as conn:
+            async with conn.transaction():
+                await conn.copy_records_to_table("tdf_objects", records=batch, columns=COPY_COLUMNS)
+                if load_id is not None:
+                    summary = BulkLoadSummary(load_id)
+                    for record in batch:
+                        summary.add(record[0], record[1], record[2])
+                    for payload in summary.payloads():
+                        await conn.execute("SELECT pg_notify($1, $2)", BULK_LOADED_CHANNEL, payload)
+        METRICS.observe("db_write", time.perf_counter() - start, len(batch))
+        totals["rows"] += len(batch)
+        print(f"[db] committed batch of {len(batch)} ({totals['rows']} total)")
+
+
+# --- Pipeline ---
+async def seed(args):
+    loop = asyncio.get_running_loop()
+    start, stop = shard_range(args.count, args.shards, args.shard_index)
+    print(f"[seed] shard {args.shard_index + 1}/{args.shards}: generating records {start}..{stop - 1} "
+          f"of {args.count} with IC/Military manifests (seed={args.seed})...")
+
+    engine = None
+    if args.manifest_engine == "pooled":
+        engine = manifest_engine.ManifestEngine(seed=None if args.seed is None else seed_int(args.seed))
+    drafts = buffered(generate_drafts(start, stop, Faker(), args.seed, args.base_time, engine, metrics=METRICS),
+                      args.queue_depth, "generate")
+
+    print(f"[db] creating asyncpg pool ({args.db_concurrency} connections) to {DB_HOST}:{DB_PORT}/{DB_NAME}...")
+    db = await asyncpg.create_pool(
+        database=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT,
+        min_size=1, max_size=args.db_concurrency, init=_init_connection,
+        server_settings={BULK_LOAD_SETTING: "on"} if args.bulk_load else None,
+    )
+    load_id = None
+    if args.bulk_load:
+        load_id = str(uuid.uuid4())
+        print(f"[db] bulk-load mode: per-row insert notifications suppressed (load {load_id})")
+    if args.delete:
+        print(f"[db] --delete flag detected, deleting existing records for src_type={FIXED_SRC_TYPE}")
+        print(f"[db] {await db.execute(DELETE_SQL, FIXED_SRC_TYPE)}")
+
+    print(f"[encrypt] encrypting on {args.workers} workers...")
+    spawn = multiprocessing.get_context("spawn")
+    encrypt_pool = ProcessPoolExecutor(max_workers=args.workers, mp_context=spawn, initializer=init_encrypt_worker)
+    records = asyncio.Queue(maxsize=args.batch_size * args.db_concurrency)
+    in_flight = asyncio.Semaphore(args.concurrency)
+    totals = {"rows": 0, "failed": 0, "skipped": 0, "offloaded": 0}
+    count = args.count
+
+    async def process(s3, draft):
+        """Encrypts, uploads and queues one record; a failure is logged and skips only that record."""
+        label = f"[{draft['index']+1}/{count}]"
+        try:
+            start = time.perf_counter()
+            try:
+                tdf_blob, _, seconds = await loop.run_in_executor(
+                    encrypt_pool, encrypt_job, (draft["plaintext"], [draft["classification_attr"]]))
+            except Exception as e:
+                METRICS.observe("encrypt", time.perf_counter() - start, error=True)
+                raise RuntimeError(f"encryption failed: {e}") from e
+            METRICS.observe("encrypt", seconds)
+
+            tdf_uri = None
+            if args.blob_threshold is not None and len(tdf_blob) > args.blob_threshold:
+                try:
+                    tdf_uri = await put_with_retry(s3, f"{TDF_KEY_PREFIX}/{draft['id']}.tdf", tdf_blob,
+                                                   [draft["classification_attr"]])
+                    totals["offloaded"] += 1
+                except Exception as e:
+                    print(f"  {label} ciphertext upload FAILED, keeping it inline: {e}")
+
+            try:
+                body, extra_metadata = manifest_codec.encode(manifest_engine.dumps(draft["manifest"]), args.compression)
+                manifest_uri = await put_with_retry(s3, f"manifests/{draft['id']}.json.tdf", body,
+                                                    MANIFEST_ATTRIBUTES, extra_metadata=extra_metadata)
+                print(f"  {label} {draft['platform']['designation']} | {draft['cls_type'].upper()} + NTK/BBB")
+            except Exception as e:
+                print(f"  {label} manifest upload FAILED: {e}")
+                totals["failed"] += 1
+                manifest_uri = None
+
+            record = build_record(draft, None if tdf_uri else tdf_blob, manifest_uri, tdf_uri)
+        except Exception as e:
+            # Raising here would make the TaskGroup cancel every other record in flight.
+            print(f"  {label} record SKIPPED: {e}")
+            totals["skipped"] += 1
+            METRICS.count("records_skipped")
+        else:
+            await records.put(record)
+        finally:
+            in_flight.release()
+
+    started = time.perf_counter()
+    try:
+        async with s4_client(args.upload_concurrency) as s3:
+            async with asyncio.TaskGroup() as inserters:
+                for _ in range(args.db_concurrency):
+                    inserters.create_task(insert_batches(db, records, args.batch_size, load_id, totals))
+                async with asyncio.TaskGroup() as workers:
+                    while True:
+                        await in_flight.acquire()
+                        draft = await loop.run_in_executor(None, next, drafts, None)
+                        if draft is None:
+                            in_flight.release()
+                            break
+                        workers.create_task(process(s3, draft))
+                for _ in range(args.db_concurrency):
+                    await records.put(None)
+    finally:
+        encrypt_pool.shutdown(cancel_futures=True)
+        await db.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"[db] successfully inserted {totals['rows']} records into tdf_objects in {elapsed:.2f}s "
+          f"({totals['rows'] / max(elapsed, 1e-9):.0f} rows/s; {totals['failed']} manifest failures, "
+          f"{totals['skipped']} records skipped, "
+          f"{totals['offloaded']} blobs in S4)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asyncio seed engine for TDF objects with IC/Military manifests.")
+    parser.add_argument("--delete", action="store_true",
+                        help="Delete existing records before inserting (when sharding, run it once before fanning out).")
+    parser.add_argument("--count", type=int, default=NUM_RECORDS,
+                        help=f"Total records in the dataset across all shards (default: {NUM_RECORDS}).")
+    parser.add_argument("--shards", type=int, default=1, help="Number of shards the dataset is split into (default: 1).")
+    parser.add_argument("--shard-index", type=int, default=0, help="Zero-based shard this process seeds (default: 0).")
+    parser.add_argument("--seed", help="Seed for reproducible plaintext; unseeded runs draw fresh data.")
+    parser.add_argument("--base-time", type=datetime.fromisoformat, default=SEED_BASE_TIME,
+                        help=f"Reference time for seeded records (default: {SEED_BASE_TIME.isoformat()}).")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, multiprocessing.cpu_count())),
+                        help="Encryption worker processes, each with its own SDK instance.")
+    parser.add_argument("--concurrency", type=int, default=RECORD_CONCURRENCY,
+                        help=f"Records being encrypted/uploaded at once (default: {RECORD_CONCURRENCY}).")
+    parser.add_argument("--upload-concurrency", type=int, default=UPLOAD_CONCURRENCY,
+                        help=f"Pooled S4 HTTP connections (default: {UPLOAD_CONCURRENCY}).")
+    parser.add_argument("--db-concurrency", type=int, default=DB_CONCURRENCY,
+                        help=f"asyncpg pool size and concurrent COPY batches (default: {DB_CONCURRENCY}).")
+    parser.add_argument("--batch-size", type=int, default=INSERT_BATCH_SIZE,
+                        help=f"Records per COPY + commit (default: {INSERT_BATCH_SIZE}).")
+    parser.add_argument("--queue-depth", type=int, default=PIPELINE_QUEUE_DEPTH,
+                        help=f"Drafts buffered ahead of encryption (default: {PIPELINE_QUEUE_DEPTH}).")
+    parser.add_argument("--blob-threshold", type=int, default=None, metavar="BYTES",
+                        help="Store ciphertext larger than BYTES in S4 and set tdf_uri instead of tdf_blob.")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Suppress per-row insert notifications and publish one summary per committed batch.")
+    parser.add_argument("--manifest-engine", choices=["faker", "pooled"], default="faker",
+                        help="faker: per-record Faker manifests (default); pooled: batched NumPy/value-pool ManifestEngine.")
+    parser.add_argument("--compress", dest="compression", choices=manifest_codec.CODECS, default="none",
+                        help="Compress manifests before upload (flagged in object metadata; readers decompress transparently).")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write the per-stage timing summary as JSON to PATH.")
+    parser.add_argument("--prometheus-textfile", metavar="PATH",
+                        help="Write the per-stage metrics to PATH in Prometheus textfile-collector format.")
+    args = parser.parse_args()
+    if args.shards < 1 or not 0 <= args.shard_index < args.shards:
+        parser.error("--shard-index must be in [0, --shards)")
+    for flag in ("workers", "concurrency", "upload_concurrency", "db_concurrency", "batch_size"):
+        if getattr(args, flag) < 1:
+            parser.error(f"--{flag.replace('_', '-')} must be >= 1")
+    try:
+        manifest_codec.check_codec(args.compression)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        asyncio.run(seed(args))
+    except Exception as e:
+        print(f"[main] error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        METRICS.report(args.metrics_json, args.prometheus_textfile)
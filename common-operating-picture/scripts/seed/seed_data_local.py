@@ -4,9 +4,6 @@ import json
 import random
 import psycopg2
 import argparse
-import requests
-import boto3
-import base64
 import urllib3
 from io import BytesIO
 from faker import Faker
@@ -14,7 +11,10 @@ from datetime import datetime, timedelta
 from psycopg2.extras import execute_batch
 from otdf_python.sdk_builder import SDKBuilder
 from otdf_python.config import NanoTDFConfig, KASInfo
-from botocore.config import Config
+import manifest_codec
+from s4_credentials import CredentialProvider
+from bulk_load import BulkLoadSummary, begin_bulk_load, publish_bulk_load_summary
+from seed_metrics import StageMetrics
 
 # --- Suppress SSL Warnings for local dev ---
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -35,6 +35,7 @@ TOKEN_URL = f"{KEYCLOAK_URL}/realms/{REALM}/protocol/openid-connect/token"
 DB_NAME, DB_USER, DB_PASSWORD = "postgres", "postgres", "changeme"
 DB_HOST, DB_PORT = "localhost", 15432
 NUM_RECORDS = 1
+SEED_BASE_TIME = datetime(2025, 1, 1)
 BATCH_SIZE = 5
 
 # --- S4 / S3 Configs ---
@@ -42,6 +43,10 @@ S4_STS_ENDPOINT = "http://localhost:7070"
 S4_S3_ENDPOINT = "http://localhost:7070" 
 S4_BUCKET = "cop-demo"
 S4_REGION = "us-east-1"
+CREDENTIALS = CredentialProvider(TOKEN_URL, CLIENT_ID, CLIENT_SECRET, KC_USER, KC_PASS, S4_STS_ENDPOINT)
+
+# --- Stage metrics (manifest, encrypt, s4_upload, db_write) ---
+METRICS = StageMetrics("seed_data_local")
 
 # --- Fixed Data for TdfObjects ---
 FIXED_SRC_TYPE = 'vehicles'
@@ -103,58 +108,25 @@ VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
 
 
 def get_auth_token():
-    auth = f"{CLIENT_ID}:{CLIENT_SECRET}"
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded',
-        'Authorization': 'Basic ' + base64.b64encode(auth.encode()).decode()
-    }
-    payload = {
-        'grant_type': 'password',
-        'username': KC_USER,
-        'password': KC_PASS,
-    }
-    response = requests.post(TOKEN_URL, headers=headers, data=payload, verify=False)
-    if response.status_code != 200:
-        print(f"Auth Error: {response.text}")
-        response.raise_for_status()
-    return response.json()['access_token']
+    return CREDENTIALS.token()
 
 
 def get_s4_s3_client():
-    token = get_auth_token()
-    sts_client = boto3.client('sts', endpoint_url=S4_STS_ENDPOINT, verify=False)
-    
-    response = sts_client.assume_role_with_web_identity(
-        RoleArn='arn:aws:iam::xxxx:xxx/xxx',
-        RoleSessionName='WebIdentitySession',
-        WebIdentityToken=token,
-        DurationSeconds=3600 
-    )
-    
-    creds = response['Credentials']
-    return boto3.client(
-        's3',
-        endpoint_url=S4_S3_ENDPOINT,
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds.get('SessionToken'),
-        region_name=S4_REGION,
-        verify=False
-    )
+    return CREDENTIALS.start().s3_client(S4_S3_ENDPOINT, S4_REGION)
 
 
-def upload_to_s4(s3_client, filename, data_dict, attributes: list[str]):
-    payload = json.dumps(data_dict).encode('utf-8')
-    metadata = {}
+def upload_to_s4(s3_client, filename, data_dict, attributes: list[str], compression="none"):
+    payload, metadata = manifest_codec.encode(json.dumps(data_dict).encode('utf-8'), compression)
     for i, attr in enumerate(attributes):
         metadata[f'tdf-data-attribute-{i}'] = attr
     
-    s3_client.put_object(
-        Bucket=S4_BUCKET,
-        Key=filename,
-        Body=payload,
-        Metadata=metadata
-    )
+    with METRICS.time("s4_upload"):
+        s3_client.put_object(
+            Bucket=S4_BUCKET,
+            Key=filename,
+            Body=payload,
+            Metadata=metadata
+        )
     return f"s3://{S4_BUCKET}/{filename}"
 
 
@@ -189,37 +161,52 @@ def encrypt_data(sdk, plaintext: str, attributes: list[str]) -> bytes:
     return output_stream.getvalue()
 
 
-def generate_random_point_wkb():
-    lat = random.uniform(25, 45)
-    lon = random.uniform(-85, -65)
+def generate_random_point_wkb(rng=random):
+    lat = rng.uniform(25, 45)
+    lon = rng.uniform(-85, -65)
     return f'POINT({lon} {lat})'
 
 
-def generate_military_manifest(fake, record_id, classification):
-    """Generates realistic IC/Military manifest data for a tracked asset."""
+def random_uuid(rng=random):
+    """A version 4 UUID drawn from rng, so seeded runs reproduce the same ids."""
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def shard_range(count, shards, shard_index):
+    """Returns the [start, stop) slice of global record indices owned by one shard."""
+    return count * shard_index // shards, count * (shard_index + 1) // shards
+
+
+def generate_military_manifest(fake, record_id, classification, rng=random, now=None):
+    """Generates realistic IC/Military manifest data for a tracked asset.
+
+    Draws come from `rng` and times are relative to `now`, so a seeded rng
+    and a fixed `now` reproduce the same manifest.
+    """
+    now = now or datetime.now()
     
-    platform = random.choice(AIRCRAFT_PLATFORMS)
-    mission_type = random.choice(MISSION_TYPES)
-    mission_start = datetime.now() - timedelta(hours=random.randint(1, 8))
-    mission_end = mission_start + timedelta(hours=random.randint(2, 12))
+    platform = rng.choice(AIRCRAFT_PLATFORMS)
+    mission_type = rng.choice(MISSION_TYPES)
+    mission_start = now - timedelta(hours=rng.randint(1, 8))
+    mission_end = mission_start + timedelta(hours=rng.randint(2, 12))
     
     manifest = {
         "documentControl": {
-            "manifestId": str(uuid.uuid4()),
+            "manifestId": random_uuid(rng),
             "recordId": record_id,
             "version": "2.1",
             "classification": classification.upper(),
-            "caveats": random.sample(SECURITY_CAVEATS, k=random.randint(1, 3)),
-            "declassifyOn": (datetime.now() + timedelta(days=365*25)).strftime("%Y-%m-%d"),
-            "createdAt": datetime.now().isoformat() + "Z",
+            "caveats": rng.sample(SECURITY_CAVEATS, k=rng.randint(1, 3)),
+            "declassifyOn": (now + timedelta(days=365*25)).strftime("%Y-%m-%d"),
+            "createdAt": now.isoformat() + "Z",
             "createdBy": f"{fake.last_name().upper()}, {fake.first_name().upper()[0]}",
-            "originatingAgency": random.choice(["DIA", "NGA", "NSA", "CIA", "NRO", "NASIC"]),
+            "originatingAgency": rng.choice(["DIA", "NGA", "NSA", "CIA", "NRO", "NASIC"]),
         },
         
         "vehicle": {
             "registration": f"{platform['service']}-{fake.numerify('####')}",
             "tailNumber": fake.bothify('##-####').upper(),
-            "operator": f"{random.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {'SQN' if platform['type'] in ['FIGHTER', 'BOMBER'] else 'WG'}",
+            "operator": f"{rng.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {'SQN' if platform['type'] in ['FIGHTER', 'BOMBER'] else 'WG'}",
             "platform": {
                 "designation": platform["designation"],
                 "name": platform["name"],
@@ -232,85 +219,85 @@ def generate_military_manifest(fake, record_id, classification):
         },
         
         "mission": {
-            "missionId": f"MSN-{datetime.now().strftime('%Y%m%d')}-{fake.numerify('####')}",
+            "missionId": f"MSN-{now.strftime('%Y%m%d')}-{fake.numerify('####')}",
             "operationName": f"OP {fake.word().upper()} {fake.word().upper()}",
             "missionType": mission_type,
-            "priority": random.choice(["ROUTINE", "PRIORITY", "IMMEDIATE", "FLASH"]),
-            "commandAuthority": random.choice(COMMAND_ELEMENTS),
-            "taskingOrder": f"ATO-{datetime.now().strftime('%Y%j')}-{fake.numerify('###')}",
-            "missionStatus": random.choice(OPERATIONAL_STATUS),
+            "priority": rng.choice(["ROUTINE", "PRIORITY", "IMMEDIATE", "FLASH"]),
+            "commandAuthority": rng.choice(COMMAND_ELEMENTS),
+            "taskingOrder": f"ATO-{now.strftime('%Y%j')}-{fake.numerify('###')}",
+            "missionStatus": rng.choice(OPERATIONAL_STATUS),
             "timeline": {
                 "scheduled": mission_start.isoformat() + "Z",
-                "takeoff": (mission_start + timedelta(minutes=random.randint(0, 30))).isoformat() + "Z",
-                "onStation": (mission_start + timedelta(hours=random.randint(1, 3))).isoformat() + "Z",
+                "takeoff": (mission_start + timedelta(minutes=rng.randint(0, 30))).isoformat() + "Z",
+                "onStation": (mission_start + timedelta(hours=rng.randint(1, 3))).isoformat() + "Z",
                 "offStation": (mission_end - timedelta(hours=1)).isoformat() + "Z",
                 "expectedRecovery": mission_end.isoformat() + "Z",
             },
             "airspace": {
                 "operatingArea": f"AO-{fake.lexify('???').upper()}-{fake.numerify('##')}",
-                "altitudeBlock": f"FL{random.randint(20, 45)}0-FL{random.randint(46, 60)}0",
-                "restrictedAreas": [f"R-{fake.numerify('####')}" for _ in range(random.randint(0, 3))],
+                "altitudeBlock": f"FL{rng.randint(20, 45)}0-FL{rng.randint(46, 60)}0",
+                "restrictedAreas": [f"R-{fake.numerify('####')}" for _ in range(rng.randint(0, 3))],
             },
         },
         
         "intelligence": {
-            "collectionDiscipline": random.sample(INTEL_SOURCES, k=random.randint(1, 3)),
+            "collectionDiscipline": rng.sample(INTEL_SOURCES, k=rng.randint(1, 3)),
             "targetDeck": [
                 {
                     "targetId": f"TGT-{fake.hexify('######').upper()}",
-                    "targetName": f"{fake.word().upper()} {random.randint(1, 99)}",
-                    "targetType": random.choice(["FACILITY", "VEHICLE", "PERSONNEL", "COMMS", "RADAR"]),
-                    "priority": random.randint(1, 5),
+                    "targetName": f"{fake.word().upper()} {rng.randint(1, 99)}",
+                    "targetType": rng.choice(["FACILITY", "VEHICLE", "PERSONNEL", "COMMS", "RADAR"]),
+                    "priority": rng.randint(1, 5),
                 }
-                for _ in range(random.randint(1, 4))
+                for _ in range(rng.randint(1, 4))
             ],
-            "collectionRequirements": [f"CR-{fake.numerify('####')}" for _ in range(random.randint(1, 3))],
+            "collectionRequirements": [f"CR-{fake.numerify('####')}" for _ in range(rng.randint(1, 3))],
             "reportingInstructions": f"RPTG-{fake.lexify('???').upper()}-{fake.numerify('##')}",
         },
         
         "sensors": {
-            "primarySensor": random.choice(SENSOR_TYPES),
-            "activeSensors": random.sample(SENSOR_TYPES, k=random.randint(1, 4)),
-            "emissionControl": random.choice(EMISSION_CONTROL),
-            "datalinks": random.sample(["LINK-16", "SADL", "CDL", "TTNT", "MADL"], k=random.randint(1, 3)),
+            "primarySensor": rng.choice(SENSOR_TYPES),
+            "activeSensors": rng.sample(SENSOR_TYPES, k=rng.randint(1, 4)),
+            "emissionControl": rng.choice(EMISSION_CONTROL),
+            "datalinks": rng.sample(["LINK-16", "SADL", "CDL", "TTNT", "MADL"], k=rng.randint(1, 3)),
         },
         
         "coordination": {
             "supportingUnits": [
-                f"{random.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {random.choice(['SQN', 'WG', 'GP'])}"
-                for _ in range(random.randint(1, 3))
+                f"{rng.choice(MILITARY_BRANCHES)} {fake.numerify('###')} {rng.choice(['SQN', 'WG', 'GP'])}"
+                for _ in range(rng.randint(1, 3))
             ],
-            "coalitionPartners": random.sample(COALITION_COUNTRIES, k=random.randint(0, 3)),
+            "coalitionPartners": rng.sample(COALITION_COUNTRIES, k=rng.randint(0, 3)),
             "frequencyPlan": {
-                "primary": f"{random.randint(225, 400)}.{random.randint(0, 99):02d} MHz",
-                "secondary": f"{random.randint(225, 400)}.{random.randint(0, 99):02d} MHz",
+                "primary": f"{rng.randint(225, 400)}.{rng.randint(0, 99):02d} MHz",
+                "secondary": f"{rng.randint(225, 400)}.{rng.randint(0, 99):02d} MHz",
                 "guard": "243.00 MHz",
             },
             "checkInPoint": f"CP-{fake.lexify('???').upper()}",
         },
         
         "trackQuality": {
-            "source": random.choice(["ADS-B", "MODE-S", "PRIMARY", "LINK-16", "SATELLITE"]),
-            "reliability": round(random.uniform(0.85, 0.99), 3),
-            "positionAccuracy_m": round(random.uniform(5, 50), 1),
-            "velocityAccuracy_mps": round(random.uniform(0.5, 5), 2),
-            "lastUpdate": datetime.now().isoformat() + "Z",
-            "updateRate_sec": random.choice([1, 2, 5, 10, 30]),
+            "source": rng.choice(["ADS-B", "MODE-S", "PRIMARY", "LINK-16", "SATELLITE"]),
+            "reliability": round(rng.uniform(0.85, 0.99), 3),
+            "positionAccuracy_m": round(rng.uniform(5, 50), 1),
+            "velocityAccuracy_mps": round(rng.uniform(0.5, 5), 2),
+            "lastUpdate": now.isoformat() + "Z",
+            "updateRate_sec": rng.choice([1, 2, 5, 10, 30]),
         },
         
         "processing": {
-            "ingestPipeline": f"v{random.randint(2, 4)}.{random.randint(0, 9)}.{random.randint(0, 99)}",
+            "ingestPipeline": f"v{rng.randint(2, 4)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}",
             "processingNode": f"NODE-{fake.lexify('???').upper()}-{fake.numerify('##')}",
-            "processingTime_ms": round(random.uniform(10, 500), 1),
-            "correlationId": str(uuid.uuid4()),
-            "validated": random.choice([True, True, True, False]),
-            "fusedSources": random.randint(1, 5),
+            "processingTime_ms": round(rng.uniform(10, 500), 1),
+            "correlationId": random_uuid(rng),
+            "validated": rng.choice([True, True, True, False]),
+            "fusedSources": rng.randint(1, 5),
         },
     }
     return manifest
 
 
-def generate_tdf_records(count, sdk):
+def generate_tdf_records(sdk, args):
     records = []
     fake = Faker()
 
@@ -322,13 +309,23 @@ def generate_tdf_records(count, sdk):
         print(f"Failed to initialize S4 client: {e}")
         return []
 
-    print(f"Generating {count} records with IC/Military manifests...")
+    count = args.count
+    start, stop = shard_range(count, args.shards, args.shard_index)
+    print(f"Shard {args.shard_index + 1}/{args.shards}: generating records {start}..{stop - 1} "
+          f"of {count} with IC/Military manifests (seed={args.seed})...")
+
+    for i in range(start, stop):
+        # Seeded runs draw each record from its own RNG keyed on (seed, global index).
+        if args.seed is None:
+            rng, now = random, datetime.now()
+        else:
+            rng, now = random.Random(f"{args.seed}:{i}"), args.base_time
+            fake.seed_instance(rng.getrandbits(64))
 
-    for i in range(count):
         cls_type = CLASSIFICATIONS[i % len(CLASSIFICATIONS)]
         classification_attr = f"https://demo.com/attr/classification/value/{cls_type}"
-        random_id = str(uuid.uuid4())
-        platform = random.choice(AIRCRAFT_PLATFORMS)
+        random_id = random_uuid(rng)
+        platform = rng.choice(AIRCRAFT_PLATFORMS)
         
         vehicle_data = {
             "vehicleName": f"{platform['designation']} {platform['name']}",
@@ -337,7 +334,8 @@ def generate_tdf_records(count, sdk):
             "aircraft_type": f"{platform['designation']} ({platform['type']})"
         }
 
-        tdf_blob = encrypt_data(sdk, json.dumps(vehicle_data), [classification_attr])
+        with METRICS.time("encrypt"):
+            tdf_blob = encrypt_data(sdk, json.dumps(vehicle_data), [classification_attr])
 
         search_jsonb = json.dumps({
             "attrRelTo": [],
@@ -345,7 +343,8 @@ def generate_tdf_records(count, sdk):
             "attrClassification": [classification_attr]
         })
 
-        manifest_data = generate_military_manifest(fake, random_id, cls_type)
+        with METRICS.time("manifest"):
+            manifest_data = generate_military_manifest(fake, random_id, cls_type, rng, now)
         manifest_key = f"manifests/{random_id}.json.tdf"
         
         manifest_attributes = [
@@ -354,7 +353,7 @@ def generate_tdf_records(count, sdk):
         ]
         
         try:
-            manifest_uri = upload_to_s4(s3_client, manifest_key, manifest_data, manifest_attributes)
+            manifest_uri = upload_to_s4(s3_client, manifest_key, manifest_data, manifest_attributes, args.compression)
             print(f"  [{i+1}/{count}] {platform['designation']} | {cls_type.upper()} + NTK/BBB")
         except Exception as e:
             print(f"  [{i+1}/{count}] Manifest upload FAILED: {e}")
@@ -362,15 +361,15 @@ def generate_tdf_records(count, sdk):
 
         metadata_jsonb = json.dumps({
             "callsign": f"{fake.lexify('??').upper()}{fake.numerify('##')}",
-            "speed": f"{random.randint(200, 600)} kts",
-            "altitude": f"FL{random.randint(150, 450)}",
-            "heading": str(random.randint(0, 359)),
+            "speed": f"{rng.randint(200, 600)} kts",
+            "altitude": f"FL{rng.randint(150, 450)}",
+            "heading": str(rng.randint(0, 359)),
             "manifest": manifest_uri
         })
 
-        random_ts = datetime.now()
-        random_geo = generate_random_point_wkb()
-        random_created_at = random_ts + timedelta(seconds=random.uniform(0.01, 0.1))
+        random_ts = now
+        random_geo = generate_random_point_wkb(rng)
+        random_created_at = random_ts + timedelta(seconds=rng.uniform(0.01, 0.1))
 
         record = (
             random_id,
@@ -389,15 +388,15 @@ def generate_tdf_records(count, sdk):
     return records
 
 
-def insert_seed_data(sdk, should_delete: bool):
+def insert_seed_data(sdk, args):
     conn = None
-    records = generate_tdf_records(NUM_RECORDS, sdk)
+    records = generate_tdf_records(sdk, args)
 
     if not records:
         print("No records generated. Exiting.")
         return
 
-    print(f"Attempting to insert {NUM_RECORDS} records in batches of {BATCH_SIZE}...")
+    print(f"Attempting to insert {len(records)} records in batches of {BATCH_SIZE}...")
 
     try:
         conn = psycopg2.connect(
@@ -409,14 +408,24 @@ def insert_seed_data(sdk, should_delete: bool):
         )
         cursor = conn.cursor()
 
-        if should_delete:
+        if args.delete:
             print(f"Flag --delete detected. Cleaning up records for src_type: {FIXED_SRC_TYPE}")
             cursor.execute(DELETE_SQL, (FIXED_SRC_TYPE,))
             print(f"Successfully deleted {cursor.rowcount} records.")
 
-        execute_batch(cursor, INSERT_SQL, records, page_size=BATCH_SIZE)
-        conn.commit()
-        print(f"Successfully inserted {NUM_RECORDS} records into the tdf_objects table.")
+        summary = None
+        if args.bulk_load:
+            print("Bulk-load mode: per-row insert notifications suppressed.")
+            begin_bulk_load(cursor)
+            summary = BulkLoadSummary()
+            records = list(summary.track(records))
+
+        with METRICS.time("db_write", items=len(records)):
+            execute_batch(cursor, INSERT_SQL, records, page_size=BATCH_SIZE)
+            if summary is not None:
+                publish_bulk_load_summary(cursor, summary)
+            conn.commit()
+        print(f"Successfully inserted {len(records)} records into the tdf_objects table.")
 
     except psycopg2.OperationalError as e:
         print(f"CONNECTION ERROR: Could not connect to the database.")
@@ -435,14 +444,37 @@ def insert_seed_data(sdk, should_delete: bool):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Seed script for TDF objects with IC/Military manifests.")
-    parser.add_argument("--delete", action="store_true", help="Delete existing records before inserting.")
+    parser.add_argument("--delete", action="store_true",
+                        help="Delete existing records before inserting (when sharding, run it once before fanning out).")
+    parser.add_argument("--count", type=int, default=NUM_RECORDS,
+                        help=f"Total records in the dataset across all shards (default: {NUM_RECORDS}).")
+    parser.add_argument("--shards", type=int, default=1, help="Number of shards the dataset is split into (default: 1).")
+    parser.add_argument("--shard-index", type=int, default=0, help="Zero-based shard this process seeds (default: 0).")
+    parser.add_argument("--seed", help="Seed for reproducible plaintext; unseeded runs draw fresh data.")
+    parser.add_argument("--base-time", type=datetime.fromisoformat, default=SEED_BASE_TIME,
+                        help=f"Reference time for seeded records (default: {SEED_BASE_TIME.isoformat()}).")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Suppress per-row insert notifications and publish one summary on tdf_objects_bulk_loaded at commit.")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write the per-stage timing summary as JSON to PATH.")
+    parser.add_argument("--prometheus-textfile", metavar="PATH",
+                        help="Write the per-stage metrics to PATH in Prometheus textfile-collector format.")
+    parser.add_argument("--compress", dest="compression", choices=manifest_codec.CODECS, default="none",
+                        help="Compress manifests before upload (flagged in object metadata; readers decompress transparently).")
     args = parser.parse_args()
+    if args.shards < 1 or not 0 <= args.shard_index < args.shards:
+        parser.error("--shard-index must be in [0, --shards)")
+    try:
+        manifest_codec.check_codec(args.compression)
+    except ValueError as e:
+        parser.error(str(e))
 
     try:
         print("Initializing TDF SDK...")
         sdk_instance = get_sdk_instance(PLATFORM_ENDPOINT, CLIENT_ID, CLIENT_SECRET, CA_CERT_PATH, ISSUER_ENDPOINT)
-        insert_seed_data(sdk_instance, args.delete)
+        insert_seed_data(sdk_instance, args)
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        METRICS.report(args.metrics_json, args.prometheus_textfile)
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Per-stage timing for the seed scripts.
+
+StageMetrics collects one latency sample per operation (an encrypt call, an
+S4 PUT, a manifest batch, a DB commit...) together with the number of items
+that operation covered, and summarises each stage as counts, throughput and
+p50/p95/p99 latency. Operation counts, items and busy time cover the whole
+run; latency quantiles and max cover the most recent max_samples operations of
+each stage, so long-running simulators keep a fixed amount of memory. Plain
+event counters that have no latency of their own (e.g. writes saved) are
+kept separately. The summary can be printed, written
+as JSON, or written as a Prometheus textfile for the node_exporter textfile
+collector.
+"""
+import os
+import json
+import math
+import time
+import threading
+from array import array
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_MAX_SAMPLES = 65536
+
+
+def quantile(ordered, q):
+    """Nearest-rank quantile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(q * len(ordered)))) - 1]
+
+
+class StageMetrics:
+    """Thread-safe latency samples and item counters keyed by stage name."""
+
+    def __init__(self, job, max_samples=DEFAULT_MAX_SAMPLES):
+        self.job = job
+        self.max_samples = max_samples
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def _stage(self, name):
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = {"samples": array("d"), "operations": 0, "busy": 0.0,
+                                          "items": 0, "errors": 0}
+        return stage
+
+    def observe(self, name, seconds, items=1, error=False):
+        with self._lock:
+            stage = self._stage(name)
+            samples = stage["samples"]
+            # Ring buffer: once full, overwrite the oldest sample.
+            if len(samples) < self.max_samples:
+                samples.append(seconds)
+            else:
+                samples[stage["operations"] % self.max_samples] = seconds
+            stage["operations"] += 1
+            stage["busy"] += seconds
+            stage["items"] += items
+            if error:
+                stage["errors"] += 1
+
+    def count(self, name, n=1):
+        """Adds n to a plain counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    @contextmanager
+    def time(self, name, items=1):
+        """Times the enclosed block as one operation; an exception counts it as an error."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(name, time.perf_counter() - start, items, error=True)
+            raise
+        self.observe(name, time.perf_counter() - start, items)
+
+    def summary(self):
+        wall = time.perf_counter() - self._start
+        # Only copy under the lock; sorting happens after it is released so
+        # observe() calls from other threads are never held up by a summary.
+        with self._lock:
+            snapshot = {name: (array("d", s["samples"]), s["operations"], s["busy"], s["items"], s["errors"])
+                        for name, s in self._stages.items()}
+            counters = dict(self._counters)
+        stages = {}
+        for name, (samples, operations, busy, items, errors) in snapshot.items():
+            ordered = sorted(samples)
+            stages[name] = {
+                "operations": operations,
+                "items": items,
+                "errors": errors,
+                "busy_seconds": round(busy, 6),
+                "items_per_second": round(items / wall, 3) if wall > 0 else 0.0,
+                "items_per_busy_second": round(items / busy, 3) if busy > 0 else 0.0,
+                "latency_ms": {
+                    **{f"p{int(q * 100)}": round(quantile(ordered, q) * 1e3, 3) for q in QUANTILES},
+                    "max": round(ordered[-1] * 1e3, 3) if ordered else 0.0,
+                },
+            }
+        return {"job": self.job, "started": self.started, "wall_seconds": round(wall, 6), "stages": stages,
+                "counters": counters}
+
+    def report(self, json_path=None, prometheus_path=None):
+        """Prints the per-stage table plus a one-line JSON summary and writes the requested files."""
+        summary = self.summary()
+        print(f"[metrics] {self.job}: {summary['wall_seconds']:.2f}s wall")
+        for name, s in summary["stages"].items():
+            lat = s["latency_ms"]
+            print(f"[metrics]   {name:<14} {s['items']:>9} items {s['operations']:>9} ops {s['errors']:>5} err "
+                  f"{s['items_per_second']:>10.1f}/s  p50 {lat['p50']:.2f}ms  p95 {lat['p95']:.2f}ms  "
+                  f"p99 {lat['p99']:.2f}ms  max {lat['max']:.2f}ms")
+        for name, value in summary["counters"].items():
+            print(f"[metrics]   {name:<14} {value:>9}")
+        print(f"[metrics] {json.dumps(summary)}")
+        self.write(json_path, prometheus_path, summary)
+        if json_path:
+            print(f"[metrics] wrote JSON summary to {json_path}")
+        if prometheus_path:
+            print(f"[metrics] wrote Prometheus textfile to {prometheus_path}")
+        return summary
+
+    def write(self, json_path=None, prometheus_path=None, summary=None):
+        """Writes the requested files without printing; long-running jobs call this periodically."""
+        summary = summary or self.summary()
+        if json_path:
+            _write_atomic(json_path, json.dumps(summary, indent=2) + "\n")
+        if prometheus_path:
+            _write_atomic(prometheus_path, self.prometheus(summary))
+        return summary
+
+    def prometheus(self, summary=None):
+        """Renders the summary in the Prometheus text exposition format."""
+        summary = summary or self.summary()
+        job = summary["job"]
+        lines = [
+            "# HELP seed_stage_duration_seconds Latency of one operation of a seeding stage.",
+            "# TYPE seed_stage_duration_seconds summary",
+        ]
+        for name, s in summary["stages"].items():
+            labels = f'job="{job}",stage="{name}"'
+            for q in QUANTILES:
+                lines.append(f'seed_stage_duration_seconds{{{labels},quantile="{q}"}} '
+                             f'{round(s["latency_ms"][f"p{int(q * 100)}"] / 1e3, 9)}')
+            lines.append(f"seed_stage_duration_seconds_sum{{{labels}}} {s['busy_seconds']}")
+            lines.append(f"seed_stage_duration_seconds_count{{{labels}}} {s['operations']}")
+        for metric, key, help_text in (
+            ("seed_stage_items_total", "items", "Items processed by a seeding stage."),
+            ("seed_stage_errors_total", "errors", "Failed operations of a seeding stage."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, s in summary["stages"].items():
+                lines.append(f'{metric}{{job="{job}",stage="{name}"}} {s[key]}')
+        if summary["counters"]:
+            lines.append("# HELP seed_events_total Plain event counters of a seeding job.")
+            lines.append("# TYPE seed_events_total counter")
+            for name, value in summary["counters"].items():
+                lines.append(f'seed_events_total{{job="{job}",counter="{name}"}} {value}')
+        lines.append("# HELP seed_run_wall_seconds Wall-clock duration of the seeding run.")
+        lines.append("# TYPE seed_run_wall_seconds gauge")
+        lines.append(f'seed_run_wall_seconds{{job="{job}"}} {summary["wall_seconds"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    # Write-then-rename so a scraper never sees a half-written file.
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -2,9 +2,14 @@ import asyncio
 import time
 import json
 import os
-import psycopg2
 import httpx
+import argparse
+import numpy as np
 from shapely.geometry import Point
+from sim_db import SimDatabase
+from sim_loop import run_ticks
+from dead_reckoning import DeadReckoningFilter, DEFAULT_MAX_STALENESS_SECONDS
+from seed_metrics import StageMetrics
 
 # --- Configs ---
 DB_NAME = "postgres"
@@ -18,6 +23,23 @@ TABLE_NAME = "tdf_objects"
 NUM_ENTITIES = 5
 UPDATE_INTERVAL_SECONDS = 5  # Fast updates for authenticated users
 
+# --- Bulk geo + metadata update, prepared once per pooled connection ---
+UPDATE_FLIGHTS_STATEMENT = "sim_update_flights"
+UPDATE_FLIGHTS_SQL = f"""
+UPDATE {TABLE_NAME} AS t
+SET
+    geo = ST_SetSRID(ST_GeomFromWKB(src.wkb_geo), 4326),
+    metadata = t.metadata || src.metadata
+FROM
+    unnest($1, $2, $3) AS src(wkb_geo, entity_uuid, metadata)
+WHERE
+    t.id = src.entity_uuid
+"""
+STATEMENTS = {UPDATE_FLIGHTS_STATEMENT: (UPDATE_FLIGHTS_SQL, ["bytea[]", "uuid[]", "jsonb[]"])}
+
+# --- Per-tick metrics (db_write, tick, tick_jitter, loop_lag, dr_filter; writes_saved counter) ---
+METRICS = StageMetrics("sim_data")
+
 # --- Credentials ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CREDS_FILE = os.path.join(BASE_DIR, "credentials.json")
@@ -42,6 +64,10 @@ BOUNDING_BOX_PARAMS = {
 # --- Track UUID:ICAO24 Associations ---
 UUID_TO_FLIGHT = {}
 
+# --- Dead-reckoning write suppression (None: write every flight every tick) ---
+DEAD_RECKONING = None
+UUID_TO_SLOT = {}
+
 # --- Load Credentials ---
 if os.path.exists(CREDS_FILE):
     try:
@@ -64,19 +90,14 @@ else:
     exit(1)
 
 # --- Helper Functions ---
-def get_db_uuids(conn_params, num_entities):
-    conn = None
+def get_db_uuids(db, num_entities):
     uuids = []
     try:
-        conn = psycopg2.connect(**conn_params)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT id FROM {TABLE_NAME} WHERE src_type = 'vehicles' LIMIT %s;", (num_entities,))
-        uuids = [row[0] for row in cursor.fetchall()]
+        rows = db.query(f"SELECT id FROM {TABLE_NAME} WHERE src_type = 'vehicles' LIMIT %s;", (num_entities,))
+        uuids = [row[0] for row in rows]
         print(f"Found {len(uuids)} UUIDs for tracking.")
     except Exception as e:
         print(f"Database error: {e}")
-    finally:
-        if conn: conn.close()
     return uuids
 
 def lat_lon_to_wkb(latitude, longitude):
@@ -191,7 +212,28 @@ async def initialize_flight_associations(client, uuids):
 
     print(f"Successfully associated {len(UUID_TO_FLIGHT)} UUIDs with ICAO24 addresses.")
 
-async def update_flight_data(client, conn_params):
+def init_dead_reckoning(threshold_m, max_staleness_s):
+    global DEAD_RECKONING
+    for slot, uuid_obj in enumerate(UUID_TO_FLIGHT):
+        UUID_TO_SLOT[uuid_obj] = slot
+    DEAD_RECKONING = DeadReckoningFilter(len(UUID_TO_SLOT), threshold_m, max_staleness_s)
+    print(f"Dead reckoning on: {threshold_m:g} m threshold, {max_staleness_s:g}s max staleness.")
+
+def suppress_unmoved(updates):
+    """Drops updates whose position is still within the dead-reckoning threshold; logs the writes saved."""
+    with METRICS.time("dr_filter", items=len(updates)):
+        write = DEAD_RECKONING.select(time.monotonic(),
+                                      [item[3] for item in updates], [item[4] for item in updates],
+                                      [np.nan if item[5] is None else item[5] for item in updates],
+                                      [np.nan if item[6] is None else item[6] for item in updates],
+                                      [UUID_TO_SLOT[item[1]] for item in updates])
+        kept = [item for item, keep in zip(updates, write.tolist()) if keep]
+    saved = len(updates) - len(kept)
+    METRICS.count("writes_saved", saved)
+    print(f"[{time.strftime('%H:%M:%S')}] Dead reckoning: writing {len(kept)} records, {saved} writes saved.")
+    return kept
+
+async def update_flight_data(client, db):
     if not UUID_TO_FLIGHT:
         return
 
@@ -236,44 +278,27 @@ async def update_flight_data(client, conn_params):
                     "heading": f"{round(heading)}" if heading is not None else "N/A"
                 })
 
-                updates.append((geos_wkb, uuid_obj, metadata))
+                updates.append((geos_wkb, uuid_obj, metadata, lat, lng, velocity, heading))
 
     if not updates:
         print(f"No updates found for our {len(tracked_ids)} tracked planes.")
         return
 
-    conn = None
-    try:
-        conn = psycopg2.connect(**conn_params)
-        cursor = conn.cursor()
-
-        # Update geo and MERGE new metadata into metadata JSONB
-        update_query = f"""
-        UPDATE {TABLE_NAME} AS t
-        SET
-            geo = ST_SetSRID(ST_GeomFromWKB(src.wkb_geos), 4326),
-            metadata = t.metadata || src.metadata::jsonb
-        FROM
-            (SELECT unnest(%s) as wkb_geos, unnest(%s) as entity_uuid, unnest(%s) as metadata) AS src
-        WHERE
-            t.id = src.entity_uuid::uuid;
-        """
-
-        wkb_list = [item[0] for item in updates]
-        uuid_list = [item[1] for item in updates]
-        meta_list = [item[2] for item in updates]
-
-        cursor.execute(update_query, (wkb_list, uuid_list, meta_list))
-        conn.commit()
-        # print(f"Updated {cursor.rowcount} records.")
+    if DEAD_RECKONING is not None:
+        updates = suppress_unmoved(updates)
+        if not updates:
+            return
 
-    except Exception as e:
-        print(f"Database update failed: {e}")
-        if conn: conn.rollback()
-    finally:
-        if conn: conn.close()
+    # Update geo and MERGE new metadata into metadata JSONB (write-behind:
+    # the next OpenSky fetch runs while this tick is written)
+    wkb_list = [item[0] for item in updates]
+    uuid_list = [item[1] for item in updates]
+    meta_list = [item[2] for item in updates]
+
+    await db.execute_behind(UPDATE_FLIGHTS_STATEMENT, (wkb_list, uuid_list, meta_list), "records")
 
-async def main():
+async def main(metrics_json=None, prometheus_textfile=None,
+               dr_threshold=None, dr_max_staleness=DEFAULT_MAX_STALENESS_SECONDS):
     print(f"Starting Live Data Updater (Optimized Token Usage)...")
 
     conn_params = {
@@ -284,30 +309,51 @@ async def main():
         "port": DB_PORT
     }
 
+    # One long-lived session for the whole run; reconnects on its own if the DB drops.
+    db = SimDatabase(conn_params, STATEMENTS, metrics=METRICS)
+
     async with httpx.AsyncClient() as client:
-        uuids_to_track = get_db_uuids(conn_params, NUM_ENTITIES)
+        uuids_to_track = await db.run(get_db_uuids, db, NUM_ENTITIES)
 
         await initialize_flight_associations(client, uuids_to_track)
 
         if not UUID_TO_FLIGHT:
             print("Initial association failed. Cannot start update loop.")
+            db.close()
             return
 
+        if dr_threshold is not None:
+            init_dead_reckoning(dr_threshold, dr_max_staleness)
+
         print("\n--- Starting Live Update Loop ---")
         try:
-            while True:
-                start_time = time.time()
-                await update_flight_data(client, conn_params)
-
-                elapsed = time.time() - start_time
-                wait_time = max(0, UPDATE_INTERVAL_SECONDS - elapsed)
-
-                await asyncio.sleep(wait_time)
+            await run_ticks(lambda: update_flight_data(client, db), UPDATE_INTERVAL_SECONDS,
+                            METRICS, metrics_json, prometheus_textfile)
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             print("\nStopped.")
         except Exception as e:
             print(f"\nFatal error: {e}")
+        finally:
+            await db.flush()
+            db.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Move vehicle rows along live OpenSky flights.")
+    parser.add_argument("--dr-threshold", type=float, metavar="METRES",
+                        help="Dead reckoning: only write flights that drifted more than METRES from their "
+                             "extrapolated last-written position (default: write every flight every tick).")
+    parser.add_argument("--dr-max-staleness", type=float, default=DEFAULT_MAX_STALENESS_SECONDS, metavar="SECONDS",
+                        help=f"With --dr-threshold, rewrite a flight at least every SECONDS (default: {DEFAULT_MAX_STALENESS_SECONDS:g}).")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="Keep a JSON summary of DB latency, tick jitter and loop lag at PATH (rewritten every 15s).")
+    parser.add_argument("--prometheus-textfile", metavar="PATH",
+                        help="Keep the same metrics at PATH in Prometheus textfile-collector format.")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.metrics_json, args.prometheus_textfile, args.dr_threshold, args.dr_max_staleness))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        METRICS.report(args.metrics_json, args.prometheus_textfile)
\ No newline at end of file
@@ -2,9 +2,13 @@ import asyncio
 import os
 import time
 import uuid
-import psycopg2
 import random
-from shapely.geometry import Point
+import argparse
+import numpy as np
+from sim_db import SimDatabase
+from sim_loop import run_ticks
+from dead_reckoning import DeadReckoningFilter, DEFAULT_MAX_STALENESS_SECONDS
+from seed_metrics import StageMetrics
 
 # --- Configs ---
 DB_NAME = "postgres"
@@ -18,7 +22,7 @@ TABLE_NAME = "tdf_objects"
 NUM_ENTITIES = 400
 UPDATE_INTERVAL_SECONDS = 1  # How often to push updates to the DB
 
-# Bounding box for movement simulation
+# Bounding box the route waypoints are drawn from
 BOUNDING_BOX = {
     'lamin': -55.0,
     'lomin': -160.0,
@@ -26,96 +30,322 @@ BOUNDING_BOX = {
     'lomax': 160.0
 }
 
+# --- Motion model ---
+EARTH_RADIUS_M = 6_371_000.0
+TIME_SCALE = 20.0  # Simulated seconds per wall-clock second, so tracks visibly move on a world map
+ROUTE_WAYPOINTS = 4  # Waypoints per route; routes loop back to the first one
+ARRIVAL_RADIUS_M = 20_000.0  # A waypoint counts as reached inside this radius
+CRUISE_ALTITUDE_M = (3_000.0, 12_000.0)  # Range of per-waypoint target altitudes
+CRUISE_SPEED_MS = (180.0, 260.0)  # Range of per-route ground speeds at the top of the altitude range
+MAX_TURN_RATE_DEG = 3.0  # Standard rate turn, degrees per second
+MAX_CLIMB_RATE_MS = 12.0
+MAX_ACCELERATION_MS2 = 1.5
+STEP_BLOCK = 16384  # Flights advanced per block, so each block's temporaries stay in cache
+
+# --- Bulk geo + metadata update, prepared once per pooled connection ---
+# Merges the same speed/altitude/heading fields as the OpenSky updater in sim_data.py.
+# The JSON is built server-side from int arrays: formatting tens of thousands of
+# JSON strings in Python each tick costs more than the rest of the tick.
+UPDATE_POSITIONS_STATEMENT = "sim_update_positions"
+UPDATE_POSITIONS_SQL = f"""
+UPDATE {TABLE_NAME} AS t
+SET
+    geo = ST_SetSRID(ST_GeomFromWKB(src.wkb_geo), 4326),
+    metadata = t.metadata || jsonb_build_object(
+        'speed', src.speed || ' km/h',
+        'altitude', src.altitude || ' m',
+        'heading', src.heading::text
+    )
+FROM
+    unnest($1, $2, $3, $4, $5) AS src(wkb_geo, entity_uuid, speed, altitude, heading)
+WHERE
+    t.id = src.entity_uuid
+"""
+STATEMENTS = {UPDATE_POSITIONS_STATEMENT: (UPDATE_POSITIONS_SQL, ["bytea[]", "uuid[]", "int[]", "int[]", "int[]"])}
+
+# --- Per-tick metrics (db_write, tick, tick_jitter, loop_lag, dr_filter; writes_saved counter) ---
+METRICS = StageMetrics("sim_data_fake_opensky")
+
+# Little-endian 2D WKB point: byte order, geometry type (1 = Point), x (lon), y (lat).
+WKB_POINT = np.dtype([("byte_order", "u1"), ("geometry_type", "<u4"), ("x", "<f8"), ("y", "<f8")])
+WKB_POINT_BYTES = np.dtype((np.void, WKB_POINT.itemsize))
+
 # --- State Management ---
-# This dictionary tracks the current lat/lon/heading for each flight
-FLIGHT_SIMULATION_DATA = {}
+# FlightSimulation holding the route, position, heading, speed and altitude of every flight, created on the first tick
+FLIGHT_SIMULATION_DATA = None
+# DeadReckoningFilter deciding which flights are written each tick (None: write every flight)
+DEAD_RECKONING = None
+
+def _approach(current, target, max_change):
+    """Moves current towards target by at most max_change."""
+    return current + np.clip(target - current, -max_change, max_change)
+
+def _wrap_pi(angle):
+    """Wraps radians to [-pi, pi]; cheaper than a float modulo on large arrays."""
+    return angle - 2 * np.pi * np.rint(angle / (2 * np.pi))
+
+class FlightSimulation:
+    """Simulation state as contiguous NumPy arrays, one slot per entity id.
+
+    Every flight loops over a route of ROUTE_WAYPOINTS random waypoints. Each
+    tick it turns towards the next waypoint at a limited turn rate, climbs or
+    descends towards that waypoint's altitude, speeds up or slows down towards
+    its speed, and then advances along the great circle of its heading.
+
+    np.sin/np.cos are the dominant per-element cost at this size, so besides
+    the angles the simulation carries the sine and cosine of every flight's
+    latitude, longitude and heading, and updates them with angle-addition
+    identities: a tick takes three arctan2, one arcsin and no sin/cos calls.
+    The next waypoint (its trig, altitude and speed) is cached per flight and
+    only reloaded for the flights that reached a waypoint.
+    """
+
+    def __init__(self, entity_ids, rng=None, time_scale=TIME_SCALE):
+        rng = rng or np.random.default_rng()
+        count = len(entity_ids)
+        self.entity_ids = [str(entity_id) for entity_id in entity_ids]
+        self._entity_ids = np.array(self.entity_ids, dtype=object)
+        self.time_scale = time_scale
+        self.clock = 0.0  # Wall-clock seconds simulated so far
+        self._rows = np.arange(count)
+
+        # Routes: (count, ROUTE_WAYPOINTS) waypoints, each with a target altitude and speed.
+        shape = (count, ROUTE_WAYPOINTS)
+        route_phi = np.radians(rng.uniform(BOUNDING_BOX['lamin'], BOUNDING_BOX['lamax'], shape))
+        route_lambda = np.radians(rng.uniform(BOUNDING_BOX['lomin'], BOUNDING_BOX['lomax'], shape))
+        self.route_sin_phi, self.route_cos_phi = np.sin(route_phi), np.cos(route_phi)
+        self.route_sin_lambda, self.route_cos_lambda = np.sin(route_lambda), np.cos(route_lambda)
+        self.route_altitude = rng.uniform(*CRUISE_ALTITUDE_M, shape)
+        # Altitude profile: slower low down, full cruise speed at the top of the range.
+        cruise_speed = rng.uniform(*CRUISE_SPEED_MS, (count, 1))
+        self.route_speed = cruise_speed * (0.55 + 0.45 * self.route_altitude / CRUISE_ALTITUDE_M[1])
+        self.waypoint = np.ones(count, dtype=np.intp)
+        (self.target_sin_phi, self.target_cos_phi, self.target_sin_lambda, self.target_cos_lambda,
+         self.target_altitude, self.target_speed) = (np.empty(count) for _ in range(6))
+        self._load_targets(self._rows)
+
+        # Start on the first waypoint, part-way through the climb, pointing at the second.
+        self.phi = route_phi[:, 0].copy()
+        self.lam = route_lambda[:, 0].copy()
+        self._sin_phi, self._cos_phi = self.route_sin_phi[:, 0].copy(), self.route_cos_phi[:, 0].copy()
+        self._sin_lam, self._cos_lam = self.route_sin_lambda[:, 0].copy(), self.route_cos_lambda[:, 0].copy()
+        self.altitude = rng.uniform(0.0, 1.0, count) * self.target_altitude
+        self.speed = self.route_speed[:, 0].copy()
+        everyone = slice(None)
+        self.heading = np.arctan2(*self._bearing_to_waypoint(everyone, *self._waypoint_delta_lambda(everyone)))
+        self._sin_heading, self._cos_heading = np.sin(self.heading), np.cos(self.heading)
+
+        self._wkb = np.empty(count, WKB_POINT)
+        self._wkb["byte_order"] = 1
+        self._wkb["geometry_type"] = 1
+
+    def _load_targets(self, rows):
+        """Caches the next waypoint of the given flights from the (count, ROUTE_WAYPOINTS) route arrays."""
+        targets = rows * ROUTE_WAYPOINTS + self.waypoint[rows]
+        self.target_sin_phi[rows] = self.route_sin_phi.take(targets)
+        self.target_cos_phi[rows] = self.route_cos_phi.take(targets)
+        self.target_sin_lambda[rows] = self.route_sin_lambda.take(targets)
+        self.target_cos_lambda[rows] = self.route_cos_lambda.take(targets)
+        self.target_altitude[rows] = self.route_altitude.take(targets)
+        self.target_speed[rows] = self.route_speed.take(targets)
+
+    def _waypoint_delta_lambda(self, rows):
+        """Sine and cosine of the longitude difference from each flight in rows to its next waypoint."""
+        sin_lam, cos_lam = self._sin_lam[rows], self._cos_lam[rows]
+        target_sin, target_cos = self.target_sin_lambda[rows], self.target_cos_lambda[rows]
+        return target_sin * cos_lam - target_cos * sin_lam, target_cos * cos_lam + target_sin * sin_lam
+
+    def _bearing_to_waypoint(self, rows, sin_d, cos_d):
+        """(y, x) of the initial great-circle bearing to each flight's next waypoint, bearing = arctan2(y, x)."""
+        target_cos_phi = self.target_cos_phi[rows]
+        y = sin_d * target_cos_phi
+        x = self._cos_phi[rows] * self.target_sin_phi[rows] - self._sin_phi[rows] * target_cos_phi * cos_d
+        return y, x
+
+    def step(self, seconds=UPDATE_INTERVAL_SECONDS):
+        """Advances every flight by seconds of wall-clock time (seconds * time_scale simulated)."""
+        self.clock += seconds
+        dt = seconds * self.time_scale
+        # Cache-sized blocks: a whole-array temporary per operation costs more in
+        # memory traffic than the arithmetic itself at 100k flights.
+        arrived = [self._step_rows(slice(start, start + STEP_BLOCK), dt)
+                   for start in range(0, len(self.entity_ids), STEP_BLOCK)]
+        arrived = np.concatenate(arrived) if arrived else self._rows
+        if arrived.size:
+            self.waypoint[arrived] = (self.waypoint[arrived] + 1) % ROUTE_WAYPOINTS
+            self._load_targets(arrived)
+
+    def _step_rows(self, rows, dt):
+        """Advances the flights in the slice rows by dt simulated seconds; returns the indices that reached a waypoint."""
+        sin_phi, cos_phi = self._sin_phi[rows], self._cos_phi[rows]
+        heading = self.heading[rows]
+
+        # Turn towards the next waypoint. Flights within the turn limit take the
+        # desired bearing, whose sine and cosine are y/r and x/r; the rest turn
+        # by the limit, a rotation by a constant angle.
+        y, x = self._bearing_to_waypoint(rows, *self._waypoint_delta_lambda(rows))
+        max_turn = np.radians(MAX_TURN_RATE_DEG) * dt
+        turn = _wrap_pi(np.arctan2(y, x) - heading)
+        r = np.sqrt(x * x + y * y)
+        # A flight sitting on its waypoint has no bearing to it; it keeps its heading.
+        free = (np.abs(turn) <= max_turn) & (r > 1e-12)
+        self.heading[rows] = _wrap_pi(heading + np.where(free, turn, np.clip(turn, -max_turn, max_turn)))
+        if max_turn < np.pi:
+            sin_turn = np.where(turn > 0, np.sin(max_turn), -np.sin(max_turn))
+            cos_turn = np.cos(max_turn)
+            r[~free] = 1.0
+            sin_heading, cos_heading = self._sin_heading[rows], self._cos_heading[rows]
+            sin_heading, cos_heading = (np.where(free, y / r, sin_heading * cos_turn + cos_heading * sin_turn),
+                                        np.where(free, x / r, cos_heading * cos_turn - sin_heading * sin_turn))
+        else:
+            sin_heading, cos_heading = np.sin(self.heading[rows]), np.cos(self.heading[rows])
+        self._sin_heading[rows], self._cos_heading[rows] = sin_heading, cos_heading
+
+        # Accelerate and climb towards the next waypoint.
+        speed = self.speed[rows] = _approach(self.speed[rows], self.target_speed[rows], MAX_ACCELERATION_MS2 * dt)
+        self.altitude[rows] = _approach(self.altitude[rows], self.target_altitude[rows], MAX_CLIMB_RATE_MS * dt)
+
+        # Great-circle destination after speed * dt metres on the current heading.
+        delta = speed * (dt / EARTH_RADIUS_M)
+        if delta.max() < 0.1:
+            # Series to delta^5: below 0.1 rad (637 km) the error is under 1e-11.
+            delta2 = delta * delta
+            sin_delta = delta * (1.0 - delta2 / 6.0 * (1.0 - delta2 / 20.0))
+            cos_delta = 1.0 - delta2 / 2.0 * (1.0 - delta2 / 12.0)
+        else:
+            sin_delta, cos_delta = np.sin(delta), np.cos(delta)
+        cos_phi_sin_delta = cos_phi * sin_delta
+        sin_phi2 = np.clip(sin_phi * cos_delta + cos_phi_sin_delta * cos_heading, -1.0, 1.0)
+        # Longitude change: its sine and cosine rotate the carried (sin, cos) of the longitude.
+        a = sin_heading * cos_phi_sin_delta
+        b = cos_delta - sin_phi * sin_phi2
+        # sin_phi and cos_phi are views of these rows, so only overwrite them now.
+        self.phi[rows] = np.arcsin(sin_phi2)
+        self._sin_phi[rows], self._cos_phi[rows] = sin_phi2, np.sqrt(1.0 - sin_phi2 * sin_phi2)
+        self.lam[rows] = _wrap_pi(self.lam[rows] + np.arctan2(a, b))
+        norm = np.sqrt(a * a + b * b)
+        a /= norm
+        b /= norm
+        sin_lam, cos_lam = self._sin_lam[rows], self._cos_lam[rows]
+        self._sin_lam[rows], self._cos_lam[rows] = sin_lam * b + cos_lam * a, cos_lam * b - sin_lam * a
+
+        # Waypoint reached: compare cosines instead of taking arccos of every distance.
+        _, cos_d = self._waypoint_delta_lambda(rows)
+        cos_distance = (self._sin_phi[rows] * self.target_sin_phi[rows]
+                        + self._cos_phi[rows] * self.target_cos_phi[rows] * cos_d)
+        # cos(max(delta, radius)) == min(cos(delta), cos(radius)) for angles in [0, pi].
+        arrived = cos_distance > np.minimum(cos_delta, np.cos(ARRIVAL_RADIUS_M / EARTH_RADIUS_M))
+        return np.flatnonzero(arrived) + rows.start
 
-def get_db_uuids(conn_params, num_entities):
+    @property
+    def lat(self):
+        return np.degrees(self.phi)
+
+    @property
+    def lon(self):
+        return np.degrees(self.lam)
+
+    def wkb(self, mask=slice(None)):
+        """Current positions (of the flights selected by mask) as a list of WKB points, packed in one pass."""
+        self._wkb["x"] = self.lon
+        self._wkb["y"] = self.lat
+        # A void view keeps all 21 bytes per point (an S21 view would drop trailing NULs).
+        return self._wkb[mask].view(WKB_POINT_BYTES).tolist()
+
+    def ids(self, mask=slice(None)):
+        """Entity ids of the flights selected by mask."""
+        return self._entity_ids[mask].tolist()
+
+    def kinematics(self, mask=slice(None)):
+        """Speed (km/h), altitude (m) and heading (degrees) as lists of ints for the metadata update."""
+        return (np.rint(self.speed[mask] * 3.6).astype(np.int64).tolist(),
+                np.rint(self.altitude[mask]).astype(np.int64).tolist(),
+                (np.rint(np.degrees(self.heading[mask])).astype(np.int64) % 360).tolist())
+
+def get_db_uuids(db, num_entities):
     """Fetches existing vehicle UUIDs from the database."""
-    conn = None
     uuids = []
     try:
-        conn = psycopg2.connect(**conn_params)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT id FROM {TABLE_NAME} WHERE src_type = 'vehicles' LIMIT %s;", (num_entities,))
-        uuids = [row[0] for row in cursor.fetchall()]
+        rows = db.query(f"SELECT id FROM {TABLE_NAME} WHERE src_type = 'vehicles' LIMIT %s;", (num_entities,))
+        uuids = [row[0] for row in rows]
         print(f"Found {len(uuids)} UUIDs in database.")
     except Exception as e:
         print(f"Database error while fetching UUIDs: {e}")
-    finally:
-        if conn:
-            conn.close()
     return uuids
 
-def lat_lon_to_wkb(latitude, longitude):
-    """Converts a latitude and longitude into WKB format for PostGIS."""
-    point = Point(longitude, latitude)
-    return point.wkb
+def advance(simulation, dead_reckoning):
+    """CPU part of a tick: steps the simulation and returns the bulk-update parameters, or None if nothing is written."""
+    simulation.step()
 
-async def update_simulated_positions(conn_params, uuids):
+    mask = slice(None)
+    if dead_reckoning is not None:
+        with METRICS.time("dr_filter", items=len(simulation.entity_ids)):
+            mask = dead_reckoning.select(simulation.clock, simulation.lat, simulation.lon, simulation.speed,
+                                         np.degrees(simulation.heading))
+        written = int(np.count_nonzero(mask))
+        saved = len(simulation.entity_ids) - written
+        METRICS.count("writes_saved", saved)
+        print(f"[{time.strftime('%H:%M:%S')}] Dead reckoning: writing {written} flights, {saved} writes saved.")
+        if not written:
+            return None
+
+    if not simulation.entity_ids:
+        return None
+    return simulation.wkb(mask), simulation.ids(mask), *simulation.kinematics(mask)
+
+async def update_simulated_positions(db, uuids, dr_threshold=None, dr_max_staleness=DEFAULT_MAX_STALENESS_SECONDS):
     """
-    Calculates new flight positions and updates the DB in a single batch.
+    Calculates new flight positions and kinematics and updates the DB in a single batch.
+    With dr_threshold set, only flights that drifted from their dead-reckoned position are written.
     """
-    updates = []
-    
-    for entity_id in uuids:
-        # If we haven't seen this flight yet, initialize it
-        if entity_id not in FLIGHT_SIMULATION_DATA:
-            FLIGHT_SIMULATION_DATA[entity_id] = {
-                "lat": random.uniform(BOUNDING_BOX['lamin'], BOUNDING_BOX['lamax']),
-                "lon": random.uniform(BOUNDING_BOX['lomin'], BOUNDING_BOX['lomax']),
-                "v_lat": random.uniform(-0.05, 0.05), # Velocity Latitude
-                "v_lon": random.uniform(-0.05, 0.05)  # Velocity Longitude
-            }
-        
-        state = FLIGHT_SIMULATION_DATA[entity_id]
-        
-        # Move the flight
-        state["lat"] += state["v_lat"]
-        state["lon"] += state["v_lon"]
-        
-        # Bounce off the bounding box edges to keep them in view
-        if not (BOUNDING_BOX['lamin'] < state["lat"] < BOUNDING_BOX['lamax']):
-            state["v_lat"] *= -1
-        if not (BOUNDING_BOX['lomin'] < state["lon"] < BOUNDING_BOX['lomax']):
-            state["v_lon"] *= -1
-            
-        # Prepare WKB
-        wkb_geo = lat_lon_to_wkb(state["lat"], state["lon"])
-        updates.append((wkb_geo, entity_id))
-
-    # Push to Database
-    if updates:
-        conn = None
-        try:
-            conn = psycopg2.connect(**conn_params)
-            cursor = conn.cursor()
-
-            # Optimized bulk update query
-            update_query = f"""
-            UPDATE {TABLE_NAME} AS t
-            SET
-                geo = ST_SetSRID(ST_GeomFromWKB(src.wkb_geos), 4326)
-            FROM
-                (SELECT unnest(%s) as wkb_geos, unnest(%s) as entity_uuid) AS src
-            WHERE
-                t.id = src.entity_uuid::uuid;
-            """
-            
-            wkb_list = [u[0] for u in updates]
-            uuid_list = [u[1] for u in updates]
-            
-            cursor.execute(update_query, (wkb_list, uuid_list))
-            conn.commit()
-            print(f"[{time.strftime('%H:%M:%S')}] Updated {cursor.rowcount} flights.")
-            
-        except Exception as e:
-            print(f"DB Update Failed: {e}")
-            if conn: conn.rollback()
-        finally:
-            if conn: conn.close()
+    global FLIGHT_SIMULATION_DATA, DEAD_RECKONING
+    # If we haven't seen these flights yet, initialize them
+    if FLIGHT_SIMULATION_DATA is None:
+        FLIGHT_SIMULATION_DATA = FlightSimulation(uuids)
+        if dr_threshold is not None:
+            DEAD_RECKONING = DeadReckoningFilter(len(uuids), dr_threshold, dr_max_staleness,
+                                                 FLIGHT_SIMULATION_DATA.time_scale)
+
+    # The step, filter and parameter packing take tens of ms at 100k flights; NumPy
+    # releases the GIL for most of it, so off the loop they no longer show up as loop lag.
+    params = await asyncio.get_running_loop().run_in_executor(None, advance, FLIGHT_SIMULATION_DATA, DEAD_RECKONING)
 
-async def main():
+    # Push to Database (write-behind: the next tick starts while this one is written)
+    if params is not None:
+        await db.execute_behind(UPDATE_POSITIONS_STATEMENT, params, "flights")
+
+def benchmark(num_entities, ticks, dr_threshold=None, dr_max_staleness=DEFAULT_MAX_STALENESS_SECONDS):
+    """Times step(), the dead-reckoning filter, wkb() and kinematics() without a database."""
+    simulation = FlightSimulation([uuid.uuid4() for _ in range(num_entities)])
+    dead_reckoning = None
+    if dr_threshold is not None:
+        dead_reckoning = DeadReckoningFilter(num_entities, dr_threshold, dr_max_staleness, simulation.time_scale)
+    step_seconds = dr_seconds = wkb_seconds = kinematics_seconds = 0.0
+    written = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        simulation.step()
+        step_seconds += time.perf_counter() - start
+        mask = slice(None)
+        if dead_reckoning is not None:
+            start = time.perf_counter()
+            mask = dead_reckoning.select(simulation.clock, simulation.lat, simulation.lon, simulation.speed,
+                                         np.degrees(simulation.heading))
+            dr_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        written += len(simulation.wkb(mask))
+        wkb_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        simulation.kinematics(mask)
+        kinematics_seconds += time.perf_counter() - start
+    print(f"[bench] {num_entities} entities, {ticks} ticks: step {step_seconds / ticks * 1e3:.2f}ms/tick, "
+          f"dead reckoning {dr_seconds / ticks * 1e3:.2f}ms/tick, wkb {wkb_seconds / ticks * 1e3:.2f}ms/tick, "
+          f"kinematics {kinematics_seconds / ticks * 1e3:.2f}ms/tick")
+    print(f"[bench] rows written {written / ticks:.0f}/tick of {num_entities} "
+          f"({1 - written / (ticks * num_entities):.1%} writes saved)")
+
+async def main(num_entities=NUM_ENTITIES, metrics_json=None, prometheus_textfile=None,
+               dr_threshold=None, dr_max_staleness=DEFAULT_MAX_STALENESS_SECONDS):
     print("--- Starting Internal Mock Flight Generator ---")
     
     conn_params = {
@@ -125,28 +355,51 @@ async def main():
         "host": DB_HOST,
         "port": DB_PORT
     }
+    # One long-lived session for the whole run; reconnects on its own if the DB drops.
+    db = SimDatabase(conn_params, STATEMENTS, metrics=METRICS)
 
-    # Step 1: Get the entities we need to move
-    uuids_to_move = get_db_uuids(conn_params, NUM_ENTITIES)
-    
-    if not uuids_to_move:
-        print("No 'vehicles' records found in DB. Seed the DB first!")
-        return
-
-    # Step 2: Loop forever updating positions
     try:
-        while True:
-            start_time = time.time()
-            
-            await update_simulated_positions(conn_params, uuids_to_move)
-            
-            # Control the frequency
-            elapsed = time.time() - start_time
-            sleep_duration = max(0, UPDATE_INTERVAL_SECONDS - elapsed)
-            await asyncio.sleep(sleep_duration)
-            
-    except KeyboardInterrupt:
+        # Step 1: Get the entities we need to move
+        uuids_to_move = await db.run(get_db_uuids, db, num_entities)
+
+        if not uuids_to_move:
+            print("No 'vehicles' records found in DB. Seed the DB first!")
+            return
+
+        # Step 2: Loop forever updating positions
+        await run_ticks(lambda: update_simulated_positions(db, uuids_to_move, dr_threshold, dr_max_staleness),
+                        UPDATE_INTERVAL_SECONDS, METRICS, metrics_json, prometheus_textfile)
+
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("\nStopping simulated updates.")
+    finally:
+        await db.flush()
+        db.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Move vehicle rows around with a simulated flight model.")
+    parser.add_argument("--entities", type=int, default=NUM_ENTITIES,
+                        help=f"Vehicle rows to move (default: {NUM_ENTITIES}).")
+    parser.add_argument("--benchmark", type=int, metavar="TICKS",
+                        help="Time TICKS simulation ticks for --entities entities without a database, then exit.")
+    parser.add_argument("--dr-threshold", type=float, metavar="METRES",
+                        help="Dead reckoning: only write flights that drifted more than METRES from their "
+                             "extrapolated last-written position (default: write every flight every tick).")
+    parser.add_argument("--dr-max-staleness", type=float, default=DEFAULT_MAX_STALENESS_SECONDS, metavar="SECONDS",
+                        help=f"With --dr-threshold, rewrite a flight at least every SECONDS (default: {DEFAULT_MAX_STALENESS_SECONDS:g}).")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="Keep a JSON summary of DB latency, tick jitter and loop lag at PATH (rewritten every 15s).")
+    parser.add_argument("--prometheus-textfile", metavar="PATH",
+                        help="Keep the same metrics at PATH in Prometheus textfile-collector format.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.entities, args.benchmark, args.dr_threshold, args.dr_max_staleness)
+    else:
+        try:
+            asyncio.run(main(args.entities, args.metrics_json, args.prometheus_textfile,
+                             args.dr_threshold, args.dr_max_staleness))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            METRICS.report(args.metrics_json, args.prometheus_textfile)
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Persistent database session for the movement simulators.
+
+The simulators push one bulk UPDATE per tick. Opening a connection for
+every tick spends most of the tick budget on TCP, auth and backend start-up,
+so SimDatabase keeps a small pool of long-lived connections instead and runs
+each tick's statement as a server-side prepared statement: PREPAREd once per
+connection, then only EXECUTEd. A connection that drops is discarded and the
+statement retried once on a fresh one; if the database is down the call
+raises, and the next tick simply tries to reconnect again.
+
+The asyncio simulators use execute_behind(), which runs the statement on a
+dedicated DB thread and returns as soon as it is queued, so the event loop
+keeps fetching and computing the next tick while this one is written.
+"""
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+RECONNECT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class SimDatabase:
+    """Pooled long-lived connections with per-connection prepared statements.
+
+    statements maps a statement name to (sql, param_types), where sql uses
+    $1..$n placeholders and param_types lists their Postgres types, e.g.
+    ("UPDATE ... unnest($1, $2) ...", ["bytea[]", "uuid[]"]).
+    """
+
+    def __init__(self, conn_params, statements, minconn=1, maxconn=2, metrics=None):
+        self.conn_params = conn_params
+        self.statements = statements
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.metrics = metrics
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._prepared = {}
+        # One thread keeps write-behind statements in tick order.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sim-db")
+        self._pending = None
+
+    def _getconn(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(self.minconn, self.maxconn, **self.conn_params)
+                print(f"[db] connected to {self.conn_params.get('host')}:{self.conn_params.get('port')} "
+                      f"(pool of {self.minconn}-{self.maxconn})")
+            pool = self._pool
+        conn = pool.getconn()
+        if conn.closed:
+            self._discard(conn)
+            conn = pool.getconn()
+        return conn
+
+    def _putconn(self, conn):
+        self._pool.putconn(conn)
+
+    def _discard(self, conn):
+        self._prepared.pop(conn, None)
+        try:
+            self._pool.putconn(conn, close=True)
+        except Exception:
+            pass
+
+    def query(self, sql, params=None):
+        """Runs a plain query and returns all rows."""
+        for attempt in (1, 2):
+            conn = self._getconn()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    rows = cursor.fetchall()
+                conn.commit()
+                self._putconn(conn)
+                return rows
+            except RECONNECT_ERRORS as e:
+                self._discard(conn)
+                if attempt == 2:
+                    raise
+                print(f"[db] connection lost ({e}), reconnecting")
+            except Exception:
+                conn.rollback()
+                self._putconn(conn)
+                raise
+
+    def execute(self, name, params):
+        """EXECUTEs a prepared statement and commits; returns (rowcount, seconds)."""
+        sql, param_types = self.statements[name]
+        placeholders = ", ".join(f"%s::{param_type}" for param_type in param_types)
+        for attempt in (1, 2):
+            conn = self._getconn()
+            try:
+                start = time.perf_counter()
+                with conn.cursor() as cursor:
+                    prepared = self._prepared.setdefault(conn, set())
+                    if name not in prepared:
+                        cursor.execute(f"PREPARE {name} ({', '.join(param_types)}) AS {sql}")
+                        prepared.add(name)
+                    cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+                    rowcount = cursor.rowcount
+                conn.commit()
+                seconds = time.perf_counter() - start
+                self._putconn(conn)
+                if self.metrics is not None:
+                    self.metrics.observe("db_write", seconds, max(rowcount, 0))
+                return rowcount, seconds
+            except RECONNECT_ERRORS as e:
+                self._discard(conn)
+                if attempt == 2:
+                    raise
+                print(f"[db] connection lost ({e}), reconnecting")
+            except Exception:
+                conn.rollback()
+                self._putconn(conn)
+                raise
+
+    async def run(self, func, *args):
+        """Runs a blocking call (e.g. query) on the DB thread without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def execute_behind(self, name, params, label="rows"):
+        """Queues a prepared statement on the DB thread and returns without waiting for it.
+
+        Only the previous write-behind statement is awaited first, so at most
+        one tick's write is outstanding and a slow database slows the loop
+        down instead of growing a backlog. The outcome is logged when the
+        statement finishes.
+        """
+        await self.flush()
+        self._pending = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._execute_logged, name, params, label)
+
+    async def flush(self):
+        """Waits for the outstanding write-behind statement, if any."""
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            await pending
+
+    def _execute_logged(self, name, params, label):
+        try:
+            rowcount, seconds = self.execute(name, params)
+            print(f"[{time.strftime('%H:%M:%S')}] Updated {rowcount} {label} (db {seconds * 1e3:.1f} ms).")
+        except Exception as e:
+            print(f"DB Update Failed: {e}")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+            self._prepared.clear()
@@ -0,0 +1,55 @@
+"""
+Fixed-cadence tick loop for the asyncio movement simulators.
+
+run_ticks() awaits one tick every interval seconds on a fixed schedule and
+records, in the given StageMetrics:
+
+  * tick_jitter - how late each tick started against its schedule,
+  * tick        - wall time of each tick (fetching, computing and queueing
+                  its write; awaited I/O does not block other tasks),
+  * loop_lag    - how late a 100 ms probe timer fires, i.e. how long the
+                  loop was blocked by something other than awaiting I/O.
+
+With metric paths set, the JSON / Prometheus textfiles are rewritten every
+METRICS_WRITE_SECONDS so a scraper sees them while the simulator runs.
+"""
+import asyncio
+
+LAG_PROBE_SECONDS = 0.1
+METRICS_WRITE_SECONDS = 15.0
+
+
+async def watch_loop_lag(metrics, interval=LAG_PROBE_SECONDS):
+    """Samples event-loop lag until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        metrics.observe("loop_lag", max(loop.time() - expected, 0.0))
+
+
+async def run_ticks(tick, interval, metrics, json_path=None, prometheus_path=None):
+    """Runs `await tick()` every interval seconds until cancelled.
+
+    A tick that overruns its slot starts the next one immediately and the
+    schedule restarts from there, so one slow tick does not cause a burst.
+    """
+    loop = asyncio.get_running_loop()
+    lag_probe = asyncio.create_task(watch_loop_lag(metrics))
+    next_tick = loop.time()
+    next_write = next_tick + METRICS_WRITE_SECONDS
+    try:
+        while True:
+            metrics.observe("tick_jitter", max(loop.time() - next_tick, 0.0))
+            with metrics.time("tick"):
+                await tick()
+
+            now = loop.time()
+            next_tick = max(next_tick + interval, now)
+            if (json_path or prometheus_path) and now >= next_write:
+                # Summarising sorts each stage's sample window; keep that off the loop.
+                await loop.run_in_executor(None, metrics.write, json_path, prometheus_path)
+                next_write = now + METRICS_WRITE_SECONDS
+            await asyncio.sleep(next_tick - now)
+    finally:
+        lag_probe.cancel()
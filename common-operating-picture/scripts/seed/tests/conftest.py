@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The seed scripts import each other as top-level modules, the same way they
+# do when run as `python3 scripts/seed/<script>.py`.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,245 @@
+import os
+import json
+import signal
+import subprocess
+import sys
+import threading
+
+import psycopg2
+import pytest
+from faker import Faker
+
+import add_manifests
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=None):
+        if sql.lstrip().startswith("LISTEN"):
+            return
+        raise psycopg2.InterfaceError("connection already closed")
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    autocommit = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        raise psycopg2.InterfaceError("connection already closed")
+
+
+@pytest.fixture
+def restore_signals():
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    yield
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def test_daemon_survives_any_psycopg2_error_and_backs_off(monkeypatch, restore_signals):
+    delays = []
+    outcomes = iter([
+        psycopg2.InterfaceError("connection already closed"),
+        psycopg2.DatabaseError("terminating connection due to administrator command"),
+        FakeConn(), FakeConn(),  # connects and LISTENs, then dies in the catch-up scan
+        "stop",
+    ])
+
+    def connect_db():
+        outcome = next(outcomes)
+        if outcome == "stop":
+            os.kill(os.getpid(), signal.SIGTERM)
+            raise psycopg2.OperationalError("could not connect")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(add_manifests, "get_s4_s3_client", lambda *a, **k: object())
+    monkeypatch.setattr(add_manifests, "connect_db", connect_db)
+    monkeypatch.setattr(add_manifests, "_reconnect_delay", lambda failures: delays.append(failures) or 0)
+
+    add_manifests.run_daemon()
+
+    # failures reset once a connection got as far as LISTEN
+    assert delays == [1, 2, 1, 2]
+
+
+def test_reconnect_delay_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(add_manifests.random, "uniform", lambda low, high: high)
+    delays = [add_manifests._reconnect_delay(n) for n in range(1, 10)]
+    assert delays[:3] == [add_manifests.DAEMON_RECONNECT_SECONDS * k for k in (1, 2, 4)]
+    assert max(delays) == add_manifests.DAEMON_RECONNECT_MAX_SECONDS
+
+
+def test_until_stops_a_scan_once_stop_is_set():
+    stop = threading.Event()
+    seen = []
+    for row in add_manifests._until(stop, iter(range(1000))):
+        seen.append(row)
+        if row == 4:
+            stop.set()
+    assert seen == [0, 1, 2, 3, 4]
+
+
+class Notification:
+    def __init__(self, channel, payload):
+        self.channel = channel
+        self.payload = json.dumps(payload)
+
+
+def test_vehicle_ids_from_notifications():
+    inserted, bulk = add_manifests.INSERTED_CHANNEL, add_manifests.BULK_LOADED_CHANNEL
+    assert add_manifests._vehicle_ids(Notification(inserted, {"id": "a", "src_type": "vehicles", "metadata": {}})) == ["a"]
+    assert add_manifests._vehicle_ids(Notification(inserted, {"id": "a", "src_type": "tracks"})) == []
+    assert add_manifests._vehicle_ids(
+        Notification(inserted, {"id": "a", "src_type": "vehicles", "metadata": {"manifest": "s3://x"}})) == []
+    assert add_manifests._vehicle_ids(Notification(bulk, {"src_type": "vehicles", "count": 2, "ids": ["a", "b"]})) == ["a", "b"]
+    assert add_manifests._vehicle_ids(Notification(bulk, {"src_type": "vehicles", "count": 500})) is None
+
+
+class RecordingConn:
+    def __init__(self):
+        self.executed = []
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def execute(self, sql, params):
+                conn.statements.append(sql)
+                conn.executed.append(params)
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_updater_flushes_pending_updates_on_the_idle_path(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(add_manifests.time, "perf_counter", lambda: clock[0])
+    conn = RecordingConn()
+    updater = add_manifests.ManifestUriUpdater(conn, flush_rows=10, flush_seconds=2.0, with_digests=True)
+
+    updater.add("id-1", "s3://cop-demo/manifests/id-1.json.tdf", "d1")
+    updater.flush_if_due()
+    assert conn.commits == 0
+
+    clock[0] += 2.5  # input stalls; no further add()
+    updater.flush_if_due()
+    assert conn.commits == 1
+    assert conn.executed == [(["id-1"], ["s3://cop-demo/manifests/id-1.json.tdf"], ["d1"])]
+
+    updater.flush_if_due()
+    assert conn.commits == 1
+
+
+def test_updater_flushes_by_row_count():
+    conn = RecordingConn()
+    updater = add_manifests.ManifestUriUpdater(conn, flush_rows=3, flush_seconds=3600)
+    for n in range(7):
+        updater.add(f"id-{n}", f"uri-{n}")
+    assert conn.commits == 2
+    updater.close()
+    assert conn.commits == 3 and updater.updated == 7
+
+
+def test_skip_unchanged_reports_every_chunk(monkeypatch):
+    monkeypatch.setattr(add_manifests, "_stored_digest", lambda s3, key: None)
+    rows = []
+    for n in range(10):
+        row_id = f"00000000-0000-0000-0000-{n:012d}"
+        search = {"attrRelTo": [], "attrNeedToKnow": []}
+        digest = add_manifests.manifest_digest(row_id, search, "faker", "none")
+        metadata = {"manifest_digest": digest,
+                    "manifest": f"s3://{add_manifests.S4_BUCKET}/{add_manifests._manifest_key(row_id)}"}
+        rows.append((row_id, search, metadata))
+    chunks = []
+    out = list(add_manifests.skip_unchanged(iter(rows), None, "faker", concurrency=1, on_chunk=lambda: chunks.append(1)))
+    assert len(out) == 10  # no stored digest, so every row is rebuilt
+    assert len(chunks) == 3  # chunks of concurrency * 4 rows
+
+
+def _stored_row(n, compression):
+    row_id = f"00000000-0000-0000-0000-{n:012d}"
+    search = {"attrRelTo": ["https://demo.com/attr/relto/value/gbr"], "attrNeedToKnow": []}
+    metadata = {"manifest_digest": add_manifests.manifest_digest(row_id, search, "pooled", compression),
+                "manifest": f"s3://{add_manifests.S4_BUCKET}/{add_manifests._manifest_key(row_id)}"}
+    return row_id, search, metadata
+
+
+def test_digest_covers_the_compression_setting():
+    row_id, search, _ = _stored_row(1, "none")
+    digests = {codec: add_manifests.manifest_digest(row_id, search, "pooled", codec) for codec in ("none", "gzip", "zstd")}
+    assert len(set(digests.values())) == 3
+    assert digests["none"] == add_manifests.manifest_digest(row_id, search, "pooled")
+
+
+def test_changing_compress_rebuilds_stored_manifests(monkeypatch):
+    rows = [_stored_row(n, "none") for n in range(4)]
+    stored = {add_manifests._manifest_key(row_id): metadata["manifest_digest"] for row_id, _, metadata in rows}
+    monkeypatch.setattr(add_manifests, "_stored_digest", lambda s3, key: stored[key])
+
+    unchanged = list(add_manifests.skip_unchanged(iter(rows), None, "pooled", concurrency=2, compression="none"))
+    assert unchanged == []
+    recompressed = list(add_manifests.skip_unchanged(iter(rows), None, "pooled", concurrency=2, compression="gzip"))
+    assert recompressed == rows
+
+
+def test_content_hash_requires_all():
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "add_manifests.py")
+    result = subprocess.run([sys.executable, script, "--content-hash"], capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "--content-hash only applies to --all" in result.stderr
+
+
+@pytest.mark.parametrize("content_hash", [False, True])
+def test_digest_is_only_computed_and_written_with_content_hash(monkeypatch, content_hash):
+    uploads = []
+
+    def upload(s3_client, key, data, attributes, digest=None, compression="none"):
+        uploads.append(digest)
+        return f"s3://{add_manifests.S4_BUCKET}/{key}"
+
+    def digest(*args):
+        if not content_hash:
+            raise AssertionError("digest computed without --content-hash")
+        return "d-" + args[0]
+
+    monkeypatch.setattr(add_manifests, "upload_to_s4", upload)
+    monkeypatch.setattr(add_manifests, "manifest_digest", digest)
+    conn = RecordingConn()
+    updater = add_manifests.ManifestUriUpdater(conn, flush_rows=10, with_digests=content_hash)
+    rows = [("00000000-0000-0000-0000-000000000001", {"attrRelTo": [], "attrNeedToKnow": []}, {})]
+    assert add_manifests.attach_manifests(iter(rows), None, Faker(), None, updater, content_hash=content_hash) == 1
+    updater.close()
+
+    row_id = rows[0][0]
+    uri = f"s3://{add_manifests.S4_BUCKET}/{add_manifests._manifest_key(row_id)}"
+    if content_hash:
+        assert uploads == ["d-" + row_id]
+        assert conn.statements == [add_manifests.UPDATE_MANIFEST_URIS_AND_DIGESTS_SQL]
+        assert conn.executed == [([row_id], [uri], ["d-" + row_id])]
+    else:
+        assert uploads == [None]
+        assert conn.statements == [add_manifests.UPDATE_MANIFEST_URIS_SQL]
+        assert conn.executed == [([row_id], [uri])]
+        assert "manifest_digest" not in add_manifests.UPDATE_MANIFEST_URIS_SQL
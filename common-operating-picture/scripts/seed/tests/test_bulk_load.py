@@ -0,0 +1,66 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from bulk_load import BULK_LOADED_CHANNEL, BulkLoadSummary, publish_bulk_load_summary
+
+T0 = datetime(2025, 1, 1)
+
+
+def _record(n, src_type="vehicles"):
+    return (uuid.uuid4(), T0 + timedelta(seconds=n), src_type, b"geo")
+
+
+def test_summary_lists_ids_and_ts_range_per_src_type():
+    summary = BulkLoadSummary("load-1")
+    records = [_record(n) for n in (5, 1, 9)] + [_record(3, "tracks")]
+    assert list(summary.track(records)) == records
+    payloads = {p["src_type"]: p for p in map(json.loads, summary.payloads())}
+    assert payloads["vehicles"] == {
+        "load_id": "load-1",
+        "src_type": "vehicles",
+        "count": 3,
+        "min_ts": (T0 + timedelta(seconds=1)).isoformat(),
+        "max_ts": (T0 + timedelta(seconds=9)).isoformat(),
+        "ids": [str(r[0]) for r in records[:3]],
+    }
+    assert payloads["tracks"]["count"] == 1
+    assert len(summary) == 4
+
+
+def test_large_batches_drop_ids_but_keep_count_and_ts_range():
+    summary = BulkLoadSummary(max_ids=10)
+    for n in range(11):
+        summary.add(*_record(n)[:3])
+    (payload,) = map(json.loads, summary.payloads())
+    assert "ids" not in payload
+    assert payload["count"] == 11
+    assert payload["max_ts"] == (T0 + timedelta(seconds=10)).isoformat()
+    assert uuid.UUID(payload["load_id"])
+
+
+def test_default_payload_fits_in_a_notification():
+    summary = BulkLoadSummary()
+    for n in range(summary.max_ids):
+        summary.add(*_record(n)[:3])
+    (payload,) = summary.payloads()
+    assert len(payload.encode()) < 8000
+
+
+class _Cursor:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, sql, params):
+        self.calls.append(params)
+
+
+def test_publish_keeps_the_load_id_across_batches():
+    summary, cursor = BulkLoadSummary(), _Cursor()
+    for batch in range(2):
+        summary.add(*_record(batch)[:3])
+        assert publish_bulk_load_summary(cursor, summary) == 1
+        assert len(summary) == 0
+    channels, payloads = zip(*cursor.calls)
+    assert set(channels) == {BULK_LOADED_CHANNEL}
+    assert len({json.loads(p)["load_id"] for p in payloads}) == 1
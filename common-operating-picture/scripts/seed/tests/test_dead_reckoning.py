@@ -0,0 +1,64 @@
+import numpy as np
+
+from dead_reckoning import EARTH_RADIUS_M, DeadReckoningFilter
+
+METRES_PER_DEGREE = np.radians(1.0) * EARTH_RADIUS_M
+
+
+def _north(lat, metres):
+    return lat + metres / METRES_PER_DEGREE
+
+
+def test_first_select_writes_everything():
+    dr = DeadReckoningFilter(3, threshold_m=50)
+    assert dr.select(0.0, [10, 20, 30], [0, 0, 0], [0, 0, 0], [0, 0, 0]).tolist() == [True] * 3
+
+
+def test_only_entities_past_the_threshold_are_written():
+    dr = DeadReckoningFilter(2, threshold_m=50, max_staleness_s=1000)
+    dr.select(0.0, [10, 10], [5, 6], [0, 0], [0, 0])
+    mask = dr.select(1.0, [_north(10, 30), _north(10, 80)], [5, 6], [0, 0], [0, 0])
+    assert mask.tolist() == [False, True]
+    # The first entity is compared against its original position, so small moves add up.
+    mask = dr.select(2.0, [_north(10, 60), _north(10, 80)], [5, 6], [0, 0], [0, 0])
+    assert mask.tolist() == [True, False]
+
+
+def test_motion_along_the_last_heading_is_predicted():
+    dr = DeadReckoningFilter(1, threshold_m=50, max_staleness_s=1000)
+    dr.select(0.0, [10], [5], [100.0], [0.0])  # 100 m/s due north
+    assert not dr.select(10.0, [_north(10, 1000)], [5], [100.0], [0.0])[0]
+    assert dr.select(20.0, [_north(10, 1000)], [5], [100.0], [0.0])[0]
+
+
+def test_time_scale_speeds_up_the_prediction():
+    dr = DeadReckoningFilter(1, threshold_m=50, max_staleness_s=1000, time_scale=10.0)
+    dr.select(0.0, [10], [5], [100.0], [0.0])
+    assert not dr.select(1.0, [_north(10, 1000)], [5], [100.0], [0.0])[0]
+
+
+def test_stale_entities_are_rewritten():
+    dr = DeadReckoningFilter(1, threshold_m=50, max_staleness_s=30)
+    dr.select(0.0, [10], [5], [0], [0])
+    assert not dr.select(29.0, [10], [5], [0], [0])[0]
+    assert dr.select(30.0, [10], [5], [0], [0])[0]
+    assert not dr.select(31.0, [10], [5], [0], [0])[0]
+
+
+def test_unknown_speed_and_heading_extrapolate_as_stationary():
+    dr = DeadReckoningFilter(1, threshold_m=50, max_staleness_s=1000)
+    dr.select(0.0, [10], [5], [np.nan], [np.nan])
+    assert not dr.select(100.0, [10], [5], [np.nan], [np.nan])[0]
+
+
+def test_antimeridian_crossing_is_not_a_jump():
+    dr = DeadReckoningFilter(1, threshold_m=50, max_staleness_s=1000)
+    dr.select(0.0, [0], [179.99999], [0], [0])
+    assert not dr.select(1.0, [0], [-179.99999], [0], [0])[0]
+
+
+def test_index_selects_entity_slots():
+    dr = DeadReckoningFilter(4, threshold_m=50, max_staleness_s=1000)
+    assert dr.select(0.0, [1, 3], [0, 0], [0, 0], [0, 0], index=[1, 3]).tolist() == [True, True]
+    assert np.isneginf(dr.written_at[[0, 2]]).all()
+    assert dr.select(1.0, [1, 3, 2], [0, 0, 0], [0, 0, 0], [0, 0, 0], index=[1, 3, 2]).tolist() == [False, False, True]
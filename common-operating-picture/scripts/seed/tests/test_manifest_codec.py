@@ -0,0 +1,64 @@
+import gzip
+
+import numpy as np
+import pytest
+
+import manifest_codec
+import manifest_engine
+
+PAYLOAD = b'{"documentControl": {"classification": "SECRET"}, "targetDeck": []}' * 20
+
+
+@pytest.mark.parametrize("codec", [
+    "none",
+    "gzip",
+    pytest.param("zstd", marks=pytest.mark.skipif(manifest_codec.zstandard is None, reason="zstandard not installed")),
+])
+def test_round_trip(codec):
+    body, metadata = manifest_codec.encode(PAYLOAD, codec)
+    assert manifest_codec.decode(body, metadata) == PAYLOAD
+    if codec == "none":
+        assert metadata == {}
+    else:
+        assert metadata == {manifest_codec.ENCODING_METADATA_KEY: codec}
+        assert len(body) < len(PAYLOAD)
+
+
+def test_gzip_is_deterministic():
+    assert manifest_codec.encode(PAYLOAD, "gzip") == manifest_codec.encode(PAYLOAD, "gzip")
+
+
+def test_decode_without_metadata_returns_body():
+    assert manifest_codec.decode(PAYLOAD) == PAYLOAD
+    assert manifest_codec.decode(PAYLOAD, {"tdf-data-attribute-0": "x"}) == PAYLOAD
+
+
+def test_unknown_codec_and_encoding_are_rejected():
+    with pytest.raises(ValueError):
+        manifest_codec.check_codec("brotli")
+    with pytest.raises(ValueError):
+        manifest_codec.encode(PAYLOAD, "brotli")
+    with pytest.raises(ValueError):
+        manifest_codec.decode(PAYLOAD, {manifest_codec.ENCODING_METADATA_KEY: "brotli"})
+
+
+def test_corrupt_gzip_body_raises():
+    with pytest.raises((OSError, EOFError)):
+        manifest_codec.decode(b"not gzip", {manifest_codec.ENCODING_METADATA_KEY: "gzip"})
+    truncated = gzip.compress(PAYLOAD)[:-8]
+    with pytest.raises((OSError, EOFError)):
+        manifest_codec.decode(truncated, {manifest_codec.ENCODING_METADATA_KEY: "gzip"})
+
+
+def _sizes(engine, count=16):
+    batch = engine.generate([str(i) for i in range(count)], ["secret"] * count, rng=np.random.default_rng(3))
+    return [len(manifest_engine.dumps(manifest)) for manifest in batch]
+
+
+def test_sample_manifests_leave_engine_pools_untouched():
+    engine = manifest_engine.ManifestEngine(pool_size=64, seed=1)
+    before = _sizes(engine)
+    first = manifest_codec._sample_manifests(20, 8, engine)
+    second = manifest_codec._sample_manifests(20, 8, engine)
+    assert list(map(len, first)) == list(map(len, second))
+    assert _sizes(engine) == before
@@ -0,0 +1,91 @@
+import random
+import re
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pytest
+from faker import Faker
+
+import manifest_engine
+import seed_data
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+UUID4 = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return manifest_engine.ManifestEngine(pool_size=64, seed=7)
+
+
+def _key_paths(value, prefix=""):
+    if isinstance(value, dict):
+        paths = set()
+        for key, child in value.items():
+            paths.add(prefix + key)
+            paths |= _key_paths(child, prefix + key + ".")
+        return paths
+    return set()
+
+
+def test_same_seed_and_rng_reproduce_the_batch():
+    ids = [f"rec-{i}" for i in range(20)]
+    labels = ["secret"] * 20
+    first = manifest_engine.ManifestEngine(pool_size=64, seed=7).generate(
+        ids, labels, now=NOW, rng=np.random.default_rng(1))
+    second = manifest_engine.ManifestEngine(pool_size=64, seed=7).generate(
+        ids, labels, now=NOW, rng=np.random.default_rng(1))
+    assert manifest_engine.dumps(first) == manifest_engine.dumps(second)
+
+
+def test_manifests_match_the_faker_generator_layout(engine):
+    (pooled,) = engine.generate(["rec-1"], ["topsecret"], now=NOW, rng=np.random.default_rng(2))
+    faker = seed_data.generate_military_manifest(Faker(), "rec-1", "topsecret", rng=random.Random(2), now=NOW)
+    assert _key_paths(pooled) == _key_paths(faker)
+
+    control = pooled["documentControl"]
+    assert control["recordId"] == "rec-1"
+    assert control["classification"] == "TOPSECRET"
+    assert 1 <= len(control["caveats"]) <= 3
+    assert set(control["caveats"]) <= set(manifest_engine.SECURITY_CAVEATS)
+
+
+def test_caveats_override_the_sampled_ones(engine):
+    caveats = [["NOFORN"], ["FVEY", "ORCON"]]
+    manifests = engine.generate(["a", "b"], ["secret", "unclassified"], now=NOW,
+                                rng=np.random.default_rng(3), caveats=caveats)
+    assert [m["documentControl"]["caveats"] for m in manifests] == caveats
+    assert [m["documentControl"]["classification"] for m in manifests] == ["SECRET", "UNCLASSIFIED"]
+
+
+def test_empty_batch(engine):
+    assert engine.generate([], [], now=NOW) == []
+
+
+def test_uuid4_strings_are_valid_version_4():
+    values = manifest_engine._uuid4_strings(np.random.default_rng(4), 500)
+    assert len(set(values)) == 500
+    for value in values:
+        assert UUID4.match(value)
+        assert uuid.UUID(value).version == 4
+
+
+def test_sample_pool_draws_distinct_values_within_the_size_range():
+    pool = manifest_engine._SamplePool(["a", "b", "c", "d"], 1, 3)
+    assert pool.sizes.tolist() == [4, 12, 24]
+    draws = pool.draw(np.random.default_rng(5), 1000)
+    assert {len(d) for d in draws} == {1, 2, 3}
+    assert all(len(set(d)) == len(d) and set(d) <= {"a", "b", "c", "d"} for d in draws)
+
+
+def test_json_fallback_writes_the_same_bytes_as_orjson(engine, monkeypatch):
+    pytest.importorskip("orjson")
+    manifests = engine.generate([f"rec-{i}" for i in range(50)], ["secret"] * 50, now=NOW,
+                                rng=np.random.default_rng(6))
+    manifests.append(seed_data.generate_military_manifest(Faker(), "rec-x", "secret", rng=random.Random(6), now=NOW))
+    manifests.append({"operator": "SÃO PAULO NAS", "reliability": 0.875, "validated": False, "units": []})
+
+    fast = [manifest_engine.dumps(m) for m in manifests]
+    monkeypatch.setattr(manifest_engine, "orjson", None)
+    assert [manifest_engine.dumps(m) for m in manifests] == fast
@@ -0,0 +1,53 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import manifest_codec  # noqa: E402
+import read_s4  # noqa: E402
+
+MANIFEST = {"documentControl": {"classification": "TOPSECRET"}}
+ENCODING = manifest_codec.ENCODING_METADATA_KEY
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_object(self, Bucket, Key):
+        body, metadata = self.objects[Key]
+        return {"Body": io.BytesIO(body), "Metadata": metadata}
+
+
+def _gzip(payload):
+    return manifest_codec.encode(payload, "gzip")
+
+
+OBJECTS = {
+    "ok-plain": (json.dumps(MANIFEST).encode(), {}),
+    "ok-gzip": _gzip(json.dumps(MANIFEST).encode()),
+    "bad-gzip": (b"definitely not gzip", {ENCODING: "gzip"}),
+    "truncated-gzip": (_gzip(json.dumps(MANIFEST).encode())[0][:-10], {ENCODING: "gzip"}),
+    "bad-zstd": (b"definitely not zstd", {ENCODING: "zstd"}),
+    "unknown-encoding": (b"{}", {ENCODING: "brotli"}),
+    "bad-utf8": (b"\xff\xfe\xfa", {}),
+}
+
+
+@pytest.mark.parametrize("key", ["ok-plain", "ok-gzip"])
+def test_fetch_decodes_manifests(key):
+    assert read_s4.fetch_manifest_from_s4(FakeS3(OBJECTS), f"s3://cop-demo/{key}") == MANIFEST
+
+
+@pytest.mark.parametrize("key", ["bad-gzip", "truncated-gzip", "bad-zstd", "unknown-encoding", "bad-utf8"])
+def test_fetch_returns_none_for_undecodable_bodies(key):
+    assert read_s4.fetch_manifest_from_s4(FakeS3(OBJECTS), f"s3://cop-demo/{key}") is None
+
+
+def test_fetch_manifests_keeps_going_past_bad_bodies():
+    records = [{"id": key, "metadata": {"manifest": f"s3://cop-demo/{key}"}} for key in OBJECTS]
+    records.append({"id": "none", "metadata": {}})
+    results = {record["id"]: manifest for record, manifest in read_s4.fetch_manifests(FakeS3(OBJECTS), records, 4)}
+    assert results == {key: (MANIFEST if key.startswith("ok-") else None) for key in [*OBJECTS, "none"]}
@@ -0,0 +1,89 @@
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("botocore")
+
+import s4_credentials  # noqa: E402
+from s4_credentials import CredentialProvider  # noqa: E402
+
+
+class FakeSts:
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def assume_role_with_web_identity(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(0.01)
+        return {"Credentials": {
+            "AccessKeyId": f"AK{n}",
+            "SecretAccessKey": f"SK{n}",
+            "SessionToken": f"ST{n}",
+            "Expiration": datetime.now(timezone.utc) + timedelta(seconds=self.lifetime),
+        }}
+
+
+def _provider(sts):
+    provider = CredentialProvider("https://kc/token", "client", "secret", "user", "pass", "https://s4")
+    provider._sts_client = sts
+    provider.token = lambda: "jwt"
+    return provider
+
+
+def test_concurrent_callers_share_one_assume_role():
+    sts = FakeSts()
+    provider = _provider(sts)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.credentials())) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sts.calls == 1
+    assert {r["access_key"] for r in results} == {"AK1"}
+
+
+def test_credentials_rotate_once_the_refresh_point_passes():
+    sts = FakeSts()
+    provider = _provider(sts)
+    assert provider.credentials()["access_key"] == "AK1"
+    assert provider.credentials()["access_key"] == "AK1"
+    provider._refresh_at = time.time() - 1
+    assert provider.credentials()["access_key"] == "AK2"
+
+
+def test_refresh_margin_is_capped_at_half_the_lifetime():
+    provider = _provider(FakeSts(lifetime=600))
+    provider.credentials()
+    assert 250 < provider._refresh_at - time.time() <= 300
+
+
+def test_s3_client_resolves_credentials_through_the_provider():
+    provider = _provider(FakeSts())
+    provider.s3_client("https://s4", "us-east-1")
+    credentials = provider._botocore_session.get_credentials()
+    assert credentials.method == s4_credentials.ProviderCredentialSource.METHOD
+    assert credentials.get_frozen_credentials().access_key == "AK1"
+
+
+def test_aio_credential_source_feeds_the_aiobotocore_chain():
+    aio_session = pytest.importorskip("aiobotocore.session")
+    provider = _provider(FakeSts())
+
+    async def resolve():
+        session = aio_session.get_session()
+        session.get_component("credential_provider").insert_before(
+            "env", s4_credentials.AioProviderCredentialSource(provider))
+        credentials = await session.get_credentials()
+        return credentials.method, await credentials.get_frozen_credentials()
+
+    method, frozen = asyncio.run(resolve())
+    assert method == s4_credentials.AioProviderCredentialSource.METHOD
+    assert frozen.access_key == "AK1"
@@ -0,0 +1,60 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("otdf_python")
+
+import seed_data  # noqa: E402
+
+
+class ThreadEncryptPool(ThreadPoolExecutor):
+    def __init__(self, max_workers, mp_context=None, initializer=None):
+        super().__init__(max_workers)
+
+
+def _drafts(n):
+    return [{"index": i, "plaintext": str(i), "classification_attr": "attr"} for i in range(n)]
+
+
+def test_encrypt_stream_keeps_workers_busy_past_a_slow_record(monkeypatch):
+    # Record 3 only finishes once record 10 has started. A pool that waits
+    # for a whole window of workers * chunk_size (8) records before starting
+    # the next one would never start record 10.
+    started_10 = threading.Event()
+
+    def job(args):
+        plaintext, _ = args
+        if plaintext == "10":
+            started_10.set()
+        if plaintext == "3" and not started_10.wait(timeout=5):
+            raise AssertionError("record 10 never started while record 3 was running")
+        return plaintext.encode(), os.getpid(), 0.0
+
+    monkeypatch.setattr(seed_data, "ProcessPoolExecutor", ThreadEncryptPool)
+    monkeypatch.setattr(seed_data, "encrypt_job", job)
+
+    results = list(seed_data.encrypt_stream(None, iter(_drafts(20)), workers=2, chunk_size=4))
+    assert [draft["index"] for draft, _ in results] == list(range(20))
+    assert [blob for _, blob in results] == [str(i).encode() for i in range(20)]
+
+
+def test_encrypt_stream_bounds_records_in_flight(monkeypatch):
+    submitted = []
+    consumed = []
+
+    def job(args):
+        return args[0].encode(), os.getpid(), 0.0
+
+    def drafts():
+        for draft in _drafts(50):
+            submitted.append(draft["index"])
+            assert len(submitted) - len(consumed) <= 2 * 3 + 1
+            yield draft
+
+    monkeypatch.setattr(seed_data, "ProcessPoolExecutor", ThreadEncryptPool)
+    monkeypatch.setattr(seed_data, "encrypt_job", job)
+    for draft, _ in seed_data.encrypt_stream(None, drafts(), workers=2, chunk_size=3):
+        consumed.append(draft["index"])
+    assert consumed == list(range(50))
@@ -0,0 +1,148 @@
+import os
+import asyncio
+import itertools
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("asyncpg")
+pytest.importorskip("aiobotocore")
+pytest.importorskip("otdf_python")
+
+import seed_data_async as sda  # noqa: E402
+
+
+def test_metrics_are_not_shared_with_seed_data():
+    import seed_data
+    assert sda.METRICS is not seed_data.METRICS
+    assert sda.METRICS.job == "seed_data_async"
+    assert seed_data.METRICS.job == "seed_data"
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    async def put_object(self, Bucket, Key, Body, Metadata):
+        await asyncio.sleep(0)
+        self.objects[Key] = (Body, Metadata)
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    @asynccontextmanager
+    async def transaction(self):
+        staged = []
+        self.staged = staged
+        yield
+        self.pool.rows.extend(staged)
+        self.pool.commits += 1
+
+    async def copy_records_to_table(self, table, records, columns):
+        assert table == "tdf_objects" and columns == sda.COPY_COLUMNS
+        self.staged.extend(records)
+
+    async def execute(self, sql, *params):
+        self.pool.notifications.append(params)
+
+
+class FakePool:
+    def __init__(self):
+        self.rows, self.commits, self.notifications, self.closed = [], 0, [], False
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    async def execute(self, sql, *params):
+        return "DELETE 0"
+
+    async def close(self):
+        self.closed = True
+
+
+class ThreadEncryptPool(ThreadPoolExecutor):
+    def __init__(self, max_workers, mp_context=None, initializer=None):
+        super().__init__(max_workers)
+
+
+def fake_encrypt(job):
+    plaintext, attributes = job
+    return b"TDF" + plaintext.encode() * (50 if attributes[0].endswith("topsecret") else 1), os.getpid(), 0.0
+
+
+def test_seed_smoke(monkeypatch):
+    pool, s3 = FakePool(), FakeS3()
+
+    async def create_pool(**kwargs):
+        assert kwargs["server_settings"] == {sda.BULK_LOAD_SETTING: "on"}
+        return pool
+
+    @asynccontextmanager
+    async def s4_client(max_pool_connections):
+        yield s3
+
+    monkeypatch.setattr(sda.asyncpg, "create_pool", create_pool)
+    monkeypatch.setattr(sda, "s4_client", s4_client)
+    monkeypatch.setattr(sda, "ProcessPoolExecutor", ThreadEncryptPool)
+    monkeypatch.setattr(sda, "encrypt_job", fake_encrypt)
+
+    args = argparse.Namespace(
+        count=40, shards=1, shard_index=0, seed="smoke", base_time=datetime(2025, 1, 1), workers=2,
+        concurrency=8, upload_concurrency=4, db_concurrency=2, batch_size=7, queue_depth=8, blob_threshold=1000,
+        bulk_load=True, manifest_engine="pooled", compression="gzip", delete=True,
+    )
+    asyncio.run(sda.seed(args))
+
+    assert pool.closed
+    assert len(pool.rows) == 40
+    assert len({row[0] for row in pool.rows}) == 40
+    offloaded = [row for row in pool.rows if row[7] is not None]
+    assert offloaded and all(row[6] is None for row in offloaded)
+    assert sum(1 for key in s3.objects if key.startswith("manifests/")) == 40
+    assert all(meta.get("manifest-encoding") == "gzip" for key, (_, meta) in s3.objects.items()
+               if key.startswith("manifests/"))
+    assert pool.notifications and all(channel == sda.BULK_LOADED_CHANNEL for channel, _ in pool.notifications)
+    stages = sda.METRICS.summary()["stages"]
+    assert stages["encrypt"]["items"] >= 40 and stages["db_write"]["items"] >= 40
+
+
+def test_failed_record_is_skipped_without_aborting_the_run(monkeypatch):
+    pool, s3 = FakePool(), FakeS3()
+
+    async def create_pool(**kwargs):
+        return pool
+
+    @asynccontextmanager
+    async def s4_client(max_pool_connections):
+        yield s3
+
+    calls = itertools.count()
+
+    def flaky_encrypt(job):
+        if next(calls) == 3:
+            raise RuntimeError("KAS rejected the request")
+        return fake_encrypt(job)
+
+    monkeypatch.setattr(sda.asyncpg, "create_pool", create_pool)
+    monkeypatch.setattr(sda, "s4_client", s4_client)
+    monkeypatch.setattr(sda, "ProcessPoolExecutor", ThreadEncryptPool)
+    monkeypatch.setattr(sda, "encrypt_job", flaky_encrypt)
+    monkeypatch.setattr(sda, "METRICS", sda.StageMetrics("seed_data_async"))
+
+    args = argparse.Namespace(
+        count=20, shards=1, shard_index=0, seed="skip", base_time=datetime(2025, 1, 1), workers=2,
+        concurrency=4, upload_concurrency=4, db_concurrency=1, batch_size=5, queue_depth=4, blob_threshold=None,
+        bulk_load=False, manifest_engine="faker", compression="none", delete=False,
+    )
+    asyncio.run(sda.seed(args))
+
+    assert len(pool.rows) == 19
+    summary = sda.METRICS.summary()
+    assert summary["stages"]["encrypt"]["errors"] == 1
+    assert summary["counters"] == {"records_skipped": 1}
@@ -0,0 +1,125 @@
+import os
+import sys
+import uuid
+import subprocess
+import textwrap
+from datetime import datetime
+
+import pytest
+
+from seed_journal import SeedJournal, JournalMismatch
+
+PARAMS = {"count": 10, "shards": 1, "shard_index": 0, "seed": "s", "base_time": "2024-01-01T00:00:00"}
+SEED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _record(index):
+    when = datetime(2024, 1, 1)
+    return (str(uuid.UUID(int=index + 1)), when, "vehicles", b"\x01", "{}", "{}", b"tdf", None, when, "seed")
+
+
+def test_new_journal_refuses_existing_file_and_resume_needs_one(tmp_path):
+    path = str(tmp_path / "seed.journal")
+    with pytest.raises(JournalMismatch):
+        SeedJournal(path, PARAMS, resume=True)
+    SeedJournal(path, PARAMS).close()
+    with pytest.raises(JournalMismatch):
+        SeedJournal(path, PARAMS)
+
+
+def test_resume_rejects_different_run(tmp_path):
+    path = str(tmp_path / "seed.journal")
+    SeedJournal(path, PARAMS).close()
+    with pytest.raises(JournalMismatch):
+        SeedJournal(path, {**PARAMS, "count": 11}, resume=True)
+
+
+def test_pending_and_committed_units(tmp_path):
+    path = str(tmp_path / "seed.journal")
+    journal = SeedJournal(path, PARAMS)
+    for i in range(4):
+        journal.add(i, _record(i))
+    journal.mark_committed([0, 1])
+    assert journal.counts() == (2, 2)
+    assert journal.indices() == {0, 1, 2, 3}
+    assert list(journal.pending()) == [(2, _record(2)), (3, _record(3))]
+    journal.close()
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def execute(self, sql, params):
+        self._result = [(r,) for r in params[0] if r in self._rows]
+
+    def fetchall(self):
+        return self._result
+
+
+def test_reconcile_marks_units_that_reached_the_db(tmp_path):
+    journal = SeedJournal(str(tmp_path / "seed.journal"), PARAMS)
+    for i in range(3):
+        journal.add(i, _record(i))
+    assert journal.reconcile(_Cursor({_record(1)[0]})) == 1
+    assert journal.counts() == (1, 2)
+    journal.close()
+
+
+CRASHING_RUN = textwrap.dedent("""
+    import os, sys
+    sys.path.insert(0, {seed_dir!r})
+    sys.path.insert(0, {test_dir!r})
+    import seed_data
+    from seed_journal import SeedJournal
+    from test_seed_journal import PARAMS, _record
+
+    class Cursor:
+        def copy_expert(self, sql, stream, size):
+            while stream.read(size):
+                pass
+
+    def units():
+        for i in range(25):
+            yield i, _record(i)
+        os._exit(17)  # hard crash while the 100-row batch is still open
+
+    journal = SeedJournal({path!r}, PARAMS)
+    seed_data.copy_in_batches(None, Cursor(), units(), commit_every=100, journal=journal)
+""")
+
+
+class _Conn:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+class _CopyCursor:
+    def __init__(self):
+        self.copied = b""
+
+    def copy_expert(self, sql, stream, size):
+        while chunk := stream.read(size):
+            self.copied += chunk
+
+
+def test_crash_mid_batch_keeps_finished_units_for_resume(tmp_path):
+    path = str(tmp_path / "seed.journal")
+    script = CRASHING_RUN.format(seed_dir=SEED_DIR, test_dir=os.path.dirname(__file__), path=path)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert result.returncode == 17, result.stderr
+
+    import seed_data
+    journal = SeedJournal(path, PARAMS, resume=True)
+    assert journal.counts() == (0, 25)
+
+    conn, cursor = _Conn(), _CopyCursor()
+    rows = seed_data.copy_in_batches(conn, cursor, journal.pending(), commit_every=100, journal=journal)
+    assert rows == 25
+    assert conn.commits == 1
+    assert all(uuid.UUID(_record(i)[0]).bytes in cursor.copied for i in range(25))
+    assert journal.counts() == (25, 0)
+    journal.close()
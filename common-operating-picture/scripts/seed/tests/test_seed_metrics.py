@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from seed_metrics import StageMetrics, quantile
+
+
+@pytest.mark.parametrize("q, expected", [(0.0, 1), (0.01, 1), (0.5, 50), (0.95, 95), (0.99, 99), (1.0, 100)])
+def test_quantile_is_nearest_rank(q, expected):
+    assert quantile(list(range(1, 101)), q) == expected
+
+
+def test_quantile_edge_cases():
+    assert quantile([], 0.5) == 0.0
+    assert quantile([7], 0.99) == 7
+    assert quantile([1, 2, 3], 0.5) == 2
+    assert quantile([1, 2, 3, 4], 0.5) == 2
+
+
+def test_summary_reports_latency_quantiles_in_milliseconds():
+    metrics = StageMetrics("seed")
+    for ms in range(100, 0, -1):
+        metrics.observe("encrypt", ms / 1e3)
+    metrics.observe("encrypt", 0.5, error=True)
+
+    stage = metrics.summary()["stages"]["encrypt"]
+    assert stage["operations"] == 101
+    assert stage["errors"] == 1
+    assert stage["latency_ms"] == {"p50": 51.0, "p95": 96.0, "p99": 100.0, "max": 500.0}
+
+    text = metrics.prometheus()
+    assert 'seed_stage_duration_seconds{job="seed",stage="encrypt",quantile="0.5"} 0.051' in text
+    assert 'seed_stage_duration_seconds{job="seed",stage="encrypt",quantile="0.99"} 0.1' in text
+    assert 'seed_stage_duration_seconds_count{job="seed",stage="encrypt"} 101' in text
+
+
+def test_counters_are_kept_apart_from_stage_latencies(tmp_path):
+    metrics = StageMetrics("sim")
+    metrics.observe("dr_filter", 0.002, items=100)
+    metrics.count("writes_saved", 40)
+    metrics.count("writes_saved", 2)
+
+    summary = metrics.summary()
+    assert summary["counters"] == {"writes_saved": 42}
+    assert set(summary["stages"]) == {"dr_filter"}
+    assert summary["stages"]["dr_filter"]["items"] == 100
+
+    text = metrics.prometheus(summary)
+    assert 'seed_events_total{job="sim",counter="writes_saved"} 42' in text
+    assert 'stage="writes_saved"' not in text
+
+    json_path = tmp_path / "metrics.json"
+    metrics.write(json_path=str(json_path))
+    assert json.loads(json_path.read_text())["counters"] == {"writes_saved": 42}
+
+
+def test_latency_window_is_bounded_but_totals_cover_the_run():
+    metrics = StageMetrics("sim", max_samples=4)
+    for ms in (900, 800, 1, 2, 3, 4):
+        metrics.observe("loop_lag", ms / 1e3)
+
+    stage = metrics.summary()["stages"]["loop_lag"]
+    assert len(metrics._stages["loop_lag"]["samples"]) == 4
+    # The two slow samples have been overwritten by newer ones.
+    assert stage["latency_ms"]["max"] == 4.0
+    assert stage["operations"] == 6
+    assert stage["busy_seconds"] == 1.71
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import sim_data_fake_opensky as sim
+from dead_reckoning import DeadReckoningFilter
+
+IDS = [f"00000000-0000-4000-8000-{i:012d}" for i in range(3000)]
+
+
+def _simulation(seed=1, **kwargs):
+    return sim.FlightSimulation(IDS, rng=np.random.default_rng(seed), **kwargs)
+
+
+def test_block_size_does_not_change_the_result(monkeypatch):
+    whole = _simulation()
+    for _ in range(40):
+        whole.step()
+    monkeypatch.setattr(sim, "STEP_BLOCK", 700)
+    blocked = _simulation()
+    for _ in range(40):
+        blocked.step()
+    for name in ("phi", "lam", "heading", "speed", "altitude", "waypoint"):
+        np.testing.assert_array_equal(getattr(blocked, name), getattr(whole, name), err_msg=name)
+
+
+def test_carried_sines_and_cosines_track_the_angles():
+    simulation = _simulation()
+    for _ in range(300):
+        simulation.step()
+    for angle, sin, cos in ((simulation.phi, simulation._sin_phi, simulation._cos_phi),
+                            (simulation.lam, simulation._sin_lam, simulation._cos_lam),
+                            (simulation.heading, simulation._sin_heading, simulation._cos_heading)):
+        np.testing.assert_allclose(sin, np.sin(angle), atol=1e-9)
+        np.testing.assert_allclose(cos, np.cos(angle), atol=1e-9)
+
+
+def test_turns_are_rate_limited_and_waypoints_advance():
+    simulation = _simulation()
+    max_turn = np.radians(sim.MAX_TURN_RATE_DEG) * simulation.time_scale
+    rows = np.arange(len(IDS))
+    for _ in range(400):
+        heading = simulation.heading.copy()
+        simulation.step()
+        turn = np.abs((simulation.heading - heading + np.pi) % (2 * np.pi) - np.pi)
+        assert turn.max() <= max_turn + 1e-9
+
+    assert (simulation.waypoint != 1).any()
+    # The cached next waypoint is reloaded for every flight that advanced.
+    np.testing.assert_array_equal(simulation.target_sin_phi, simulation.route_sin_phi[rows, simulation.waypoint])
+    np.testing.assert_array_equal(simulation.target_speed, simulation.route_speed[rows, simulation.waypoint])
+
+
+@pytest.mark.parametrize("time_scale", [20.0, 5000.0])
+def test_each_tick_moves_speed_times_dt(time_scale):
+    # 5000x takes the exact sin/cos path for the per-tick arc instead of the series.
+    simulation = _simulation(time_scale=time_scale)
+    sin_phi, cos_phi, lam = simulation._sin_phi.copy(), simulation._cos_phi.copy(), simulation.lam.copy()
+    simulation.step()
+    cos_moved = sin_phi * simulation._sin_phi + cos_phi * simulation._cos_phi * np.cos(simulation.lam - lam)
+    moved = np.arccos(np.clip(cos_moved, -1.0, 1.0)) * sim.EARTH_RADIUS_M
+    np.testing.assert_allclose(moved, simulation.speed * time_scale, rtol=1e-6)
+
+
+def test_advance_returns_only_the_flights_to_write():
+    simulation = _simulation()
+    dead_reckoning = DeadReckoningFilter(len(IDS), threshold_m=1e9, max_staleness_s=1e9,
+                                         time_scale=simulation.time_scale)
+    wkb, ids, speed, altitude, heading = sim.advance(simulation, dead_reckoning)
+    assert len(wkb) == len(ids) == len(speed) == len(altitude) == len(heading) == len(IDS)
+    assert sim.advance(simulation, dead_reckoning) is None
+    assert len(sim.advance(simulation, None)[0]) == len(IDS)
@@ -0,0 +1,159 @@
+import asyncio
+
+import psycopg2
+import pytest
+
+import sim_db
+from seed_metrics import StageMetrics
+
+STATEMENTS = {"move": ("UPDATE tdf_objects SET ts = now() WHERE id = ANY($1)", ["uuid[]"])}
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.fail_with is not None:
+            error, self.conn.fail_with = self.conn.fail_with, None
+            if isinstance(error, sim_db.RECONNECT_ERRORS):
+                self.conn.closed = 2
+            raise error
+        self.conn.statements.append(sql)
+        self.rowcount = 3
+
+    def fetchall(self):
+        return [(1,)]
+
+
+class FakeConn:
+    def __init__(self, n):
+        self.n = n
+        self.closed = 0
+        self.fail_with = None
+        self.statements = []
+        self.commits = self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    instances = []
+
+    def __init__(self, minconn, maxconn, **params):
+        self.opened = []
+        self.idle = []
+        self.discarded = []
+        FakePool.instances.append(self)
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        conn = FakeConn(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    FakePool.instances = []
+    monkeypatch.setattr(sim_db, "ThreadedConnectionPool", FakePool)
+    database = sim_db.SimDatabase({"host": "db", "port": 5432}, STATEMENTS, metrics=StageMetrics("sim"))
+    yield database
+    database.close()
+
+
+def test_statement_is_prepared_once_per_connection(db):
+    assert db.execute("move", (["a"],))[0] == 3
+    assert db.execute("move", (["b"],))[0] == 3
+    (pool,) = FakePool.instances
+    (conn,) = pool.opened
+    assert [sql.split()[0] for sql in conn.statements] == ["PREPARE", "EXECUTE", "EXECUTE"]
+    assert db.metrics.summary()["stages"]["db_write"]["items"] == 6
+
+
+@pytest.mark.parametrize("error", [psycopg2.OperationalError("server closed the connection"),
+                                   psycopg2.InterfaceError("connection already closed")])
+def test_dropped_connection_is_discarded_and_the_statement_retried(db, error):
+    db.execute("move", (["a"],))
+    (pool,) = FakePool.instances
+    first = pool.opened[0]
+    first.fail_with = error
+
+    assert db.execute("move", (["b"],))[0] == 3
+    assert pool.discarded == [first]
+    second = pool.opened[1]
+    # The fresh connection has no prepared statement yet, so it is prepared again.
+    assert [sql.split()[0] for sql in second.statements] == ["PREPARE", "EXECUTE"]
+    assert first not in db._prepared
+
+
+def test_database_down_raises_and_the_next_call_reconnects(db, monkeypatch):
+    original = FakePool.getconn
+
+    def getconn(pool):
+        conn = original(pool)
+        if len(pool.opened) <= 2:
+            conn.fail_with = psycopg2.OperationalError("could not connect")
+        return conn
+
+    monkeypatch.setattr(FakePool, "getconn", getconn)
+    with pytest.raises(psycopg2.OperationalError):
+        db.execute("move", (["a"],))
+    (pool,) = FakePool.instances
+    assert len(pool.discarded) == 2
+    assert db.execute("move", (["a"],))[0] == 3
+
+
+def test_closed_connection_from_the_pool_is_replaced(db):
+    db.query("SELECT 1")
+    (pool,) = FakePool.instances
+    pool.idle[0].closed = 1
+    assert db.query("SELECT 1") == [(1,)]
+    assert len(pool.discarded) == 1 and len(pool.opened) == 2
+
+
+def test_other_errors_roll_back_and_keep_the_connection(db):
+    db.query("SELECT 1")
+    (pool,) = FakePool.instances
+    conn = pool.idle[0]
+    conn.fail_with = psycopg2.errors.SyntaxError("syntax error")
+    with pytest.raises(psycopg2.errors.SyntaxError):
+        db.query("SELEC 1")
+    assert conn.rollbacks == 1 and pool.discarded == []
+    assert db.query("SELECT 1") == [(1,)]
+    assert pool.opened == [conn]
+
+
+def test_execute_behind_keeps_one_write_outstanding(db):
+    async def ticks():
+        for n in range(3):
+            await db.execute_behind("move", ([str(n)],))
+        await db.flush()
+
+    asyncio.run(ticks())
+    (pool,) = FakePool.instances
+    assert [sql.split()[0] for sql in pool.opened[0].statements] == ["PREPARE", "EXECUTE", "EXECUTE", "EXECUTE"]
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import time
+
+import sim_loop
+from seed_metrics import StageMetrics
+
+
+def _run(tick, interval, metrics, **kwargs):
+    async def main():
+        task = asyncio.create_task(sim_loop.run_ticks(tick, interval, metrics, **kwargs))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    asyncio.run(main())
+
+
+def test_slow_tick_restarts_the_schedule_instead_of_bursting():
+    starts = []
+
+    async def tick():
+        starts.append(time.perf_counter())
+        if len(starts) == 1:
+            await asyncio.sleep(0.12)
+
+    metrics = StageMetrics("sim")
+    _run(tick, 0.05, metrics)
+
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert gaps[0] >= 0.12
+    # Without the restart the two missed slots would run back to back.
+    assert min(gaps[1:]) >= 0.04
+    stages = metrics.summary()["stages"]
+    assert stages["tick"]["operations"] == len(starts)
+    assert stages["loop_lag"]["operations"] >= 1
+
+
+def test_metrics_files_are_rewritten_while_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim_loop, "METRICS_WRITE_SECONDS", 0.05)
+    json_path = tmp_path / "sim.json"
+    prom_path = tmp_path / "sim.prom"
+
+    async def tick():
+        pass
+
+    _run(tick, 0.02, StageMetrics("sim"), json_path=str(json_path), prometheus_path=str(prom_path))
+    assert json.loads(json_path.read_text())["stages"]["tick"]["operations"] >= 1
+    assert 'stage="tick_jitter"' in prom_path.read_text()